@@ -0,0 +1,12 @@
+"""
+Benchmarks por etapa do pipeline com CSVs sintéticos de RDS e ECS,
+comparados com a baseline armazenada (python -m app.benchmarks.executar).
+"""
+
+from .geradores import GERADORES, gerar_csv_ecs, gerar_csv_rds
+
+__all__ = [
+    'GERADORES',
+    'gerar_csv_ecs',
+    'gerar_csv_rds'
+]
@@ -0,0 +1,412 @@
+"""
+Benchmarks do pipeline com CSVs sintéticos (RDS e ECS) de 10k a 1M linhas.
+Mede cada etapa separadamente (leitura do CSV, avaliação dos templates,
+serialização e envio ao intake falso) e o handler de ponta a ponta, e compara
+com a baseline armazenada, falhando se alguma etapa ficar mais lenta que o limiar.
+Com --memoria, mede o pico de memória do handler e o compara com o orçamento
+de cada cenário (ORCAMENTO_MEMORIA_*).
+
+Uso:
+    python -m app.benchmarks.executar --tamanhos 10k,100k
+    python -m app.benchmarks.executar --tamanhos 1m --cenarios rds --etapas leitura,templates
+    python -m app.benchmarks.executar --salvar-baseline
+    python -m app.benchmarks.executar --memoria --tamanhos 100k
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..local.executar import ambiente_temporario, executar, silenciar_logs
+from ..local.intake import IntakeFalso
+from ..src.config.settings import Settings
+from ..src.services.csv_service import CSVService
+from ..src.services.datadog_service import DatadogService
+from ..src.services.payload_service import PayloadService
+from ..src.services.transporte_service import TransporteHTTP
+from .geradores import GERADORES
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PADRAO = os.path.join(DIRETORIO, 'baseline.json')
+EVENTOS = os.path.join(DIRETORIO, '..', 'exemplos', 'eventos')
+
+ETAPAS = ('leitura', 'templates', 'serializacao', 'envio', 'ponta_a_ponta')
+
+# Diferenças abaixo deste valor (s) são ruído de medição, não regressão
+FOLGA_MINIMA = 0.005
+
+# Orçamento do pico de memória do handler (tracemalloc, MB): parte fixa (clientes
+# AWS, módulos carregados) mais o custo por 100k linhas de cada cenário. O RSS do
+# processo fica bem acima (overhead do interpretador e do próprio tracemalloc)
+ORCAMENTO_MEMORIA_FIXO_MB = 20
+ORCAMENTO_MEMORIA_MB_POR_100K = {'rds': 300, 'ecs': 160}
+
+# Variáveis de ambiente das medições (sem AWS nem Datadog reais)
+AMBIENTE = {
+    'DATADOG_API_KEY': 'benchmark',
+    'DATADOG_APP_KEY': 'benchmark',
+    'IDEMPOTENCIA': 'false',
+    'CACHE_S3': 'false'
+}
+
+
+def carregar_evento(cenario: str) -> Dict[str, Any]:
+    """Carrega o evento de exemplo do cenário (exemplos/eventos/eventbridge-<cenario>.json)."""
+    with open(os.path.join(EVENTOS, f"eventbridge-{cenario}.json"), encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def interpretar_tamanho(texto: str) -> int:
+    """Converte '10k', '100k', '1m' ou '5000' em número de linhas."""
+    texto = texto.strip().lower()
+    multiplicadores = {'k': 1000, 'm': 1000000}
+    if texto and texto[-1] in multiplicadores:
+        return int(float(texto[:-1]) * multiplicadores[texto[-1]])
+    return int(texto)
+
+
+def gerar_csv(cenario: str, linhas: int, diretorio: str) -> str:
+    """Gera o CSV do cenário no diretório (reutilizando um já gerado) e retorna o caminho."""
+    caminho = os.path.join(diretorio, f"{cenario}-{linhas}.csv")
+    if not os.path.exists(caminho):
+        GERADORES[cenario](caminho, linhas)
+    return caminho
+
+
+def medir(funcao: Callable[[], Any], repeticoes: int) -> Tuple[float, Any]:
+    """
+    Executa a função várias vezes e retorna o menor tempo (menos sujeito a ruído).
+    
+    Args:
+        funcao: Função medida
+        repeticoes: Número de execuções
+        
+    Returns:
+        Tupla (menor tempo em segundos, resultado da última execução)
+    """
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        resultado = None
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def calibrar() -> float:
+    """
+    Mede uma carga fixa de Python puro, usada para comparar resultados de
+    máquinas diferentes com a baseline.
+    
+    Returns:
+        Tempo da carga em segundos
+    """
+    def carga():
+        linhas = [{'id': indice, 'nome': f"item-{indice}", 'valor': indice * 1.5} for indice in range(50000)]
+        json.dumps(sorted(linhas, key=lambda linha: -linha['valor']))
+        
+    return medir(carga, 5)[0]
+
+
+def medir_cenario(
+    cenario: str,
+    linhas: int,
+    etapas: Sequence[str],
+    repeticoes: int,
+    diretorio: str
+) -> Dict[str, float]:
+    """
+    Gera o CSV do cenário e mede as etapas pedidas.
+    
+    Args:
+        cenario: 'rds' ou 'ecs'
+        linhas: Número de linhas do CSV
+        etapas: Etapas a medir (ver ETAPAS)
+        repeticoes: Execuções por etapa
+        diretorio: Diretório dos CSVs gerados
+        
+    Returns:
+        Etapa -> menor tempo em segundos
+    """
+    evento = carregar_evento(cenario)
+    payloads = evento['payloads']
+    caminho = gerar_csv(cenario, linhas, diretorio)
+        
+    tempos: Dict[str, float] = {}
+    colunas = PayloadService().colunas_referenciadas(payloads)
+    tempos_leitura, tabela = medir(lambda: CSVService().ler_csv(caminho, colunas=colunas), repeticoes)
+    if 'leitura' in etapas:
+        tempos['leitura'] = tempos_leitura
+        
+    precisa_metricas = any(etapa in etapas for etapa in ('templates', 'serializacao', 'envio'))
+    if precisa_metricas:
+        tempo_templates, metricas = medir(
+            lambda: PayloadService().processar_templates(tabela, payloads), repeticoes
+        )
+        if 'templates' in etapas:
+            tempos['templates'] = tempo_templates
+            
+    if 'serializacao' in etapas or 'envio' in etapas:
+        with IntakeFalso() as intake, ambiente_temporario({**AMBIENTE, 'DATADOG_API_URL': intake.url}):
+            settings = Settings()
+            transporte = TransporteHTTP(settings)
+            tamanho_lote = settings.tamanho_lote
+            
+            if 'serializacao' in etapas:
+                tempos['serializacao'] = medir(
+                    lambda: [
+                        transporte.serializar(metricas[inicio:inicio + tamanho_lote])
+                        for inicio in range(0, len(metricas), tamanho_lote)
+                    ],
+                    repeticoes
+                )[0]
+                
+            if 'envio' in etapas:
+                servico = DatadogService(settings, transporte=transporte)
+                tempos['envio'] = medir(lambda: servico.enviar_metricas_em_lotes(metricas), repeticoes)[0]
+                
+    # Liberar a tabela e as métricas antes da execução de ponta a ponta
+    tabela = metricas = None
+    
+    if 'ponta_a_ponta' in etapas:
+        tempos['ponta_a_ponta'], resultado = medir(
+            lambda: executar(caminho, evento, variaveis=AMBIENTE), repeticoes
+        )
+        if resultado['falhas']:
+            raise RuntimeError(f"Execução de ponta a ponta falhou: {resultado['respostas']}")
+    
+    return tempos
+
+
+def medir_memoria(cenario: str, linhas: int, diretorio: str) -> Dict[str, Any]:
+    """
+    Executa o handler de ponta a ponta com PERFIL_MEMORIA e compara o pico de
+    memória com o orçamento do cenário.
+    
+    Args:
+        cenario: 'rds' ou 'ecs'
+        linhas: Número de linhas do CSV
+        diretorio: Diretório dos CSVs gerados
+        
+    Returns:
+        Pico do tracemalloc e de RSS, pico por etapa, MB por 100k linhas,
+        orçamento e se foi excedido
+    """
+    caminho = gerar_csv(cenario, linhas, diretorio)
+    resultado = executar(
+        caminho,
+        carregar_evento(cenario),
+        variaveis={**AMBIENTE, 'PERFIL_MEMORIA': 'true', 'PERFIL_MEMORIA_ALOCACOES': '0'}
+    )
+    if resultado['falhas']:
+        raise RuntimeError(f"Execução com perfil de memória falhou: {resultado['respostas']}")
+    
+    memoria = resultado['respostas'][0]['memoria']
+    orcamento = ORCAMENTO_MEMORIA_FIXO_MB + ORCAMENTO_MEMORIA_MB_POR_100K[cenario] * linhas / 100000
+    return {
+        'cenario': cenario,
+        'linhas': linhas,
+        'pico_mb': memoria['pico_tracemalloc_mb'],
+        'pico_rss_mb': memoria['pico_rss_mb'],
+        'mb_por_100k': memoria['pico_tracemalloc_mb'] * 100000 / linhas,
+        'etapas': {etapa: medida['pico_mb'] for etapa, medida in memoria['etapas'].items()},
+        'orcamento_mb': orcamento,
+        'excedeu': memoria['pico_tracemalloc_mb'] > orcamento
+    }
+
+
+def comparar(
+    resultados: Dict[str, Dict[str, Dict[str, float]]],
+    calibracao: float,
+    baseline: Optional[Dict[str, Any]],
+    limiar: float
+) -> List[Dict[str, Any]]:
+    """
+    Compara os tempos medidos com a baseline, ajustada pela calibração da máquina.
+    
+    Args:
+        resultados: Cenário -> linhas (texto) -> etapa -> segundos
+        calibracao: Calibração da máquina atual
+        baseline: Conteúdo do arquivo de baseline (None se não houver)
+        limiar: Aumento relativo tolerado (ex: 0.25 para 25%)
+        
+    Returns:
+        Uma linha por medição, com o tempo esperado, a variação e se regrediu
+    """
+    escala = calibracao / baseline['calibracao'] if baseline else 1.0
+    referencia = baseline['resultados'] if baseline else {}
+    linhas = []
+    
+    for cenario, por_tamanho in resultados.items():
+        for tamanho, por_etapa in por_tamanho.items():
+            for etapa, tempo in por_etapa.items():
+                base = referencia.get(cenario, {}).get(tamanho, {}).get(etapa)
+                esperado = base * escala if base is not None else None
+                linhas.append({
+                    'cenario': cenario,
+                    'linhas': int(tamanho),
+                    'etapa': etapa,
+                    'segundos': tempo,
+                    'linhas_por_segundo': int(tamanho) / tempo if tempo else 0.0,
+                    'esperado': esperado,
+                    'variacao': tempo / esperado - 1 if esperado else None,
+                    'regressao': esperado is not None and tempo > esperado * (1 + limiar) + FOLGA_MINIMA
+                })
+    
+    return linhas
+
+
+def salvar_baseline(
+    caminho: str,
+    resultados: Dict[str, Dict[str, Dict[str, float]]],
+    calibracao: float,
+    baseline: Optional[Dict[str, Any]]
+) -> None:
+    """
+    Grava a baseline, mantendo as medições anteriores de cenários/tamanhos não medidos agora.
+    Medições antigas são convertidas para a calibração atual.
+    """
+    escala = calibracao / baseline['calibracao'] if baseline else 1.0
+    combinados: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for cenario, por_tamanho in (baseline or {}).get('resultados', {}).items():
+        for tamanho, por_etapa in por_tamanho.items():
+            combinados.setdefault(cenario, {})[tamanho] = {
+                etapa: round(tempo * escala, 4) for etapa, tempo in por_etapa.items()
+            }
+    for cenario, por_tamanho in resultados.items():
+        for tamanho, por_etapa in por_tamanho.items():
+            combinados.setdefault(cenario, {}).setdefault(tamanho, {}).update(
+                {etapa: round(tempo, 4) for etapa, tempo in por_etapa.items()}
+            )
+    
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump({
+            'calibracao': round(calibracao, 4),
+            'python': platform.python_version(),
+            'resultados': combinados
+        }, arquivo, indent=2, sort_keys=True)
+        arquivo.write('\n')
+
+
+def formatar_tabela(linhas: List[Dict[str, Any]]) -> str:
+    """Formata a comparação para o terminal."""
+    saida = [f"{'cenário':<8}{'linhas':>10}  {'etapa':<15}{'segundos':>10}{'linhas/s':>12}{'variação':>11}"]
+    for linha in linhas:
+        variacao = f"{linha['variacao']:+.1%}" if linha['variacao'] is not None else '-'
+        marca = '  REGRESSÃO' if linha['regressao'] else ''
+        saida.append(
+            f"{linha['cenario']:<8}{linha['linhas']:>10}  {linha['etapa']:<15}"
+            f"{linha['segundos']:>10.3f}{linha['linhas_por_segundo']:>12.0f}{variacao:>11}{marca}"
+        )
+    return '\n'.join(saida)
+
+
+def formatar_memoria(linhas: List[Dict[str, Any]]) -> str:
+    """Formata as medições de memória para o terminal."""
+    saida = [f"{'cenário':<8}{'linhas':>10}{'pico MB':>10}{'MB/100k':>10}{'orçamento':>11}{'RSS MB':>9}  etapa de pico"]
+    for linha in linhas:
+        etapa = max(linha['etapas'], key=linha['etapas'].get) if linha['etapas'] else '-'
+        marca = '  EXCEDEU' if linha['excedeu'] else ''
+        saida.append(
+            f"{linha['cenario']:<8}{linha['linhas']:>10}{linha['pico_mb']:>10.1f}{linha['mb_por_100k']:>10.1f}"
+            f"{linha['orcamento_mb']:>11.1f}{linha['pico_rss_mb'] or 0:>9.1f}  {etapa}{marca}"
+        )
+    return '\n'.join(saida)
+
+
+def main(argumentos: Optional[Sequence[str]] = None) -> int:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(description='Benchmarks do pipeline CSV -> Datadog.')
+    parser.add_argument('--cenarios', default='rds,ecs', help='Cenários separados por vírgula (rds, ecs)')
+    parser.add_argument('--tamanhos', default='10k,100k', help='Linhas por CSV (ex: 10k,100k,1m)')
+    parser.add_argument('--etapas', default=','.join(ETAPAS), help=f"Etapas medidas ({', '.join(ETAPAS)})")
+    parser.add_argument('--repeticoes', type=int, default=3, help='Execuções por etapa (vale a mais rápida)')
+    parser.add_argument('--baseline', default=BASELINE_PADRAO, help='Arquivo de baseline')
+    parser.add_argument('--limiar', type=float, default=0.25, help='Aumento de tempo tolerado (0.25 = 25%%)')
+    parser.add_argument('--salvar-baseline', action='store_true', help='Grava os tempos medidos como baseline')
+    parser.add_argument('--diretorio', help='Diretório para gerar (e reutilizar) os CSVs sintéticos')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON')
+    parser.add_argument(
+        '--memoria', action='store_true',
+        help='Mede o pico de memória do handler (perfil de memória) em vez dos tempos'
+    )
+    args = parser.parse_args(argumentos)
+    
+    cenarios = [cenario.strip() for cenario in args.cenarios.split(',') if cenario.strip()]
+    tamanhos = [interpretar_tamanho(tamanho) for tamanho in args.tamanhos.split(',') if tamanho.strip()]
+    etapas = [etapa.strip() for etapa in args.etapas.split(',') if etapa.strip()]
+    
+    invalidos = [cenario for cenario in cenarios if cenario not in GERADORES]
+    invalidos += [etapa for etapa in etapas if etapa not in ETAPAS]
+    if invalidos:
+        parser.error(f"Cenários/etapas inválidos: {invalidos}")
+        
+    silenciar_logs()
+    
+    if args.memoria:
+        return main_memoria(cenarios, tamanhos, args.diretorio, args.json)
+    
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as arquivo:
+            baseline = json.load(arquivo)
+            
+    calibracao = calibrar()
+    resultados: Dict[str, Dict[str, Dict[str, float]]] = {}
+    
+    with tempfile.TemporaryDirectory() as temporario:
+        diretorio = args.diretorio or temporario
+        os.makedirs(diretorio, exist_ok=True)
+        for cenario in cenarios:
+            for linhas in tamanhos:
+                resultados.setdefault(cenario, {})[str(linhas)] = medir_cenario(
+                    cenario, linhas, etapas, args.repeticoes, diretorio
+                )
+    
+    comparacao = comparar(resultados, calibracao, baseline, args.limiar)
+    
+    if args.json:
+        print(json.dumps({'calibracao': calibracao, 'medicoes': comparacao}, indent=2, ensure_ascii=False))
+    else:
+        print(f"Calibração: {calibracao:.4f}s" + (f" (baseline: {baseline['calibracao']:.4f}s)" if baseline else ''))
+        print(formatar_tabela(comparacao))
+        
+    if args.salvar_baseline:
+        salvar_baseline(args.baseline, resultados, calibracao, baseline)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+    
+    regressoes = [linha for linha in comparacao if linha['regressao']]
+    if regressoes:
+        print(f"{len(regressoes)} etapa(s) acima do limiar de {args.limiar:.0%}")
+        return 1
+    return 0
+
+
+def main_memoria(cenarios: Sequence[str], tamanhos: Sequence[int], diretorio: Optional[str], em_json: bool) -> int:
+    """Mede o pico de memória de cada cenário e tamanho; retorna 1 se algum exceder o orçamento."""
+    with tempfile.TemporaryDirectory() as temporario:
+        diretorio = diretorio or temporario
+        os.makedirs(diretorio, exist_ok=True)
+        medicoes = [medir_memoria(cenario, linhas, diretorio) for cenario in cenarios for linhas in tamanhos]
+        
+    if em_json:
+        print(json.dumps(medicoes, indent=2, ensure_ascii=False))
+    else:
+        print(formatar_memoria(medicoes))
+        
+    excedidos = [medicao for medicao in medicoes if medicao['excedeu']]
+    if excedidos:
+        print(f"{len(excedidos)} medição(ões) acima do orçamento de memória")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Geradores de CSVs sintéticos com o formato dos exemplos de RDS e ECS.
+As cardinalidades imitam um inventário real: poucas contas, regiões e
+engines, e um identificador distinto por instância/tarefa.
+"""
+
+import csv
+import random
+
+_ALEATORIO_CONTAS = random.Random(42)
+CONTAS = [
+    (f"{_ALEATORIO_CONTAS.randrange(10 ** 11, 10 ** 12):012d}", f"Conta{indice:02d}")
+    for indice in range(50)
+]
+REGIOES = ['us-east-1', 'us-east-2', 'us-west-2', 'eu-west-1', 'sa-east-1']
+ENGINES = ['postgres', 'mysql', 'aurora-postgresql', 'aurora-mysql', 'mariadb']
+
+COLUNAS_RDS = [
+    'account_id', 'account_name', 'db_instance_identifier', 'engine',
+    'configured_iops_provisionado', 'allocated_storage_gb', 'max_connections', 'region'
+]
+COLUNAS_ECS = [
+    'account_id', 'cluster_name', 'service_name', 'task_definition',
+    'task_arn', 'cpu_limit', 'memory_limit', 'region'
+]
+
+
+def gerar_csv_rds(caminho: str, linhas: int, semente: int = 0) -> None:
+    """
+    Gera um CSV no formato de exemplos/csvs/rds-exemplo.csv.
+    
+    Args:
+        caminho: Arquivo de saída
+        linhas: Número de linhas de dados
+        semente: Semente dos valores aleatórios (mesmo arquivo a cada execução)
+    """
+    aleatorio = random.Random(semente)
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(COLUNAS_RDS)
+        for indice in range(linhas):
+            conta, nome_conta = CONTAS[indice % len(CONTAS)]
+            escritor.writerow([
+                conta,
+                nome_conta,
+                f"database-{nome_conta.lower()}-{indice:07d}",
+                aleatorio.choice(ENGINES),
+                aleatorio.choice((1000, 3000, 5000, 12000)),
+                aleatorio.choice((20, 50, 100, 200, 500)),
+                aleatorio.randrange(100, 5000),
+                REGIOES[indice % len(REGIOES)]
+            ])
+
+
+def gerar_csv_ecs(caminho: str, linhas: int, semente: int = 0) -> None:
+    """
+    Gera um CSV no formato de exemplos/csvs/ecs-exemplo.csv.
+    
+    Args:
+        caminho: Arquivo de saída
+        linhas: Número de linhas de dados
+        semente: Semente dos valores aleatórios (mesmo arquivo a cada execução)
+    """
+    aleatorio = random.Random(semente)
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(COLUNAS_ECS)
+        for indice in range(linhas):
+            conta, _ = CONTAS[indice % len(CONTAS)]
+            regiao = REGIOES[indice % len(REGIOES)]
+            cluster = f"cluster-{indice % 20:02d}"
+            servico = f"service-{indice % 200:03d}"
+            escritor.writerow([
+                conta,
+                cluster,
+                servico,
+                f"{servico}-task:{aleatorio.randrange(1, 30)}",
+                f"arn:aws:ecs:{regiao}:{conta}:task/{cluster}/{aleatorio.getrandbits(64):016x}",
+                aleatorio.choice((256, 512, 1024, 2048, 4096)),
+                aleatorio.choice((512, 1024, 2048, 4096, 8192)),
+                regiao
+            ])
+
+
+GERADORES = {
+    'rds': gerar_csv_rds,
+    'ecs': gerar_csv_ecs
+}
@@ -0,0 +1,12 @@
+"""
+Ferramentas para executar a Lambda localmente, sem AWS nem Datadog:
+substituto do S3, intake falso do Datadog e linha de comando de carga.
+"""
+
+from .intake import IntakeFalso
+from .s3_local import S3Local
+
+__all__ = [
+    'IntakeFalso',
+    'S3Local'
+]
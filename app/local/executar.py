@@ -0,0 +1,276 @@
+"""
+Executa o lambda_handler de ponta a ponta contra um CSV local, sem AWS nem Datadog.
+O CSV é servido pelo S3 local e as métricas chegam ao intake falso; ao final são
+reportadas linhas/s, séries/s, bytes enviados e percentis de latência.
+
+Uso:
+    python -m app.local.executar --csv app/exemplos/csvs/ecs-exemplo.csv \\
+        --evento app/exemplos/eventos/eventbridge-ecs.json --linhas 100000 --repeticoes 3
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from ..src.handlers.lambda_handler import lambda_handler
+from .intake import IntakeFalso
+from .s3_local import S3Local
+
+
+class ContextoLocal:
+    """Contexto mínimo da Lambda para execuções locais."""
+    
+    def __init__(self, timeout_ms: int = 900000):
+        """
+        Inicializa o contexto com um aws_request_id novo.
+        
+        Args:
+            timeout_ms: Tempo limite da invocação em milissegundos
+        """
+        self.aws_request_id = str(uuid.uuid4())
+        self.function_name = 'lambda-datadog-metrics-local'
+        self.memory_limit_in_mb = 1024
+        self._limite = time.monotonic() + timeout_ms / 1000
+    
+    def get_remaining_time_in_millis(self) -> int:
+        """Milissegundos restantes até o tempo limite (como no contexto da Lambda)."""
+        return max(0, int((self._limite - time.monotonic()) * 1000))
+
+
+def percentil(valores: Sequence[float], p: float) -> float:
+    """
+    Calcula o percentil pelo método do posto mais próximo.
+    
+    Args:
+        valores: Amostras
+        p: Percentil entre 0 e 100
+    
+    Returns:
+        Valor do percentil (0 se não houver amostras)
+    """
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def ampliar_csv(origem: str, destino: str, linhas: int) -> None:
+    """
+    Grava em destino o cabeçalho da origem e suas linhas de dados repetidas
+    até atingir o total pedido.
+    
+    Args:
+        origem: CSV de exemplo
+        destino: CSV gerado
+        linhas: Número de linhas de dados do CSV gerado
+    """
+    with open(origem, 'r', encoding='utf-8', newline='') as arquivo:
+        cabecalho = arquivo.readline()
+        dados = [linha if linha.endswith('\n') else linha + '\n' for linha in arquivo if linha.strip()]
+    
+    if not dados:
+        raise ValueError(f"CSV sem linhas de dados: {origem}")
+    
+    with open(destino, 'w', encoding='utf-8', newline='') as arquivo:
+        arquivo.write(cabecalho)
+        completas, resto = divmod(linhas, len(dados))
+        for _ in range(completas):
+            arquivo.writelines(dados)
+        arquivo.writelines(dados[:resto])
+
+
+@contextlib.contextmanager
+def ambiente_temporario(variaveis: Dict[str, str]) -> Iterator[None]:
+    """Define variáveis de ambiente e restaura os valores anteriores ao final."""
+    anteriores = {nome: os.environ.get(nome) for nome in variaveis}
+    os.environ.update(variaveis)
+    try:
+        yield
+    finally:
+        for nome, valor in anteriores.items():
+            if valor is None:
+                os.environ.pop(nome, None)
+            else:
+                os.environ[nome] = valor
+
+
+def chave_do_evento(evento: Dict[str, Any], csv: str) -> str:
+    """Chave do S3 onde o CSV deve estar para o s3_path do evento."""
+    s3_path = evento['s3_path']
+    if s3_path.endswith('.csv'):
+        return s3_path
+    return f"{s3_path.rstrip('/')}/{os.path.basename(csv)}"
+
+
+def executar(
+    csv: str,
+    evento: Dict[str, Any],
+    repeticoes: int = 1,
+    linhas: Optional[int] = None,
+    intake: Optional[IntakeFalso] = None,
+    latencia_s3: float = 0.0,
+    variaveis: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Executa o handler contra o CSV e resume o desempenho.
+    
+    Args:
+        csv: Caminho do CSV local
+        evento: Evento do EventBridge (s3_bucket/s3_path apontam para o S3 local)
+        repeticoes: Número de invocações (a partir da segunda, o container está "quente")
+        linhas: Se informado, o CSV é ampliado até esse número de linhas
+        intake: Intake falso a usar (padrão: um sem latência nem falhas)
+        latencia_s3: Segundos de espera por requisição ao S3 local
+        variaveis: Variáveis de ambiente adicionais (ex: TAMANHO_LOTE)
+    
+    Returns:
+        Dicionário com respostas, durações, estatísticas do intake e taxas
+    """
+    intake = intake or IntakeFalso()
+    
+    with tempfile.TemporaryDirectory() as diretorio, S3Local(
+        os.path.join(diretorio, 's3'), latencia_s3
+    ) as s3, intake:
+        chave = chave_do_evento(evento, csv)
+        if linhas:
+            ampliado = os.path.join(diretorio, 'ampliado.csv')
+            ampliar_csv(csv, ampliado, linhas)
+            csv = ampliado
+        with open(csv, 'rb') as arquivo:
+            s3.colocar(evento['s3_bucket'], chave, arquivo.read())
+        
+        diretorio_temp = os.path.join(diretorio, 'lambda')
+        os.makedirs(diretorio_temp)
+        
+        ambiente = {
+            'AWS_ENDPOINT_URL_S3': s3.url,
+            'AWS_ACCESS_KEY_ID': 'local',
+            'AWS_SECRET_ACCESS_KEY': 'local',
+            'AWS_DEFAULT_REGION': 'us-east-1',
+            'DATADOG_API_KEY': 'local',
+            'DATADOG_APP_KEY': 'local',
+            'DATADOG_API_URL': intake.url,
+            'DIRETORIO_TEMP': diretorio_temp
+        }
+        ambiente.update(variaveis or {})
+        
+        respostas: List[Dict[str, Any]] = []
+        duracoes: List[float] = []
+        with ambiente_temporario(ambiente):
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                resposta = lambda_handler(evento, ContextoLocal())
+                duracoes.append(time.perf_counter() - inicio)
+                respostas.append({'statusCode': resposta['statusCode'], **json.loads(resposta['body'])})
+        
+        estatisticas = intake.estatisticas()
+        latencias = list(intake.latencias)
+        requisicoes_s3 = s3.requisicoes
+    
+    duracao_total = sum(duracoes) or 1e-9
+    linhas_processadas = sum(resposta.get('linhas_processadas', 0) for resposta in respostas)
+    
+    return {
+        'invocacoes': repeticoes,
+        'falhas': sum(1 for resposta in respostas if resposta['statusCode'] != 200),
+        'linhas_processadas': linhas_processadas,
+        'linhas_por_segundo': linhas_processadas / duracao_total,
+        'series_por_segundo': estatisticas['series'] / duracao_total,
+        'duracao_ms': {
+            'total': duracao_total * 1000,
+            'p50': percentil(duracoes, 50) * 1000,
+            'p95': percentil(duracoes, 95) * 1000,
+            'p99': percentil(duracoes, 99) * 1000
+        },
+        'latencia_requisicoes_ms': {
+            'p50': percentil(latencias, 50) * 1000,
+            'p95': percentil(latencias, 95) * 1000,
+            'p99': percentil(latencias, 99) * 1000
+        },
+        'intake': estatisticas,
+        'requisicoes_s3': requisicoes_s3,
+        'respostas': respostas
+    }
+
+
+def silenciar_logs(nivel: int = logging.WARNING) -> None:
+    """Eleva o nível dos loggers da Lambda (os logs INFO por lote distorcem as medições)."""
+    for nome in list(logging.root.manager.loggerDict):
+        if nome.startswith('app.src'):
+            logging.getLogger(nome).setLevel(nivel)
+
+
+def formatar_relatorio(resultado: Dict[str, Any]) -> str:
+    """Formata o resultado de executar() para o terminal."""
+    intake = resultado['intake']
+    duracao = resultado['duracao_ms']
+    latencia = resultado['latencia_requisicoes_ms']
+    return '\n'.join([
+        f"Invocações:           {resultado['invocacoes']} (falhas: {resultado['falhas']})",
+        f"Linhas processadas:   {resultado['linhas_processadas']} "
+        f"({resultado['linhas_por_segundo']:.0f} linhas/s)",
+        f"Séries recebidas:     {intake['series']} ({resultado['series_por_segundo']:.0f} séries/s)",
+        f"Bytes enviados:       {intake['bytes_recebidos']} "
+        f"({intake['bytes_descomprimidos']} descomprimidos)",
+        f"Requisições:          {intake['requisicoes']} por status {intake['por_status']}, "
+        f"S3: {resultado['requisicoes_s3']}",
+        f"Duração (ms):         p50 {duracao['p50']:.1f}  p95 {duracao['p95']:.1f}  "
+        f"p99 {duracao['p99']:.1f}  total {duracao['total']:.1f}",
+        f"Latência req. (ms):   p50 {latencia['p50']:.1f}  p95 {latencia['p95']:.1f}  "
+        f"p99 {latencia['p99']:.1f}"
+    ])
+
+
+def main(argumentos: Optional[Sequence[str]] = None) -> int:
+    """Ponto de entrada da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description='Executa o lambda_handler contra um CSV local com S3 e intake do Datadog simulados.'
+    )
+    parser.add_argument('--csv', required=True, help='CSV local servido pelo S3 simulado')
+    parser.add_argument('--evento', required=True, help='Arquivo JSON com o evento do EventBridge')
+    parser.add_argument('--repeticoes', type=int, default=1, help='Número de invocações')
+    parser.add_argument('--linhas', type=int, help='Amplia o CSV até este número de linhas')
+    parser.add_argument('--latencia-ms', type=float, default=0.0, help='Latência de cada resposta do intake')
+    parser.add_argument('--taxa-429', type=float, default=0.0, help='Fração de respostas 429 do intake')
+    parser.add_argument('--taxa-413', type=float, default=0.0, help='Fração de respostas 413 do intake')
+    parser.add_argument('--latencia-s3-ms', type=float, default=0.0, help='Latência de cada requisição ao S3')
+    parser.add_argument(
+        '--env', action='append', default=[], metavar='NOME=VALOR',
+        help='Variável de ambiente adicional (pode repetir)'
+    )
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado completo em JSON')
+    parser.add_argument('--verboso', action='store_true', help='Mantém os logs INFO da Lambda')
+    args = parser.parse_args(argumentos)
+    
+    with open(args.evento, 'r', encoding='utf-8') as arquivo:
+        evento = json.load(arquivo)
+    
+    variaveis = dict(item.split('=', 1) for item in args.env)
+    
+    if not args.verboso:
+        silenciar_logs()
+    
+    resultado = executar(
+        args.csv,
+        evento,
+        repeticoes=args.repeticoes,
+        linhas=args.linhas,
+        intake=IntakeFalso(args.latencia_ms / 1000, args.taxa_429, args.taxa_413, semente=0),
+        latencia_s3=args.latencia_s3_ms / 1000,
+        variaveis=variaveis
+    )
+    
+    print(json.dumps(resultado, indent=2, ensure_ascii=False) if args.json else formatar_relatorio(resultado))
+    return 0 if resultado['falhas'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
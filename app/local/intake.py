@@ -0,0 +1,215 @@
+"""
+Intake falso do Datadog para testes de ponta a ponta e de carga.
+Emula POST /api/v2/series: descomprime gzip, valida o corpo, aplica os limites
+de tamanho da API e pode simular latência, 429 (rate limit) e 413 (payload
+muito grande).
+"""
+
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# Limites de tamanho do corpo da API de séries
+TAMANHO_MAXIMO_COMPRIMIDO = 500 * 1024
+TAMANHO_MAXIMO_DESCOMPRIMIDO = 5 * 1024 * 1024
+
+
+class IntakeFalso:
+    """Servidor HTTP local que se comporta como a API de séries do Datadog."""
+    
+    def __init__(
+        self,
+        latencia: float = 0.0,
+        taxa_429: float = 0.0,
+        taxa_413: float = 0.0,
+        retry_after: int = 1,
+        guardar_series: bool = False,
+        semente: Optional[int] = None
+    ):
+        """
+        Inicializa o intake (sem iniciá-lo).
+        
+        Args:
+            latencia: Segundos de espera antes de cada resposta
+            taxa_429: Fração das requisições respondidas com 429
+            taxa_413: Fração das requisições respondidas com 413
+            retry_after: Valor do cabeçalho Retry-After das respostas 429
+            guardar_series: Se True, guarda as séries recebidas em 'series'
+            semente: Semente das falhas simuladas (reprodutibilidade)
+        """
+        self.latencia = latencia
+        self.taxa_429 = taxa_429
+        self.taxa_413 = taxa_413
+        self.retry_after = retry_after
+        self.guardar_series = guardar_series
+        self._aleatorio = random.Random(semente)
+        self._trava = threading.Lock()
+        self._servidor: Optional[ThreadingHTTPServer] = None
+        self.limpar()
+    
+    @property
+    def url(self) -> str:
+        """URL da API de séries (para DATADOG_API_URL ou 'url' em DATADOG_DESTINOS)."""
+        return f"http://127.0.0.1:{self._servidor.server_port}/api/v2/series"
+    
+    def iniciar(self) -> 'IntakeFalso':
+        """Inicia o servidor em uma thread em segundo plano."""
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), _ManipuladorIntake)
+        self._servidor.daemon_threads = True
+        self._servidor.intake = self
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+    
+    def parar(self) -> None:
+        """Encerra o servidor."""
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+    
+    def __enter__(self) -> 'IntakeFalso':
+        return self.iniciar()
+    
+    def __exit__(self, *args) -> None:
+        self.parar()
+    
+    def limpar(self) -> None:
+        """Zera as estatísticas e as séries guardadas."""
+        with self._trava:
+            self.series: List[Dict[str, Any]] = []
+            self.por_status: Dict[int, int] = {}
+            self.latencias: List[float] = []
+            self.total_series = 0
+            self.total_pontos = 0
+            self.bytes_recebidos = 0
+            self.bytes_descomprimidos = 0
+    
+    def estatisticas(self) -> Dict[str, Any]:
+        """
+        Resume o que foi recebido.
+        
+        Returns:
+            Dicionário com requisições por status, séries, pontos e bytes
+        """
+        with self._trava:
+            return {
+                'requisicoes': sum(self.por_status.values()),
+                'por_status': dict(self.por_status),
+                'series': self.total_series,
+                'pontos': self.total_pontos,
+                'bytes_recebidos': self.bytes_recebidos,
+                'bytes_descomprimidos': self.bytes_descomprimidos
+            }
+    
+    def _sortear_falha(self) -> Optional[int]:
+        """Sorteia uma falha simulada (429 ou 413) para a requisição."""
+        with self._trava:
+            sorteio = self._aleatorio.random()
+        if sorteio < self.taxa_429:
+            return 429
+        if sorteio < self.taxa_429 + self.taxa_413:
+            return 413
+        return None
+    
+    def _registrar(
+        self,
+        status: int,
+        inicio: float,
+        corpo: int,
+        descomprimido: int,
+        series: Optional[List[Dict[str, Any]]]
+    ) -> None:
+        """Contabiliza uma requisição atendida."""
+        with self._trava:
+            self.por_status[status] = self.por_status.get(status, 0) + 1
+            self.latencias.append(time.perf_counter() - inicio)
+            self.bytes_recebidos += corpo
+            self.bytes_descomprimidos += descomprimido
+            if series is not None:
+                self.total_series += len(series)
+                self.total_pontos += sum(len(serie.get('points', ())) for serie in series)
+                if self.guardar_series:
+                    self.series.extend(series)
+
+
+class _ManipuladorIntake(BaseHTTPRequestHandler):
+    """Atende POST /api/v2/series."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def do_POST(self):
+        intake = self.server.intake
+        inicio = time.perf_counter()
+        corpo = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        
+        if intake.latencia:
+            time.sleep(intake.latencia)
+            
+        if not self.path.split('?')[0].endswith('/api/v2/series'):
+            self._responder(404, {'errors': ['Not Found']})
+            intake._registrar(404, inicio, len(corpo), 0, None)
+            return
+        
+        if not self.headers.get('DD-API-KEY'):
+            self._responder(403, {'errors': ['Forbidden']})
+            intake._registrar(403, inicio, len(corpo), 0, None)
+            return
+        
+        falha = intake._sortear_falha()
+        if falha == 429:
+            self._responder(429, {'errors': ['Too Many Requests']}, {'Retry-After': str(intake.retry_after)})
+            intake._registrar(429, inicio, len(corpo), 0, None)
+            return
+        
+        try:
+            dados = gzip.decompress(corpo) if self.headers.get('Content-Encoding') == 'gzip' else corpo
+        except OSError:
+            self._responder(400, {'errors': ['Invalid gzip body']})
+            intake._registrar(400, inicio, len(corpo), 0, None)
+            return
+        
+        if (
+            falha == 413
+            or len(corpo) > TAMANHO_MAXIMO_COMPRIMIDO
+            or len(dados) > TAMANHO_MAXIMO_DESCOMPRIMIDO
+        ):
+            self._responder(413, {'errors': ['Payload too large']})
+            intake._registrar(413, inicio, len(corpo), len(dados), None)
+            return
+        
+        try:
+            series = json.loads(dados)['series']
+            if not isinstance(series, list) or not all(
+                isinstance(serie, dict) and serie.get('metric') and isinstance(serie.get('points'), list)
+                for serie in series
+            ):
+                raise ValueError("série inválida")
+        except (ValueError, KeyError, TypeError) as e:
+            self._responder(400, {'errors': [f'Invalid payload: {e}']})
+            intake._registrar(400, inicio, len(corpo), len(dados), None)
+            return
+        
+        self._responder(202, {'errors': []})
+        intake._registrar(202, inicio, len(corpo), len(dados), series)
+    
+    def _responder(
+        self,
+        status: int,
+        corpo: Dict[str, Any],
+        cabecalhos: Optional[Dict[str, str]] = None
+    ) -> None:
+        dados = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+    
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,316 @@
+"""
+Substituto local do S3 para testes de ponta a ponta.
+Servidor HTTP que atende o subconjunto da API REST do S3 usado pela Lambda
+(ListObjectsV2, GetObject com If-None-Match/Range, HeadObject, PutObject e
+DeleteObjects), guardando os objetos em um diretório local. O boto3 real é
+apontado para ele com AWS_ENDPOINT_URL_S3.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+NAMESPACE_S3 = 'http://s3.amazonaws.com/doc/2006-03-01/'
+
+
+class S3Local:
+    """Servidor S3 local, com os objetos em '<diretorio>/<bucket>/<key>'."""
+    
+    def __init__(self, diretorio: str, latencia: float = 0.0):
+        """
+        Inicializa o servidor (sem iniciá-lo).
+        
+        Args:
+            diretorio: Diretório raiz dos buckets
+            latencia: Segundos de espera adicionados a cada requisição
+        """
+        self.diretorio = diretorio
+        self.latencia = latencia
+        self.requisicoes = 0
+        self._servidor: Optional[ThreadingHTTPServer] = None
+        # Caminho -> (mtime, tamanho, ETag), para não recalcular o MD5 a cada GET
+        self._etags: Dict[str, Tuple[float, int, str]] = {}
+        self._trava = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+    
+    @property
+    def url(self) -> str:
+        """URL base do servidor (para AWS_ENDPOINT_URL_S3)."""
+        return f"http://127.0.0.1:{self._servidor.server_port}"
+    
+    def iniciar(self) -> 'S3Local':
+        """Inicia o servidor em uma thread em segundo plano."""
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), _ManipuladorS3)
+        self._servidor.daemon_threads = True
+        self._servidor.s3 = self
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+    
+    def parar(self) -> None:
+        """Encerra o servidor."""
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+    
+    def __enter__(self) -> 'S3Local':
+        return self.iniciar()
+    
+    def __exit__(self, *args) -> None:
+        self.parar()
+    
+    def colocar(self, bucket: str, key: str, conteudo: Union[bytes, str]) -> None:
+        """
+        Grava um objeto diretamente no diretório do bucket.
+        
+        Args:
+            bucket: Nome do bucket
+            key: Chave do objeto
+            conteudo: Conteúdo do objeto (bytes ou texto UTF-8)
+        """
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode('utf-8')
+        caminho = self.caminho(bucket, key)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(conteudo)
+    
+    def caminho(self, bucket: str, key: str) -> str:
+        """
+        Retorna o caminho local de um objeto.
+        
+        Raises:
+            ValueError: Se a chave sair do diretório do bucket
+        """
+        raiz = os.path.realpath(os.path.join(self.diretorio, bucket))
+        caminho = os.path.realpath(os.path.join(raiz, key))
+        if not caminho.startswith(raiz + os.sep):
+            raise ValueError(f"Chave inválida: {key}")
+        return caminho
+    
+    def etag(self, caminho: str) -> str:
+        """Retorna o ETag (MD5 entre aspas) do arquivo, como o S3."""
+        estado = os.stat(caminho)
+        with self._trava:
+            em_cache = self._etags.get(caminho)
+        if em_cache and em_cache[:2] == (estado.st_mtime, estado.st_size):
+            return em_cache[2]
+        
+        md5 = hashlib.md5()
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+                md5.update(bloco)
+        etag = f'"{md5.hexdigest()}"'
+        with self._trava:
+            self._etags[caminho] = (estado.st_mtime, estado.st_size, etag)
+        return etag
+    
+    def listar(self, bucket: str, prefixo: str) -> List[str]:
+        """Lista as chaves do bucket com o prefixo, em ordem."""
+        raiz = os.path.join(self.diretorio, bucket)
+        chaves = []
+        for diretorio, _, arquivos in os.walk(raiz):
+            for nome in arquivos:
+                chave = os.path.relpath(os.path.join(diretorio, nome), raiz).replace(os.sep, '/')
+                if chave.startswith(prefixo) and not chave.endswith('.parcial'):
+                    chaves.append(chave)
+        return sorted(chaves)
+
+
+class _ManipuladorS3(BaseHTTPRequestHandler):
+    """Atende as requisições REST do S3 (endereçamento por caminho: /bucket/key)."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        self._atender(corpo=True)
+    
+    def do_HEAD(self):
+        self._atender(corpo=False)
+    
+    def do_PUT(self):
+        s3 = self._inicio()
+        bucket, key, _ = self._alvo()
+        dados = self._ler_corpo()
+        
+        caminho = s3.caminho(bucket, key)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        parcial = f"{caminho}.parcial"
+        with open(parcial, 'wb') as arquivo:
+            arquivo.write(dados)
+        os.replace(parcial, caminho)
+        
+        self._responder(200, b'', {'ETag': s3.etag(caminho)})
+    
+    def do_POST(self):
+        s3 = self._inicio()
+        bucket, _, parametros = self._alvo()
+        if 'delete' not in parametros:
+            self._erro(501, 'NotImplemented', 'Operação POST não suportada')
+            return
+        
+        removidas = []
+        for elemento in ElementTree.fromstring(self._ler_corpo()).iter(f'{{{NAMESPACE_S3}}}Key'):
+            try:
+                os.remove(s3.caminho(bucket, elemento.text))
+            except FileNotFoundError:
+                pass
+            removidas.append(f"<Deleted><Key>{escape(elemento.text)}</Key></Deleted>")
+            
+        self._responder_xml(f'<DeleteResult xmlns="{NAMESPACE_S3}">{"".join(removidas)}</DeleteResult>')
+    
+    def _atender(self, corpo: bool) -> None:
+        """GET/HEAD de objeto ou listagem do bucket."""
+        s3 = self._inicio()
+        bucket, key, parametros = self._alvo()
+        
+        if not key:
+            self._listar(bucket, parametros)
+            return
+        
+        caminho = s3.caminho(bucket, key)
+        if not os.path.isfile(caminho):
+            if corpo:
+                self._erro(404, 'NoSuchKey', 'The specified key does not exist.')
+            else:
+                self._responder(404, b'')
+            return
+        
+        etag = s3.etag(caminho)
+        tamanho = os.path.getsize(caminho)
+        cabecalhos = {
+            'ETag': etag,
+            'Last-Modified': formatdate(os.path.getmtime(caminho), usegmt=True),
+            'Accept-Ranges': 'bytes',
+            'Content-Type': 'text/csv'
+        }
+        
+        if self.headers.get('If-None-Match') == etag:
+            self._responder(304, b'', cabecalhos, incluir_tamanho=False)
+            return
+        
+        inicio, fim, status = 0, tamanho - 1, 200
+        intervalo = self.headers.get('Range')
+        if intervalo and intervalo.startswith('bytes='):
+            texto_inicio, _, texto_fim = intervalo[len('bytes='):].partition('-')
+            if texto_inicio:
+                inicio = int(texto_inicio)
+                fim = min(int(texto_fim), tamanho - 1) if texto_fim else tamanho - 1
+            else:
+                inicio = max(0, tamanho - int(texto_fim))
+            if inicio >= tamanho:
+                self._erro(416, 'InvalidRange', 'The requested range is not satisfiable')
+                return
+            status = 206
+            cabecalhos['Content-Range'] = f"bytes {inicio}-{fim}/{tamanho}"
+            
+        if not corpo:
+            cabecalhos['Content-Length'] = str(fim - inicio + 1)
+            self._responder(status, b'', cabecalhos, incluir_tamanho=False)
+            return
+        
+        with open(caminho, 'rb') as arquivo:
+            arquivo.seek(inicio)
+            dados = arquivo.read(fim - inicio + 1)
+        self._responder(status, dados, cabecalhos)
+    
+    def _listar(self, bucket: str, parametros: Dict[str, List[str]]) -> None:
+        """ListObjectsV2 (com paginação e encoding-type=url)."""
+        s3 = self.server.s3
+        prefixo = parametros.get('prefix', [''])[0]
+        maximo = int(parametros.get('max-keys', ['1000'])[0])
+        continuacao = parametros.get('continuation-token', [''])[0]
+        codificar = parametros.get('encoding-type', [''])[0] == 'url'
+        
+        chaves = [chave for chave in s3.listar(bucket, prefixo) if chave > continuacao]
+        pagina, truncada = chaves[:maximo], len(chaves) > maximo
+        
+        def texto(valor: str) -> str:
+            return quote(valor, safe='/') if codificar else escape(valor)
+        
+        conteudos = []
+        for chave in pagina:
+            caminho = s3.caminho(bucket, chave)
+            modificado = time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(os.path.getmtime(caminho)))
+            conteudos.append(
+                f"<Contents><Key>{texto(chave)}</Key><LastModified>{modificado}</LastModified>"
+                f"<ETag>{escape(s3.etag(caminho))}</ETag><Size>{os.path.getsize(caminho)}</Size>"
+                f"<StorageClass>STANDARD</StorageClass></Contents>"
+            )
+        
+        proxima = f"<NextContinuationToken>{escape(pagina[-1])}</NextContinuationToken>" if truncada else ''
+        self._responder_xml(
+            f'<ListBucketResult xmlns="{NAMESPACE_S3}"><Name>{escape(bucket)}</Name>'
+            f"<Prefix>{texto(prefixo)}</Prefix><KeyCount>{len(pagina)}</KeyCount>"
+            f"<MaxKeys>{maximo}</MaxKeys><IsTruncated>{str(truncada).lower()}</IsTruncated>"
+            f"{''.join(conteudos)}{proxima}"
+            + ('<EncodingType>url</EncodingType>' if codificar else '')
+            + '</ListBucketResult>'
+        )
+    
+    def _inicio(self) -> S3Local:
+        """Contabiliza a requisição e aplica a latência configurada."""
+        s3 = self.server.s3
+        s3.requisicoes += 1
+        if s3.latencia:
+            time.sleep(s3.latencia)
+        return s3
+    
+    def _alvo(self) -> Tuple[str, str, Dict[str, List[str]]]:
+        """Separa bucket, key e parâmetros da URL."""
+        partes = urlsplit(self.path)
+        bucket, _, key = partes.path.lstrip('/').partition('/')
+        return unquote(bucket), unquote(key), parse_qs(partes.query, keep_blank_values=True)
+    
+    def _ler_corpo(self) -> bytes:
+        """Lê o corpo, decodificando o formato aws-chunked usado pelos checksums do boto3."""
+        dados = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if 'aws-chunked' not in self.headers.get('Content-Encoding', ''):
+            return dados
+        
+        partes = []
+        posicao = 0
+        while True:
+            fim_linha = dados.index(b'\r\n', posicao)
+            tamanho = int(dados[posicao:fim_linha].split(b';')[0], 16)
+            if tamanho == 0:
+                return b''.join(partes)
+            partes.append(dados[fim_linha + 2:fim_linha + 2 + tamanho])
+            posicao = fim_linha + 2 + tamanho + 2
+    
+    def _responder_xml(self, xml: str) -> None:
+        corpo = ('<?xml version="1.0" encoding="UTF-8"?>' + xml).encode('utf-8')
+        self._responder(200, corpo, {'Content-Type': 'application/xml'})
+    
+    def _erro(self, status: int, codigo: str, mensagem: str) -> None:
+        corpo = (
+            f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>{codigo}</Code>'
+            f"<Message>{escape(mensagem)}</Message></Error>"
+        ).encode('utf-8')
+        self._responder(status, corpo, {'Content-Type': 'application/xml'})
+    
+    def _responder(
+        self,
+        status: int,
+        corpo: bytes,
+        cabecalhos: Optional[Dict[str, str]] = None,
+        incluir_tamanho: bool = True
+    ) -> None:
+        self.send_response(status)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        if incluir_tamanho:
+            self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        if corpo:
+            self.wfile.write(corpo)
+    
+    def log_message(self, *args):
+        pass
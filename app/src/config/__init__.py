@@ -9,6 +9,13 @@ from .constants import (
     CONFIGURACOES_METRICAS,
     METRICAS_COMUNS,
     TIPOS_METRICA,
+    TAMANHO_CACHE_EXPRESSOES,
+    ACOES_CARDINALIDADE,
+    FORMATO_TEMPLATES,
+    FORMATO_MULTIPLAS_METRICAS,
+    FORMATOS_CSV,
+    TAMANHO_INICIO_CSV,
+    LINHAS_SIMULACAO,
     obter_configuracao,
     construir_nome_metrica
 )
@@ -20,6 +27,13 @@ __all__ = [
     'CONFIGURACOES_METRICAS',
     'METRICAS_COMUNS',
     'TIPOS_METRICA',
+    'TAMANHO_CACHE_EXPRESSOES',
+    'ACOES_CARDINALIDADE',
+    'FORMATO_TEMPLATES',
+    'FORMATO_MULTIPLAS_METRICAS',
+    'FORMATOS_CSV',
+    'TAMANHO_INICIO_CSV',
+    'LINHAS_SIMULACAO',
     'obter_configuracao',
     'construir_nome_metrica'
 ]
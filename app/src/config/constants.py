@@ -55,6 +55,30 @@ TIPOS_METRICA = {
 }
 
 
+# Formatos de CSV aceitos pelo handler
+FORMATO_TEMPLATES = 'templates'
+FORMATO_MULTIPLAS_METRICAS = 'multiplas_metricas'
+FORMATOS_CSV = (FORMATO_TEMPLATES, FORMATO_MULTIPLAS_METRICAS)
+
+
+# Limite de entradas dos caches de avaliação de expressões de tags/resources
+TAMANHO_CACHE_EXPRESSOES = 50000
+
+
+# Bytes iniciais do CSV lidos por GET parcial na validação prévia (header) e na simulação
+TAMANHO_INICIO_CSV = 65536
+
+# Linhas avaliadas por padrão no modo de simulação
+LINHAS_SIMULACAO = 10
+
+
+# Ações para métricas acima do limite de cardinalidade (CARDINALIDADE_ACAO)
+ACAO_REJEITAR = 'rejeitar'
+ACAO_REMOVER_TAG = 'remover_tag'
+ACAO_TRUNCAR = 'truncar'
+ACOES_CARDINALIDADE = (ACAO_REJEITAR, ACAO_REMOVER_TAG, ACAO_TRUNCAR)
+
+
 # Configurações de métricas por tipo
 CONFIGURACOES_METRICAS: Dict[str, ConfiguracaoMetrica] = {
     TipoMetrica.ECS: ConfiguracaoMetrica(
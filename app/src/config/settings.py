@@ -3,8 +3,32 @@ Configurações da aplicação.
 Centraliza todas as variáveis de ambiente e constantes.
 """
 
+import json
 import os
-from typing import Optional
+from typing import List, Optional
+
+from .constants import ACOES_CARDINALIDADE
+
+
+class DestinoDatadog:
+    """Organização/site do Datadog que recebe as métricas."""
+    
+    def __init__(self, nome: str, site: str, api_key: str, app_key: str, api_url: Optional[str] = None):
+        """
+        Inicializa um destino.
+        
+        Args:
+            nome: Nome do destino (usado nos logs e no resultado)
+            site: Site do Datadog (ex: 'datadoghq.com', 'datadoghq.eu')
+            api_key: API Key da organização
+            app_key: Application Key da organização
+            api_url: URL da API de séries (padrão: a do site; ex: proxy ou intake local)
+        """
+        self.nome = nome
+        self.site = site
+        self.api_key = api_key
+        self.app_key = app_key
+        self.api_url = api_url or f"https://api.{site}/api/v2/series"
 
 
 class Settings:
@@ -15,7 +39,20 @@ class Settings:
         self.datadog_api_key: str = os.environ.get('DATADOG_API_KEY', '')
         self.datadog_app_key: str = os.environ.get('DATADOG_APP_KEY', '')
         self.datadog_site: str = os.environ.get('DATADOG_SITE', 'datadoghq.com')
-        self.datadog_api_url: str = f"https://api.{self.datadog_site}/api/v2/series"
+        self.datadog_api_url: str = os.environ.get(
+            'DATADOG_API_URL', f"https://api.{self.datadog_site}/api/v2/series"
+        )
+        # Lista JSON de destinos [{"nome", "site", "api_key", "app_key", "url"}]; substitui
+        # as variáveis acima para enviar as mesmas métricas a várias organizações
+        self.datadog_destinos_json: str = os.environ.get('DATADOG_DESTINOS', '')
+        # Compressão do corpo das requisições: 'nenhuma' (padrão) ou 'gzip' (opcional)
+        self.datadog_compressao: str = os.environ.get('DATADOG_COMPRESSAO', 'nenhuma').lower()
+        # Transporte: 'http' (API do Datadog) ou 'dogstatsd' (agente local / extensão da Lambda)
+        self.datadog_transporte: str = os.environ.get('DATADOG_TRANSPORTE', 'http').lower()
+        # Endereço do agente: 'udp://host:porta' ou 'unix:///caminho/do/socket'
+        self.dogstatsd_endereco: str = os.environ.get('DOGSTATSD_ENDERECO', 'udp://127.0.0.1:8125')
+        # Tamanho máximo de cada datagrama (0 usa 1432 para UDP e 8192 para UDS)
+        self.dogstatsd_mtu: int = int(os.environ.get('DOGSTATSD_MTU', '0'))
         
         # Configurações de lote
         self.tamanho_lote: int = int(os.environ.get('TAMANHO_LOTE', '1000'))
@@ -23,6 +60,50 @@ class Settings:
         
         # Configurações do S3
         self.diretorio_temp: str = os.environ.get('DIRETORIO_TEMP', '/tmp')
+        # Mantém o CSV e seu snapshot em /tmp entre invocações (GET condicional por ETag)
+        self.cache_s3: bool = os.environ.get('CACHE_S3', 'true').lower() == 'true'
+        # Espaço máximo do cache de outros CSVs em /tmp; os usados há mais tempo são removidos
+        self.cache_s3_limite_mb: int = int(os.environ.get('CACHE_S3_LIMITE_MB', '256'))
+        
+        # Configurações do modo delta
+        # Destino do estado: 's3://bucket/prefixo' ou vazio para o diretório temporário
+        # (que só serve às retentativas executadas no mesmo container)
+        self.delta_armazenamento: str = os.environ.get('DELTA_ARMAZENAMENTO', '')
+        self.delta_max_series: int = int(os.environ.get('DELTA_MAX_SERIES', '200000'))
+        self.delta_refresh_segundos: int = int(os.environ.get('DELTA_REFRESH_SEGUNDOS', '3600'))
+        
+        # Normalização de nomes de métricas, tags, hosts e resources (regras do Datadog)
+        self.normalizar_metricas: bool = os.environ.get('NORMALIZAR_METRICAS', 'true').lower() == 'true'
+        
+        # Proteção de cardinalidade: máximo de séries distintas por métrica (0 apenas estima)
+        self.cardinalidade_limite: int = int(os.environ.get('CARDINALIDADE_LIMITE', '0'))
+        self.cardinalidade_acao: str = os.environ.get('CARDINALIDADE_ACAO', 'rejeitar').lower()
+        
+        # Idempotência: lotes aceitos em uma invocação não são reenviados nas
+        # retentativas automáticas da Lambda (mesmo aws_request_id). Desativada por padrão
+        self.idempotencia: bool = os.environ.get('IDEMPOTENCIA', 'false').lower() == 'true'
+        # Destino do estado: 's3://bucket/prefixo' ou vazio para o diretório temporário
+        self.idempotencia_armazenamento: str = os.environ.get('IDEMPOTENCIA_ARMAZENAMENTO', '')
+        self.idempotencia_ttl_segundos: int = int(os.environ.get('IDEMPOTENCIA_TTL_SEGUNDOS', '21600'))
+        # Lotes aceitos acumulados antes de cada gravação do estado
+        self.idempotencia_lotes_por_gravacao: int = int(
+            os.environ.get('IDEMPOTENCIA_LOTES_POR_GRAVACAO', '20')
+        )
+        
+        # Telemetria da própria Lambda: tempos por etapa e contadores no corpo da resposta,
+        # e opcionalmente enviados como séries '<TELEMETRIA_PREFIXO>.*' em um lote final
+        self.telemetria: bool = os.environ.get('TELEMETRIA', 'true').lower() == 'true'
+        self.telemetria_metricas: bool = os.environ.get('TELEMETRIA_METRICAS', 'false').lower() == 'true'
+        self.telemetria_prefixo: str = os.environ.get('TELEMETRIA_PREFIXO', 'lambda_to_datadog')
+        
+        # Perfil de memória por etapa (tracemalloc) e pico de RSS no corpo da resposta.
+        # Deixa a execução bem mais lenta: use para dimensionar o MemorySize, não em produção
+        self.perfil_memoria: bool = os.environ.get('PERFIL_MEMORIA', 'false').lower() == 'true'
+        # Linhas de código que mais alocaram em cada etapa (0 dispensa os snapshots)
+        self.perfil_memoria_alocacoes: int = int(os.environ.get('PERFIL_MEMORIA_ALOCACOES', '3'))
+        
+        # Confere as colunas dos templates contra o header do CSV (GET parcial) antes do download
+        self.validacao_cabecalho: bool = os.environ.get('VALIDACAO_CABECALHO', 'true').lower() == 'true'
         
         # Configurações de retry
         self.max_tentativas: int = int(os.environ.get('MAX_TENTATIVAS', '3'))
@@ -30,9 +111,80 @@ class Settings:
         
         # Validar configurações obrigatórias
         self._validar_config()
+        self.destinos_datadog: List[DestinoDatadog] = self._carregar_destinos()
+    
+    def _carregar_destinos(self) -> List[DestinoDatadog]:
+        """
+        Monta a lista de destinos do Datadog.
+        
+        Returns:
+            Destinos de DATADOG_DESTINOS ou o destino único das variáveis DATADOG_*
+            
+        Raises:
+            ValueError: Se DATADOG_DESTINOS for inválido
+        """
+        # O agente local encaminha as métricas à organização da sua própria API key
+        if self.datadog_transporte == 'dogstatsd':
+            return [DestinoDatadog('agente', self.datadog_site, self.datadog_api_key, self.datadog_app_key)]
+        
+        if not self.datadog_destinos_json:
+            return [DestinoDatadog(
+                'principal', self.datadog_site, self.datadog_api_key, self.datadog_app_key,
+                self.datadog_api_url
+            )]
+        
+        try:
+            configuracoes = json.loads(self.datadog_destinos_json)
+        except ValueError as e:
+            raise ValueError(f"DATADOG_DESTINOS não é um JSON válido: {e}")
+        
+        if not isinstance(configuracoes, list) or not configuracoes:
+            raise ValueError("DATADOG_DESTINOS deve ser uma lista não vazia de destinos")
+        
+        destinos = []
+        for idx, configuracao in enumerate(configuracoes, start=1):
+            if not isinstance(configuracao, dict):
+                raise ValueError(f"DATADOG_DESTINOS: destino {idx} deve ser um objeto")
+            
+            site = configuracao.get('site', 'datadoghq.com')
+            nome = configuracao.get('nome', site)
+            if not configuracao.get('api_key') or not configuracao.get('app_key'):
+                raise ValueError(f"DATADOG_DESTINOS: destino '{nome}' sem api_key/app_key")
+            
+            destinos.append(DestinoDatadog(
+                nome, site, configuracao['api_key'], configuracao['app_key'], configuracao.get('url')
+            ))
+            
+        nomes = [destino.nome for destino in destinos]
+        if len(set(nomes)) != len(nomes):
+            raise ValueError(f"DATADOG_DESTINOS: nomes de destino repetidos: {nomes}")
+        
+        return destinos
     
     def _validar_config(self) -> None:
         """Valida se as configurações obrigatórias estão presentes."""
+        if self.datadog_compressao not in ('gzip', 'nenhuma'):
+            raise ValueError(f"DATADOG_COMPRESSAO inválida: {self.datadog_compressao}")
+        
+        if self.datadog_transporte not in ('http', 'dogstatsd'):
+            raise ValueError(f"DATADOG_TRANSPORTE inválido: {self.datadog_transporte}")
+        
+        if self.cardinalidade_acao not in ACOES_CARDINALIDADE:
+            raise ValueError(
+                f"CARDINALIDADE_ACAO inválida: {self.cardinalidade_acao}. "
+                f"Ações disponíveis: {list(ACOES_CARDINALIDADE)}"
+            )
+        
+        # Com DogStatsD, as chaves ficam na configuração do agente
+        if self.datadog_transporte == 'dogstatsd':
+            if self.datadog_destinos_json:
+                raise ValueError("DATADOG_DESTINOS não é suportado com DATADOG_TRANSPORTE=dogstatsd")
+            return
+        
+        # Com DATADOG_DESTINOS, as chaves são validadas por destino
+        if self.datadog_destinos_json:
+            return
+        
         if not self.datadog_api_key:
             raise ValueError("DATADOG_API_KEY não configurada")
         
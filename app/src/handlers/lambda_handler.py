@@ -5,14 +5,36 @@ Processa eventos do EventBridge, baixa CSV do S3 e envia métricas para o Datado
 
 import json
 import logging
-from typing import Dict, Any
+import os
+import time
+from typing import Dict, Any, List, Optional
 
 from ..services.s3_service import S3Service
 from ..services.csv_service import CSVService
 from ..services.payload_service import PayloadService
+from ..services.multiplas_metricas_service import MultiplasMetricasService, COLUNAS_FORMATO
+from ..services.snapshot_service import SnapshotService
+from ..services.armazenamento_service import criar_armazenamento
+from ..services.delta_service import DeltaService
+from ..services.roteamento_service import RoteamentoService
+from ..services.idempotencia_service import IdempotenciaService
+from ..services.normalizacao_service import NormalizacaoService
+from ..services.cardinalidade_service import CardinalidadeService
 from ..services.datadog_service import DatadogService
+from ..services.validacao_service import ValidacaoService
 from ..config.settings import Settings
-from ..utils.logger import configurar_logger
+from ..config.constants import (
+    FORMATO_TEMPLATES,
+    FORMATO_MULTIPLAS_METRICAS,
+    FORMATOS_CSV,
+    LINHAS_SIMULACAO,
+    TAMANHO_INICIO_CSV
+)
+from ..models.tabela_colunar import TabelaColunar
+from ..utils.expressoes import compilar_filtro
+from ..utils.logger import LIMITADOR, configurar_logger
+from ..utils.memoria import PerfilMemoria
+from ..utils.telemetria import Telemetria
 
 # Configurar logger
 logger = configurar_logger(__name__)
@@ -27,42 +49,175 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             - s3_bucket: Nome do bucket S3
             - s3_path: Caminho da pasta ou arquivo CSV no S3 (ex: 'rds/' ou 'rds/resultados_rds.csv')
             - payloads: Lista de templates de payload para gerar métricas
+            - formato: 'templates' (padrão) ou 'multiplas_metricas', que lê o CSV
+              de múltiplas métricas diretamente, sem templates
+            - tipo_metrica: Tipo usado no formato 'multiplas_metricas' (padrão: 'custom')
+            - filtro: Expressão opcional para selecionar linhas do CSV
+              (ex: "linha['region'] == 'us-east-1'"), avaliada sobre os valores em texto
+            - modo_delta: Se true, envia apenas as séries cujo valor mudou desde a
+              última execução (com reenvio completo a cada DELTA_REFRESH_SEGUNDOS)
+            - roteamento: Envia as métricas de cada linha apenas ao destino definido
+              pelo valor de uma expressão: {"expressao": "str(linha['account_id'])",
+              "regras": {"123456789012": "us"}, "padrao": "eu"} (destinos de DATADOG_DESTINOS)
+            - simulacao: Se true, avalia os templates sobre as primeiras linhas do CSV
+              (lidas por GET parcial) e retorna as séries geradas, sem enviá-las
+            - linhas_simulacao: Linhas avaliadas na simulação (padrão: 10)
         context: Contexto da Lambda
         
     Returns:
         Dicionário com status da execução
     """
+    inicio = time.perf_counter()
+    perfil_memoria = None
+    datadog_service = None
+    
     try:
-        logger.info(f"Iniciando processamento. Evento: {json.dumps(event)}")
-        
         # Validar evento
         s3_bucket = event.get('s3_bucket')
         s3_path = event.get('s3_path')
         payloads = event.get('payloads', [])
+        formato = event.get('formato', FORMATO_TEMPLATES)
+        
+        # Apenas um resumo do evento: os templates podem ser grandes
+        logger.info(
+            "Iniciando processamento de s3://%s/%s",
+            s3_bucket, s3_path,
+            extra={'campos': {
+                's3_bucket': s3_bucket,
+                's3_path': s3_path,
+                'formato': formato,
+                'templates': len(payloads) if isinstance(payloads, list) else None,
+                'aws_request_id': getattr(context, 'aws_request_id', None)
+            }}
+        )
         
         if not s3_bucket or not s3_path:
             raise ValueError("Parâmetros obrigatórios ausentes: s3_bucket, s3_path")
         
-        if not payloads:
-            raise ValueError("Nenhum template de payload fornecido no evento")
+        if formato not in FORMATOS_CSV:
+            raise ValueError(f"Formato '{formato}' não suportado. Formatos disponíveis: {list(FORMATOS_CSV)}")
         
-        if not isinstance(payloads, list):
-            raise ValueError("Campo 'payloads' deve ser uma lista de templates")
+        if formato == FORMATO_TEMPLATES:
+            if not payloads:
+                raise ValueError("Nenhum template de payload fornecido no evento")
+            
+            if not isinstance(payloads, list):
+                raise ValueError("Campo 'payloads' deve ser uma lista de templates")
+        
+        # Compilar filtro antes de qualquer I/O, para falhar rápido
+        filtro = compilar_filtro(event['filtro']) if event.get('filtro') else None
         
         # Inicializar configurações e serviços
         settings = Settings()
-        s3_service = S3Service(settings)
-        csv_service = CSVService()
-        payload_service = PayloadService()
-        datadog_service = DatadogService(settings)
+        telemetria = Telemetria(ativa=settings.telemetria)
+        perfil_memoria = PerfilMemoria(settings.perfil_memoria, settings.perfil_memoria_alocacoes)
+        s3_service = S3Service(settings, telemetria)
+        csv_service = CSVService(telemetria)
+        payload_service = PayloadService(telemetria=telemetria)
+        
+        # Validar o roteamento antes de qualquer I/O
+        roteamento_service = None
+        if event.get('roteamento'):
+            roteamento_service = RoteamentoService(
+                event['roteamento'],
+                [destino.nome for destino in settings.destinos_datadog]
+            )
+        
+        # Validação prévia: templates, filtro e roteamento antes de qualquer I/O, e as
+        # colunas referenciadas contra o header do CSV (GET parcial) antes do download.
+        # Com cópia em cache, o header é lido dela após o GET condicional, sem o GET parcial
+        simulacao = bool(event.get('simulacao'))
+        validar_apos_download = False
+        with telemetria.cronometro('validacao'):
+            validacao_service = ValidacaoService(payload_service)
+            problemas = validacao_service.validar(formato, payloads, None, filtro, roteamento_service)
+            if problemas:
+                raise ValueError(f"Configuração inválida: {'; '.join(problemas)}")
+            
+            chave_csv = s3_service.localizar_csv(s3_bucket, s3_path)
+            inicio_csv, csv_completo = b'', False
+            if (
+                settings.validacao_cabecalho and not simulacao
+                and settings.cache_s3 and s3_service.em_cache(s3_bucket, chave_csv)
+            ):
+                validar_apos_download = True
+            elif settings.validacao_cabecalho or simulacao:
+                inicio_csv, csv_completo = s3_service.ler_inicio(s3_bucket, chave_csv, TAMANHO_INICIO_CSV)
+                # CSV vazio segue o fluxo normal (resposta sem métricas)
+                cabecalho = csv_service.ler_cabecalho(inicio_csv, csv_completo) or None
+                problemas = validacao_service.validar(formato, payloads, cabecalho, filtro, roteamento_service)
+                if problemas:
+                    raise ValueError(f"Configuração inválida: {'; '.join(problemas)}")
+        
+        # Colunas lidas do CSV (projeção)
+        if formato == FORMATO_MULTIPLAS_METRICAS:
+            colunas = COLUNAS_FORMATO
+        else:
+            colunas = payload_service.colunas_referenciadas(payloads)
+            
+        # A expressão de roteamento também precisa das suas colunas
+        if roteamento_service is not None and colunas is not None:
+            colunas = (
+                set(colunas) | roteamento_service.colunas
+                if roteamento_service.colunas is not None else None
+            )
+        
+        if simulacao:
+            amostra = csv_service.ler_amostra(
+                inicio_csv, csv_completo, filtro, colunas,
+                int(event.get('linhas_simulacao', LINHAS_SIMULACAO))
+            )
+            return simular(amostra, event, formato, payload_service, roteamento_service, settings)
+        
+        # Retentativas assíncronas da Lambda repetem o aws_request_id
+        idempotencia_service = None
+        request_id = getattr(context, 'aws_request_id', None)
+        if settings.idempotencia and request_id:
+            idempotencia_service = IdempotenciaService(
+                criar_armazenamento(settings.idempotencia_armazenamento, settings, s3_service.s3_client),
+                request_id,
+                settings.idempotencia_ttl_segundos,
+                settings.idempotencia_lotes_por_gravacao
+            )
+        
+        datadog_service = DatadogService(settings, idempotencia_service, telemetria=telemetria)
         
         # 1. Baixar CSV do S3
-        logger.info(f"Baixando CSV de s3://{s3_bucket}/{s3_path}")
-        caminho_local = s3_service.baixar_csv_da_pasta(s3_bucket, s3_path)
+        logger.info("Baixando CSV de s3://%s/%s", s3_bucket, chave_csv)
+        with telemetria.cronometro('download'), perfil_memoria.etapa('download'):
+            caminho_local = s3_service.baixar_arquivo(s3_bucket, chave_csv, os.path.basename(chave_csv))
+            
+        if validar_apos_download:
+            with telemetria.cronometro('validacao'):
+                with open(caminho_local, 'rb') as arquivo:
+                    inicio_csv = arquivo.read(TAMANHO_INICIO_CSV)
+                cabecalho = csv_service.ler_cabecalho(inicio_csv, len(inicio_csv) < TAMANHO_INICIO_CSV) or None
+                problemas = validacao_service.validar(formato, payloads, cabecalho, filtro, roteamento_service)
+                if problemas:
+                    raise ValueError(f"Configuração inválida: {'; '.join(problemas)}")
+        
+        # 2. Ler CSV genérico (ou reutilizar a tabela de uma invocação anterior)
+        snapshot_service = SnapshotService(settings)
+        chave_snapshot = None
+        linhas_csv = None
         
-        # 2. Ler CSV genérico
-        logger.info(f"Lendo CSV: {caminho_local}")
-        linhas_csv = csv_service.ler_csv(caminho_local)
+        with telemetria.cronometro('leitura'), perfil_memoria.etapa('leitura'):
+            if settings.cache_s3 and s3_service.etag_ultimo_arquivo:
+                chave_snapshot = snapshot_service.gerar_chave(
+                    s3_service.etag_ultimo_arquivo,
+                    filtro.fonte if filtro else None,
+                    colunas
+                )
+                linhas_csv = snapshot_service.carregar(caminho_local, chave_snapshot)
+                
+            if linhas_csv is None:
+                logger.info("Lendo CSV: %s", caminho_local)
+                linhas_csv = csv_service.ler_csv(caminho_local, filtro=filtro, colunas=colunas)
+                
+                if chave_snapshot:
+                    snapshot_service.salvar(caminho_local, chave_snapshot, linhas_csv)
+            else:
+                telemetria.incrementar('snapshot.reutilizado')
         
         if not linhas_csv:
             logger.warning("CSV vazio ou sem dados")
@@ -70,15 +225,35 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'statusCode': 200,
                 'body': json.dumps({
                     'mensagem': 'CSV vazio, nenhuma métrica para processar',
-                    'linhas_processadas': 0
+                    'linhas_processadas': 0,
+                    'linhas_filtradas': linhas_csv.linhas_filtradas
                 })
             }
         
-        # 3. Processar templates e gerar métricas
-        logger.info(f"Processando {len(linhas_csv)} linhas com {len(payloads)} template(s)")
-        metricas = payload_service.processar_templates(linhas_csv, payloads)
+        # 3. Separar as linhas por destino (se houver roteamento)
+        if roteamento_service is not None:
+            with telemetria.cronometro('roteamento'), perfil_memoria.etapa('roteamento'):
+                valores_rota = payload_service.avaliar_expressao(roteamento_service.expressao, linhas_csv)
+                particoes = roteamento_service.particionar(linhas_csv, valores_rota)
+        else:
+            particoes = {None: linhas_csv}
+            
+        # 4. Processar templates (ou o formato de múltiplas métricas) e gerar métricas
+        if formato == FORMATO_MULTIPLAS_METRICAS:
+            multiplas_service = MultiplasMetricasService(event.get('tipo_metrica', 'custom'))
         
-        if not metricas:
+        metricas_por_destino = {}
+        with telemetria.cronometro('templates'), perfil_memoria.etapa('templates'):
+            for destino, tabela in particoes.items():
+                if formato == FORMATO_MULTIPLAS_METRICAS:
+                    metricas_por_destino[destino] = multiplas_service.processar(tabela)
+                else:
+                    logger.info("Processando %s linhas com %s template(s)", len(tabela), len(payloads))
+                    metricas_por_destino[destino] = payload_service.processar_templates(tabela, payloads)
+                
+        metricas_geradas = sum(len(metricas) for metricas in metricas_por_destino.values())
+        
+        if not metricas_geradas:
             logger.warning("Nenhuma métrica foi gerada dos templates")
             return {
                 'statusCode': 200,
@@ -89,16 +264,84 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 })
             }
         
-        # 4. Enviar métricas para o Datadog em lotes
-        logger.info(f"Enviando {len(metricas)} métricas para o Datadog")
-        resultado = datadog_service.enviar_metricas_em_lotes(metricas)
+        # 5. Normalizar nomes e tags e limitar a cardinalidade antes de qualquer serialização
+        normalizacao_service = NormalizacaoService() if settings.normalizar_metricas else None
+        cardinalidade = {}
+        with perfil_memoria.etapa('normalizacao'):
+            for destino, metricas in metricas_por_destino.items():
+                if normalizacao_service is not None:
+                    with telemetria.cronometro('normalizacao'):
+                        metricas = normalizacao_service.aplicar(metricas)
+                cardinalidade_service = CardinalidadeService(settings.cardinalidade_limite, settings.cardinalidade_acao)
+                with telemetria.cronometro('cardinalidade'):
+                    metricas_por_destino[destino] = cardinalidade_service.aplicar(metricas)
+                cardinalidade[destino] = cardinalidade_service.resumo()
+                telemetria.incrementar('cardinalidade.series_descartadas', cardinalidade_service.series_descartadas)
+            
+        # 6. No modo delta, manter apenas as séries alteradas (um estado por destino roteado)
+        deltas = {}
+        if event.get('modo_delta'):
+            armazenamento = criar_armazenamento(settings.delta_armazenamento, settings, s3_service.s3_client)
+            with perfil_memoria.etapa('delta'):
+                for destino, metricas in metricas_por_destino.items():
+                    partes = (s3_bucket, s3_path, formato) + ((destino,) if destino else ())
+                    deltas[destino] = DeltaService(
+                        armazenamento,
+                        DeltaService.gerar_nome_estado(*partes),
+                        settings.delta_max_series,
+                        settings.delta_refresh_segundos
+                    )
+                    with telemetria.cronometro('delta'):
+                        metricas_por_destino[destino] = deltas[destino].filtrar(metricas)
+                    telemetria.incrementar('delta.series_inalteradas', deltas[destino].series_inalteradas)
+            
+        # 7. Enviar métricas para o Datadog em lotes
+        with telemetria.cronometro('envio'), perfil_memoria.etapa('envio'):
+            if roteamento_service is not None:
+                resultado = datadog_service.enviar_metricas_roteadas(metricas_por_destino)
+            else:
+                logger.info("Enviando %s métricas para o Datadog", len(metricas_por_destino[None]))
+                resultado = datadog_service.enviar_metricas_em_lotes(metricas_por_destino[None])
+        
+        # O estado só avança quando todos os lotes do destino foram aceitos
+        for destino, delta_service in deltas.items():
+            erros = resultado['destinos'][destino]['erros'] if destino else resultado['erros']
+            if erros == 0:
+                delta_service.salvar()
+            else:
+                logger.warning("Envio com erros: estado do modo delta não atualizado")
+                
+        # 8. Limpar arquivo temporário (mantido quando o cache está ativo)
+        if not settings.cache_s3:
+            s3_service.limpar_arquivo_local(caminho_local)
+            
+        # 9. Telemetria da invocação: no corpo da resposta e, opcionalmente, em um lote final
+        telemetria.incrementar('metricas.geradas', metricas_geradas)
+        telemetria.incrementar('metricas.enviadas', resultado['total_enviadas'])
+        if normalizacao_service is not None:
+            telemetria.incrementar('normalizacao.valores_alterados', normalizacao_service.valores_alterados)
+            telemetria.incrementar('normalizacao.series_descartadas', normalizacao_service.series_descartadas)
+        telemetria.registrar_tempo('total', time.perf_counter() - inicio)
+        resumo_telemetria = telemetria.resumo() if settings.telemetria else None
         
-        # 5. Limpar arquivo temporário
-        s3_service.limpar_arquivo_local(caminho_local)
+        if settings.telemetria and settings.telemetria_metricas:
+            enviar_telemetria(
+                datadog_service, telemetria, settings.telemetria_prefixo,
+                [f"s3_bucket:{s3_bucket}", f"s3_path:{s3_path}", f"formato:{formato}"],
+                normalizacao_service
+            )
         
         logger.info(
-            f"Processamento concluído com sucesso. "
-            f"Linhas: {len(linhas_csv)}, Métricas: {resultado['total_enviadas']}"
+            "Processamento concluído com sucesso. "
+            "Linhas: %s, Métricas: %s",
+            len(linhas_csv), resultado['total_enviadas'],
+            extra={'campos': {
+                'linhas': len(linhas_csv),
+                'metricas_geradas': metricas_geradas,
+                'metricas_enviadas': resultado['total_enviadas'],
+                'erros_envio': resultado['erros'],
+                'duracao_ms': round((time.perf_counter() - inicio) * 1000, 3)
+            }}
         )
         
         return {
@@ -106,14 +349,27 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({
                 'mensagem': 'Métricas enviadas com sucesso',
                 'linhas_processadas': len(linhas_csv),
-                'metricas_geradas': len(metricas),
+                'linhas_filtradas': linhas_csv.linhas_filtradas,
+                'metricas_geradas': metricas_geradas,
+                'metricas_inalteradas': sum(d.series_inalteradas for d in deltas.values()),
+                'linhas_sem_destino': roteamento_service.linhas_sem_destino if roteamento_service else 0,
+                'erros_roteamento': payload_service.erros_roteamento,
                 'metricas_enviadas': resultado['total_enviadas'],
-                'lotes_enviados': resultado['lotes_enviados']
+                'lotes_enviados': resultado['lotes_enviados'],
+                'lotes_repetidos': resultado['lotes_repetidos'],
+                'destinos': resultado['destinos'],
+                'valores_normalizados': normalizacao_service.valores_alterados if normalizacao_service else 0,
+                'series_sem_nome': normalizacao_service.series_descartadas if normalizacao_service else 0,
+                'cardinalidade': cardinalidade if roteamento_service else cardinalidade[None],
+                'csv_modificado': s3_service.arquivo_modificado,
+                'snapshot_reutilizado': snapshot_service.origem,
+                'telemetria': resumo_telemetria,
+                'memoria': perfil_memoria.resumo() if settings.perfil_memoria else None
             })
         }
         
     except Exception as e:
-        logger.error(f"Erro no processamento: {str(e)}", exc_info=True)
+        logger.error("Erro no processamento: %s", e, exc_info=True)
         return {
             'statusCode': 500,
             'body': json.dumps({
@@ -121,3 +377,109 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'erro': str(e)
             })
         }
+    
+    finally:
+        # O container é reutilizado: resumir (e zerar) o que foi suprimido nesta invocação
+        logs_suprimidos = LIMITADOR.resumir(logger)
+        if logs_suprimidos:
+            logger.info(
+                "%s registros de log suprimidos nesta invocação", logs_suprimidos,
+                extra={'campos': {'logs_suprimidos': logs_suprimidos}}
+            )
+        if datadog_service is not None:
+            datadog_service.fechar()
+        if perfil_memoria is not None:
+            perfil_memoria.encerrar()
+
+
+def simular(
+    amostra: TabelaColunar,
+    event: Dict[str, Any],
+    formato: str,
+    payload_service: PayloadService,
+    roteamento_service: Optional[RoteamentoService],
+    settings: Settings
+) -> Dict[str, Any]:
+    """
+    Gera as métricas de uma amostra do CSV sem enviá-las (modo de simulação),
+    com roteamento e normalização, mas sem modo delta nem limite de cardinalidade.
+    
+    Args:
+        amostra: Primeiras linhas do CSV
+        event: Evento do EventBridge
+        formato: Formato do CSV
+        payload_service: Serviço de templates (acumula os erros de avaliação)
+        roteamento_service: Roteamento do evento (se houver)
+        settings: Objeto de configurações
+        
+    Returns:
+        Resposta da Lambda com as séries geradas e os erros por template
+    """
+    if roteamento_service is not None:
+        valores_rota = payload_service.avaliar_expressao(roteamento_service.expressao, amostra)
+        particoes = roteamento_service.particionar(amostra, valores_rota)
+    else:
+        particoes = {None: amostra}
+        
+    multiplas_service = None
+    if formato == FORMATO_MULTIPLAS_METRICAS:
+        multiplas_service = MultiplasMetricasService(event.get('tipo_metrica', 'custom'))
+    normalizacao_service = NormalizacaoService() if settings.normalizar_metricas else None
+    
+    metricas_por_destino = {}
+    for destino, tabela in particoes.items():
+        if multiplas_service is not None:
+            metricas = multiplas_service.processar(tabela)
+        else:
+            metricas = payload_service.processar_templates(tabela, event['payloads'])
+        if normalizacao_service is not None:
+            metricas = normalizacao_service.aplicar(metricas)
+        metricas_por_destino[destino] = metricas
+        
+    metricas_geradas = sum(len(metricas) for metricas in metricas_por_destino.values())
+    logger.info("Simulação: %s métricas geradas de %s linhas, nada enviado", metricas_geradas, len(amostra))
+    
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'mensagem': 'Simulação concluída, nenhuma métrica enviada',
+            'simulacao': True,
+            'linhas_amostradas': len(amostra),
+            'metricas_geradas': metricas_geradas,
+            'erros_templates': payload_service.erros_templates,
+            'erros_roteamento': payload_service.erros_roteamento,
+            'metricas': metricas_por_destino if roteamento_service else metricas_por_destino[None]
+        })
+    }
+
+
+def enviar_telemetria(
+    datadog_service: DatadogService,
+    telemetria: Telemetria,
+    prefixo: str,
+    tags: List[str],
+    normalizacao_service: Optional[NormalizacaoService] = None
+) -> None:
+    """
+    Envia a telemetria da invocação como séries '<prefixo>.*', em um lote
+    próprio depois das métricas (assim inclui os tempos de envio e não altera
+    o conteúdo dos lotes de métricas, usado pela idempotência).
+    Falhas são apenas logadas: a telemetria nunca falha a invocação.
+    
+    Args:
+        datadog_service: Serviço de envio (mesmos destinos das métricas)
+        telemetria: Telemetria da invocação
+        prefixo: Prefixo das métricas (TELEMETRIA_PREFIXO)
+        tags: Tags de todas as séries
+        normalizacao_service: Normalização aplicada às séries (se ativa)
+    """
+    try:
+        series = telemetria.series(prefixo, int(time.time()), tags)
+        if normalizacao_service is not None:
+            series = normalizacao_service.aplicar(series)
+            
+        resultado = datadog_service.enviar_metricas_em_lotes(series)
+        if resultado['erros']:
+            logger.warning("Falha ao enviar %s séries de telemetria", len(series))
+    except Exception as e:
+        logger.warning("Erro ao enviar telemetria: %s", e)
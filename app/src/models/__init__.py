@@ -0,0 +1,7 @@
+"""
+Módulo de modelos de dados da aplicação.
+"""
+
+from .tabela_colunar import TabelaColunar, LinhaTabela, ConstrutorColuna, ColunaCodificada
+
+__all__ = ['TabelaColunar', 'LinhaTabela', 'ConstrutorColuna', 'ColunaCodificada']
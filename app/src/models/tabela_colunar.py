@@ -0,0 +1,252 @@
+"""
+Tabela colunar em memória para os dados do CSV.
+Armazena colunas numéricas em arrays tipados e textos internados e
+codificados por dicionário,
+expondo cada linha como uma visão leve compatível com linha['coluna'].
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class ColunaCodificada(Sequence):
+    """
+    Coluna de textos codificada por dicionário.
+    Cada linha guarda apenas o código (2 ou 4 bytes) do valor distinto.
+    """
+    
+    __slots__ = ('codigos', 'valores')
+    
+    def __init__(self, codigos: array, valores: List[Optional[str]]):
+        """
+        Inicializa a coluna.
+        
+        Args:
+            codigos: Código de cada linha
+            valores: Valores distintos, indexados pelo código
+        """
+        self.codigos = codigos
+        self.valores = valores
+    
+    def __getitem__(self, indice: int) -> Optional[str]:
+        return self.valores[self.codigos[indice]]
+    
+    def __len__(self) -> int:
+        return len(self.codigos)
+    
+    def __iter__(self) -> Iterator[Optional[str]]:
+        return map(self.valores.__getitem__, self.codigos)
+
+
+class ConstrutorColuna:
+    """
+    Acumula os valores de uma coluna escolhendo o armazenamento mais compacto.
+    
+    O primeiro valor define o armazenamento: array de inteiros ('q'), array de
+    floats ('d') ou textos codificados por dicionário ('s'). Quando os tipos se
+    misturam, a coluna passa a lista comum ('o'), preservando int e float, que
+    formatam de forma diferente nos templates.
+    """
+    
+    __slots__ = ('valores', 'codigo', '_codigos', '_indices')
+    
+    def __init__(self):
+        """Inicializa uma coluna vazia."""
+        self.valores: Any = None
+        self.codigo = ''
+        self._codigos: Optional[array] = None
+        self._indices: Optional[Dict[Optional[str], int]] = None
+    
+    def adicionar(self, valor: Any) -> None:
+        """
+        Adiciona um valor ao final da coluna.
+        
+        Args:
+            valor: Valor já convertido (int, float, str ou None)
+        """
+        tipo_valor = type(valor)
+        
+        if self.codigo == 's':
+            if tipo_valor is str or valor is None:
+                self._adicionar_texto(valor)
+                return
+            self._converter_para_lista()
+        
+        elif self.codigo == 'q':
+            if tipo_valor is int:
+                try:
+                    self.valores.append(valor)
+                    return
+                except OverflowError:
+                    pass
+            self._converter_para_lista()
+        
+        elif self.codigo == 'd':
+            if tipo_valor is float:
+                self.valores.append(valor)
+                return
+            self._converter_para_lista()
+        
+        elif not self.codigo:
+            # Primeiro valor define o armazenamento
+            if tipo_valor is int and -2 ** 63 <= valor < 2 ** 63:
+                self.codigo = 'q'
+                self.valores = array('q', [valor])
+            elif tipo_valor is float:
+                self.codigo = 'd'
+                self.valores = array('d', [valor])
+            elif tipo_valor is str or valor is None:
+                self.codigo = 's'
+                self.valores = []
+                self._codigos = array('H')
+                self._indices = {}
+                self._adicionar_texto(valor)
+            else:
+                self.codigo = 'o'
+                self.valores = [valor]
+            return
+        
+        if tipo_valor is str:
+            valor = sys.intern(valor)
+        self.valores.append(valor)
+    
+    def finalizar(self) -> Sequence[Any]:
+        """
+        Retorna o armazenamento final da coluna.
+        
+        Returns:
+            Array tipado, coluna codificada ou lista de valores
+        """
+        if self.codigo == 's':
+            return ColunaCodificada(self._codigos, self.valores)
+        if not self.codigo:
+            return array('q')
+        return self.valores
+    
+    def _adicionar_texto(self, valor: Optional[str]) -> None:
+        """Adiciona um texto à coluna codificada por dicionário."""
+        codigo = self._indices.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            if codigo == 65536:
+                # Mais de 65536 valores distintos: códigos de 4 bytes
+                self._codigos = array('I', self._codigos)
+            self._indices[valor] = codigo
+            self.valores.append(sys.intern(valor) if valor is not None else None)
+        self._codigos.append(codigo)
+    
+    def _converter_para_lista(self) -> None:
+        """Converte o armazenamento atual em lista para aceitar tipos mistos."""
+        if self.codigo == 's':
+            self.valores = list(ColunaCodificada(self._codigos, self.valores))
+            self._codigos = None
+            self._indices = None
+        else:
+            self.valores = list(self.valores)
+        self.codigo = 'o'
+
+
+class TabelaColunar:
+    """Tabela de dados do CSV armazenada por colunas."""
+    
+    def __init__(self, colunas: List[str], dados: Dict[str, Sequence[Any]], total_linhas: int):
+        """
+        Inicializa a tabela.
+        
+        Args:
+            colunas: Nomes das colunas na ordem do header
+            dados: Valores de cada coluna
+            total_linhas: Número de linhas
+        """
+        self.colunas = colunas
+        self._dados = dados
+        self._total_linhas = total_linhas
+        # Linhas descartadas pelo filtro durante a leitura
+        self.linhas_filtradas = 0
+    
+    def coluna(self, nome: str) -> Sequence[Any]:
+        """
+        Retorna todos os valores de uma coluna.
+        
+        Args:
+            nome: Nome da coluna
+        
+        Returns:
+            Sequência com um valor por linha
+        
+        Raises:
+            KeyError: Se a coluna não existir
+        """
+        return self._dados[nome]
+    
+    def __len__(self) -> int:
+        return self._total_linhas
+    
+    def __getitem__(self, indice: int) -> 'LinhaTabela':
+        if indice < 0:
+            indice += self._total_linhas
+        if not 0 <= indice < self._total_linhas:
+            raise IndexError("Índice de linha fora da tabela")
+        return LinhaTabela(self, indice)
+    
+    def __iter__(self) -> Iterator['LinhaTabela']:
+        for indice in range(self._total_linhas):
+            yield LinhaTabela(self, indice)
+    
+    def selecionar(self, indices: Sequence[int]) -> 'TabelaColunar':
+        """
+        Cria uma tabela apenas com as linhas indicadas, no mesmo formato compacto.
+        Colunas codificadas compartilham o dicionário de valores com a original.
+        
+        Args:
+            indices: Índices das linhas, na ordem desejada
+            
+        Returns:
+            Nova tabela com as linhas selecionadas
+        """
+        dados = {
+            nome: _selecionar_valores(valores, indices)
+            for nome, valores in self._dados.items()
+        }
+        return TabelaColunar(list(self.colunas), dados, len(indices))
+
+
+def _selecionar_valores(valores: Sequence[Any], indices: Sequence[int]) -> Sequence[Any]:
+    """Seleciona as posições indicadas de uma coluna, preservando seu armazenamento."""
+    if isinstance(valores, ColunaCodificada):
+        codigos = valores.codigos
+        return ColunaCodificada(array(codigos.typecode, map(codigos.__getitem__, indices)), valores.valores)
+    if isinstance(valores, array):
+        return array(valores.typecode, map(valores.__getitem__, indices))
+    return list(map(valores.__getitem__, indices))
+
+
+class LinhaTabela(Mapping):
+    """Visão de uma linha da tabela, acessível como dicionário somente leitura."""
+    
+    __slots__ = ('_tabela', '_indice')
+    
+    def __init__(self, tabela: TabelaColunar, indice: int):
+        """
+        Inicializa a visão da linha.
+        
+        Args:
+            tabela: Tabela de origem
+            indice: Índice da linha na tabela
+        """
+        self._tabela = tabela
+        self._indice = indice
+    
+    def __getitem__(self, chave: str) -> Any:
+        return self._tabela._dados[chave][self._indice]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tabela.colunas)
+    
+    def __len__(self) -> int:
+        return len(self._tabela.colunas)
+    
+    def __repr__(self) -> str:
+        return repr(dict(self))
@@ -5,6 +5,32 @@ Contém a lógica de negócio para S3, CSV e Datadog.
 
 from .s3_service import S3Service
 from .csv_service import CSVService
+from .transporte_service import Transporte, TransporteDogStatsD, TransporteHTTP
 from .datadog_service import DatadogService
+from .payload_service import PayloadService
+from .multiplas_metricas_service import MultiplasMetricasService
+from .snapshot_service import SnapshotService
+from .delta_service import DeltaService
+from .roteamento_service import RoteamentoService
+from .idempotencia_service import IdempotenciaService
+from .normalizacao_service import NormalizacaoService
+from .cardinalidade_service import CardinalidadeService
+from .validacao_service import ValidacaoService
 
-__all__ = ['S3Service', 'CSVService', 'DatadogService']
+__all__ = [
+    'S3Service',
+    'CSVService',
+    'Transporte',
+    'TransporteHTTP',
+    'TransporteDogStatsD',
+    'DatadogService',
+    'PayloadService',
+    'MultiplasMetricasService',
+    'SnapshotService',
+    'DeltaService',
+    'RoteamentoService',
+    'IdempotenciaService',
+    'NormalizacaoService',
+    'CardinalidadeService',
+    'ValidacaoService'
+]
@@ -0,0 +1,182 @@
+"""
+Armazenamento de estado persistente da Lambda.
+Guarda pequenos arquivos binários em disco local (/tmp) ou em um prefixo do S3.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from botocore.exceptions import ClientError
+
+from ..config.settings import Settings
+from ..utils.logger import configurar_logger
+
+logger = configurar_logger(__name__)
+
+
+class ArmazenamentoLocal:
+    """Armazena arquivos de estado em um diretório local."""
+    
+    def __init__(self, diretorio: str):
+        """
+        Inicializa o armazenamento.
+        
+        Args:
+            diretorio: Diretório onde os arquivos são gravados
+        """
+        self.diretorio = diretorio
+    
+    def ler(self, nome: str) -> Optional[bytes]:
+        """
+        Lê um arquivo de estado.
+        
+        Args:
+            nome: Nome do arquivo
+            
+        Returns:
+            Conteúdo do arquivo ou None se não existir
+        """
+        caminho = os.path.join(self.diretorio, nome)
+        try:
+            with open(caminho, 'rb') as arquivo:
+                return arquivo.read()
+        except FileNotFoundError:
+            return None
+    
+    def gravar(self, nome: str, dados: bytes) -> None:
+        """
+        Grava um arquivo de estado de forma atômica.
+        
+        Args:
+            nome: Nome do arquivo
+            dados: Conteúdo a gravar
+        """
+        caminho = os.path.join(self.diretorio, nome)
+        caminho_parcial = f"{caminho}.parcial"
+        with open(caminho_parcial, 'wb') as arquivo:
+            arquivo.write(dados)
+        os.replace(caminho_parcial, caminho)
+
+    def remover_expirados(self, prefixo: str, idade_maxima: int) -> int:
+        """
+        Remove os arquivos com o prefixo gravados há mais de idade_maxima segundos.
+        
+        Args:
+            prefixo: Prefixo do nome dos arquivos
+            idade_maxima: Idade máxima em segundos
+            
+        Returns:
+            Número de arquivos removidos
+        """
+        limite = time.time() - idade_maxima
+        removidos = 0
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.startswith(prefixo) and entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+                    removidos += 1
+        return removidos
+
+
+class ArmazenamentoS3:
+    """Armazena arquivos de estado em um prefixo do S3."""
+    
+    def __init__(self, s3_client: Any, bucket: str, prefixo: str = ''):
+        """
+        Inicializa o armazenamento.
+        
+        Args:
+            s3_client: Cliente boto3 do S3
+            bucket: Nome do bucket
+            prefixo: Prefixo das chaves (ex: 'estado/')
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefixo = prefixo
+    
+    def ler(self, nome: str) -> Optional[bytes]:
+        """
+        Lê um arquivo de estado do S3.
+        
+        Args:
+            nome: Nome do arquivo
+            
+        Returns:
+            Conteúdo do arquivo ou None se não existir
+        """
+        try:
+            resposta = self.s3_client.get_object(Bucket=self.bucket, Key=f"{self.prefixo}{nome}")
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+        return resposta['Body'].read()
+    
+    def gravar(self, nome: str, dados: bytes) -> None:
+        """
+        Grava um arquivo de estado no S3.
+        
+        Args:
+            nome: Nome do arquivo
+            dados: Conteúdo a gravar
+        """
+        self.s3_client.put_object(Bucket=self.bucket, Key=f"{self.prefixo}{nome}", Body=dados)
+
+    def remover_expirados(self, prefixo: str, idade_maxima: int) -> int:
+        """
+        Remove os objetos com o prefixo gravados há mais de idade_maxima segundos.
+        
+        Args:
+            prefixo: Prefixo do nome dos arquivos
+            idade_maxima: Idade máxima em segundos
+            
+        Returns:
+            Número de objetos removidos
+        """
+        limite = datetime.now(timezone.utc) - timedelta(seconds=idade_maxima)
+        expirados = []
+        
+        paginador = self.s3_client.get_paginator('list_objects_v2')
+        for pagina in paginador.paginate(Bucket=self.bucket, Prefix=f"{self.prefixo}{prefixo}"):
+            expirados.extend(
+                {'Key': objeto['Key']}
+                for objeto in pagina.get('Contents', [])
+                if objeto['LastModified'] < limite
+            )
+        
+        # delete_objects aceita até 1000 chaves por chamada
+        for i in range(0, len(expirados), 1000):
+            self.s3_client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': expirados[i:i + 1000], 'Quiet': True}
+            )
+        
+        return len(expirados)
+
+
+def criar_armazenamento(destino: str, settings: Settings, s3_client: Any = None):
+    """
+    Cria o armazenamento a partir da configuração.
+    
+    Args:
+        destino: 's3://bucket/prefixo' para o S3; vazio para o diretório temporário
+        settings: Objeto de configurações
+        s3_client: Cliente boto3 do S3 (obrigatório para destinos no S3)
+        
+    Returns:
+        ArmazenamentoLocal ou ArmazenamentoS3
+        
+    Raises:
+        ValueError: Se o destino no S3 não tiver bucket
+    """
+    if destino.startswith('s3://'):
+        bucket, _, prefixo = destino[len('s3://'):].partition('/')
+        if not bucket:
+            raise ValueError(f"Destino de armazenamento inválido: {destino}")
+        if prefixo and not prefixo.endswith('/'):
+            prefixo += '/'
+        logger.info("Armazenamento de estado em s3://%s/%s", bucket, prefixo)
+        return ArmazenamentoS3(s3_client, bucket, prefixo)
+    
+    return ArmazenamentoLocal(destino or settings.diretorio_temp)
@@ -0,0 +1,213 @@
+"""
+Serviço de proteção contra explosão de cardinalidade de tags.
+Estima, por nome de métrica, quantas combinações distintas de tags (e host)
+foram geradas e aplica um limite antes de qualquer serialização.
+"""
+
+from typing import Any, Dict, List, Set, Tuple
+
+from ..config.constants import (
+    ACAO_REJEITAR,
+    ACAO_REMOVER_TAG,
+    ACAO_TRUNCAR,
+    ACOES_CARDINALIDADE
+)
+from ..utils.hyperloglog import HyperLogLog, hash64
+from ..utils.logger import configurar_logger
+
+logger = configurar_logger(__name__)
+
+
+# Precisão dos sketches por métrica (4 KB, erro ~1,6%) e por chave de tag (1 KB, erro ~3,3%)
+PRECISAO_METRICA = 12
+PRECISAO_TAG = 10
+
+
+class CardinalidadeService:
+    """Serviço para estimar e limitar a cardinalidade das métricas geradas."""
+    
+    def __init__(self, limite: int = 0, acao: str = ACAO_REJEITAR):
+        """
+        Inicializa o serviço.
+        
+        Args:
+            limite: Máximo de séries distintas por nome de métrica (0 apenas estima)
+            acao: 'rejeitar' descarta a métrica inteira, 'remover_tag' remove as
+                chaves de tag de maior cardinalidade e 'truncar' mantém apenas as
+                primeiras séries distintas até o limite
+                
+        Raises:
+            ValueError: Se a ação não for suportada
+        """
+        if acao not in ACOES_CARDINALIDADE:
+            raise ValueError(
+                f"Ação de cardinalidade '{acao}' não suportada. Ações disponíveis: {list(ACOES_CARDINALIDADE)}"
+            )
+        
+        self.limite = limite
+        self.acao = acao
+        # Nome da métrica -> séries distintas estimadas
+        self.estimativas: Dict[str, int] = {}
+        # Nome da métrica -> ação aplicada
+        self.excedentes: Dict[str, str] = {}
+        self.series_descartadas = 0
+    
+    def aplicar(self, metricas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Estima a cardinalidade e aplica o limite configurado.
+        As listas de tags originais (compartilhadas) nunca são alteradas.
+        
+        Args:
+            metricas: Métricas geradas pelos templates
+            
+        Returns:
+            Métricas dentro do limite
+        """
+        por_tag = self.limite > 0 and self.acao == ACAO_REMOVER_TAG
+        sketches, sketches_tags = self._estimar(metricas, por_tag)
+        
+        self.estimativas = {nome: sketch.estimar() for nome, sketch in sketches.items()}
+        
+        if self.limite <= 0:
+            return metricas
+        
+        acima = {nome for nome, estimativa in self.estimativas.items() if estimativa > self.limite}
+        if not acima:
+            return metricas
+        
+        for nome in sorted(acima):
+            logger.warning(
+                "Métrica '%s' com ~%s séries distintas (limite %s), ação: %s",
+                nome, self.estimativas[nome], self.limite, self.acao
+            )
+        
+        if self.acao == ACAO_REJEITAR:
+            resultado = [metrica for metrica in metricas if metrica['metric'] not in acima]
+            self.excedentes = {nome: 'rejeitada' for nome in acima}
+        elif self.acao == ACAO_TRUNCAR:
+            resultado = self._truncar(metricas, acima)
+        else:
+            resultado = self._remover_tags(metricas, acima, sketches_tags)
+            
+        self.series_descartadas = len(metricas) - len(resultado)
+        return resultado
+    
+    def resumo(self, maximo: int = 20) -> Dict[str, Any]:
+        """
+        Resume as estimativas para o resultado do handler.
+        
+        Args:
+            maximo: Número de métricas (as de maior cardinalidade) listadas
+            
+        Returns:
+            Dicionário com limite, ação, estimativas e excedentes
+        """
+        maiores = sorted(self.estimativas.items(), key=lambda item: item[1], reverse=True)[:maximo]
+        return {
+            'limite': self.limite,
+            'acao': self.acao,
+            'estimativas': dict(maiores),
+            'excedentes': self.excedentes,
+            'series_descartadas': self.series_descartadas
+        }
+    
+    def _estimar(
+        self,
+        metricas: List[Dict[str, Any]],
+        por_tag: bool
+    ) -> Tuple[Dict[str, HyperLogLog], Dict[str, Dict[str, HyperLogLog]]]:
+        """
+        Alimenta um sketch por métrica (séries distintas) e, opcionalmente,
+        um por chave de tag de cada métrica (valores distintos da chave).
+        """
+        sketches: Dict[str, HyperLogLog] = {}
+        sketches_tags: Dict[str, Dict[str, HyperLogLog]] = {}
+        # Listas de tags são compartilhadas entre métricas: montar o texto uma vez
+        textos_tags: Dict[Tuple[str, int], str] = {}
+        
+        for metrica in metricas:
+            nome = metrica['metric']
+            tags = metrica.get('tags') or ()
+            
+            sketch = sketches.get(nome)
+            if sketch is None:
+                sketch = sketches[nome] = HyperLogLog(PRECISAO_METRICA)
+                sketches_tags[nome] = {}
+                
+            chave_texto = (nome, id(tags))
+            texto_tags = textos_tags.get(chave_texto)
+            if texto_tags is None:
+                texto_tags = textos_tags[chave_texto] = '\x1e'.join(tags)
+                
+                # Cada lista distinta alimenta os sketches por chave uma única vez
+                if por_tag:
+                    por_chave = sketches_tags[nome]
+                    for tag in tags:
+                        chave_tag = tag.partition(':')[0]
+                        sketch_tag = por_chave.get(chave_tag)
+                        if sketch_tag is None:
+                            sketch_tag = por_chave[chave_tag] = HyperLogLog(PRECISAO_TAG)
+                        sketch_tag.adicionar(hash64(tag))
+                        
+            sketch.adicionar(hash64(f"{metrica.get('host')}\x1f{texto_tags}"))
+            
+        return sketches, sketches_tags
+    
+    def _truncar(self, metricas: List[Dict[str, Any]], acima: Set[str]) -> List[Dict[str, Any]]:
+        """Mantém, para as métricas acima do limite, apenas as primeiras séries distintas."""
+        vistas: Dict[str, Set[Tuple[Any, Tuple[str, ...]]]] = {nome: set() for nome in acima}
+        resultado = []
+        
+        for metrica in metricas:
+            nome = metrica['metric']
+            if nome in vistas:
+                serie = (metrica.get('host'), tuple(metrica.get('tags') or ()))
+                series = vistas[nome]
+                if serie not in series:
+                    if len(series) >= self.limite:
+                        continue
+                    series.add(serie)
+            resultado.append(metrica)
+            
+        self.excedentes = {nome: f"truncada em {self.limite} séries" for nome in acima}
+        return resultado
+    
+    def _remover_tags(
+        self,
+        metricas: List[Dict[str, Any]],
+        acima: Set[str],
+        sketches_tags: Dict[str, Dict[str, HyperLogLog]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Remove, das métricas acima do limite, as chaves de tag que sozinhas
+        excedem o limite (ou, se nenhuma exceder, a de maior cardinalidade).
+        """
+        remover: Dict[str, Set[str]] = {}
+        for nome in acima:
+            estimativas = {
+                chave: sketch.estimar() for chave, sketch in sketches_tags.get(nome, {}).items()
+            }
+            chaves = {chave for chave, estimativa in estimativas.items() if estimativa > self.limite}
+            if not chaves and estimativas:
+                chaves = {max(estimativas, key=estimativas.get)}
+            remover[nome] = chaves
+            self.excedentes[nome] = f"tags removidas: {', '.join(sorted(chaves)) or 'nenhuma'}"
+            
+        # Novas listas também são compartilhadas entre métricas com as mesmas tags
+        novas_listas: Dict[Tuple[str, int], List[str]] = {}
+        resultado = []
+        
+        for metrica in metricas:
+            nome = metrica['metric']
+            chaves = remover.get(nome)
+            if chaves:
+                tags = metrica.get('tags') or []
+                nova = novas_listas.get((nome, id(tags)))
+                if nova is None:
+                    nova = novas_listas[(nome, id(tags))] = [
+                        tag for tag in tags if tag.partition(':')[0] not in chaves
+                    ]
+                metrica = dict(metrica, tags=nova)
+            resultado.append(metrica)
+            
+        return resultado
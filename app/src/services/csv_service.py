@@ -1,12 +1,17 @@
 """
 Serviço de leitura de arquivos CSV genéricos.
-Lê qualquer estrutura de CSV e retorna como lista de dicionários.
+Lê qualquer estrutura de CSV e retorna como tabela colunar.
 """
 
+import contextlib
 import csv
-from typing import List, Dict, Any
+import io
+from typing import IO, Any, Iterable, List, Optional, Union
 
-from ..utils.logger import configurar_logger
+from ..models.tabela_colunar import TabelaColunar, ConstrutorColuna
+from ..utils.expressoes import FiltroCompilado, compilar_filtro
+from ..utils.logger import TotalizadorErros, configurar_logger
+from ..utils.telemetria import TELEMETRIA_DESATIVADA, Telemetria
 
 logger = configurar_logger(__name__)
 
@@ -14,77 +19,242 @@ logger = configurar_logger(__name__)
 class CSVService:
     """Serviço para ler arquivos CSV genéricos."""
     
-    def __init__(self):
-        """Inicializa o serviço de leitura de CSV."""
-        pass
+    def __init__(self, telemetria: Optional[Telemetria] = None):
+        """
+        Inicializa o serviço de leitura de CSV.
+        
+        Args:
+            telemetria: Registro de tempos e contadores da invocação
+        """
+        self.telemetria = telemetria or TELEMETRIA_DESATIVADA
     
-    def ler_csv(self, caminho_arquivo: str) -> List[Dict[str, Any]]:
+    def ler_csv(
+        self,
+        caminho_arquivo: Union[str, IO[str]],
+        filtro: Optional[Union[str, FiltroCompilado]] = None,
+        colunas: Optional[Iterable[str]] = None,
+        limite_linhas: Optional[int] = None
+    ) -> TabelaColunar:
         """
-        Lê arquivo CSV e retorna lista de dicionários.
+        Lê arquivo CSV e retorna uma tabela colunar.
+        Cada linha da tabela pode ser acessada como dicionário (linha['coluna']).
         
         Args:
-            caminho_arquivo: Caminho do arquivo CSV
-            
+            caminho_arquivo: Caminho do arquivo CSV (ou arquivo de texto já aberto)
+            filtro: Predicado opcional avaliado logo após a leitura de cada linha,
+                sobre os valores brutos (texto) das colunas; linhas rejeitadas
+                não passam pela conversão de tipos
+            colunas: Projeção opcional; apenas essas colunas são convertidas
+                e armazenadas (as inexistentes no CSV são ignoradas)
+            limite_linhas: Se informado, a leitura para após esse número de
+                linhas aceitas pelo filtro
+        
         Returns:
-            Lista de dicionários, onde cada dicionário representa uma linha
+            Tabela colunar com os valores convertidos
+            
+        Raises:
+            ValueError: Se o CSV não tiver header, o filtro for inválido ou
+                o filtro gerar erro em todas as linhas que rejeitou sem aceitar nenhuma
         """
-        linhas = []
-        
+        if isinstance(filtro, str):
+            filtro = compilar_filtro(filtro)
+            
+        erros_filtro = TotalizadorErros()
         try:
-            logger.info(f"Lendo arquivo CSV: {caminho_arquivo}")
+            logger.info("Lendo arquivo CSV: %s", caminho_arquivo)
             
-            with open(caminho_arquivo, 'r', encoding='utf-8') as arquivo:
-                leitor = csv.DictReader(arquivo)
+            if isinstance(caminho_arquivo, str):
+                abrir = open(caminho_arquivo, 'r', encoding='utf-8', newline='')
+            else:
+                abrir = contextlib.nullcontext(caminho_arquivo)
+                
+            with abrir as arquivo:
+                leitor = csv.reader(arquivo)
+                cabecalho = next(leitor, None)
                 
                 # Validar que o CSV tem colunas
-                if not leitor.fieldnames:
+                if not cabecalho:
                     raise ValueError("CSV não contém colunas (header)")
                 
-                logger.info(f"Colunas encontradas: {leitor.fieldnames}")
+                logger.info("Colunas encontradas: %s", cabecalho)
+                
+                total_colunas = len(cabecalho)
+                
+                # Em colunas duplicadas, prevalece a última (como no csv.DictReader)
+                posicoes = {nome: indice for indice, nome in enumerate(cabecalho)}
+                if colunas is not None:
+                    projecao = set(colunas)
+                    posicoes = {nome: indice for nome, indice in posicoes.items() if nome in projecao}
+                    logger.info("Projeção de colunas: %s", list(posicoes))
+                    
+                nomes = list(posicoes)
+                indices = list(posicoes.values())
+                construtores = [ConstrutorColuna() for _ in nomes]
+                total_linhas = 0
+                linhas_filtradas = 0
+                colunas_filtro = self._colunas_filtro(filtro, cabecalho) if filtro else None
                 
                 # Ler todas as linhas
-                for idx, linha in enumerate(leitor, start=1):
+                for campos in leitor:
+                    # Linhas em branco são ignoradas
+                    if not campos:
+                        continue
+                    
+                    # Colunas ausentes ficam como None
+                    if len(campos) < total_colunas:
+                        campos.extend([None] * (total_colunas - len(campos)))
+                        
+                    # Filtro sobre os valores brutos, antes da conversão
+                    if filtro is not None and not filtro.aceitar(
+                        {nome: campos[indice] for nome, indice in colunas_filtro},
+                        erros_filtro,
+                        total_linhas + linhas_filtradas + 1
+                    ):
+                        linhas_filtradas += 1
+                        continue
+                    
                     # Converter valores numéricos quando possível
-                    linha_processada = self._processar_linha(linha)
-                    linhas.append(linha_processada)
+                    for construtor, indice in zip(construtores, indices):
+                        construtor.adicionar(self._converter_valor(campos[indice]))
+                    total_linhas += 1
+                    
+                    if total_linhas == limite_linhas:
+                        break
+            
+            dados = {
+                nome: construtor.finalizar()
+                for nome, construtor in zip(nomes, construtores)
+            }
+            tabela = TabelaColunar(nomes, dados, total_linhas)
+            tabela.linhas_filtradas = linhas_filtradas
+            
+            if filtro is not None:
+                logger.info(
+                    "Filtro '%s' descartou %s linhas", filtro.fonte, linhas_filtradas
+                )
                 
-            logger.info(f"Lidas {len(linhas)} linhas do CSV")
-            return linhas
+            if erros_filtro.erros:
+                erros_filtro.logar(logger, "Filtro")
+                self.telemetria.incrementar('csv.erros_filtro', erros_filtro.total)
+                
+                # Um filtro que falha em todas as linhas descartaria o CSV inteiro
+                if total_linhas == 0 and erros_filtro.total == linhas_filtradas:
+                    _, linha, erro = next(iter(erros_filtro.erros.values()))
+                    raise ValueError(
+                        f"Filtro '{filtro.fonte}' gerou erro em todas as {linhas_filtradas} linhas "
+                        f"(primeiro, linha {linha}: {erro})"
+                    )
             
+            self.telemetria.incrementar('csv.linhas', total_linhas)
+            self.telemetria.incrementar('csv.linhas_filtradas', linhas_filtradas)
+            logger.info("Lidas %s linhas do CSV", total_linhas)
+            return tabela
+        
         except Exception as e:
-            logger.error(f"Erro ao ler CSV: {e}")
+            logger.error("Erro ao ler CSV: %s", e)
             raise
     
-    def _processar_linha(self, linha: Dict[str, str]) -> Dict[str, Any]:
+    def ler_amostra(
+        self,
+        inicio: bytes,
+        completo: bool,
+        filtro: Optional[Union[str, FiltroCompilado]] = None,
+        colunas: Optional[Iterable[str]] = None,
+        limite_linhas: Optional[int] = None
+    ) -> TabelaColunar:
         """
-        Processa uma linha do CSV, convertendo tipos quando possível.
+        Lê as primeiras linhas do CSV a partir dos bytes iniciais do arquivo
+        (ver S3Service.ler_inicio). Uma última linha incompleta é descartada.
         
         Args:
-            linha: Dicionário com valores string do CSV
+            inicio: Bytes iniciais do arquivo
+            completo: Se os bytes são o arquivo inteiro
+            filtro: Predicado opcional (como em ler_csv)
+            colunas: Projeção opcional (como em ler_csv)
+            limite_linhas: Número máximo de linhas da amostra
             
         Returns:
-            Dicionário com valores convertidos
+            Tabela colunar com as linhas da amostra
+            
+        Raises:
+            ValueError: Se o CSV não tiver header ou o filtro for inválido
+        """
+        if not completo:
+            inicio = inicio[:inicio.rfind(b'\n') + 1]
+        texto = io.StringIO(inicio.decode('utf-8', errors='replace'), newline='')
+        return self.ler_csv(texto, filtro=filtro, colunas=colunas, limite_linhas=limite_linhas)
+    
+    @staticmethod
+    def ler_cabecalho(inicio: bytes, completo: bool) -> Optional[List[str]]:
         """
-        linha_processada = {}
+        Extrai o header do CSV dos bytes iniciais do arquivo.
         
-        for chave, valor in linha.items():
-            # Tentar converter para número
-            if valor:
-                # Tentar int
-                try:
-                    linha_processada[chave] = int(valor)
-                    continue
-                except ValueError:
-                    pass
-                
-                # Tentar float
-                try:
-                    linha_processada[chave] = float(valor)
-                    continue
-                except ValueError:
-                    pass
+        Args:
+            inicio: Bytes iniciais do arquivo
+            completo: Se os bytes são o arquivo inteiro
+            
+        Returns:
+            Colunas do CSV, ou None se o header não couber nos bytes lidos
+        """
+        fim = inicio.find(b'\n')
+        if fim < 0:
+            if not completo:
+                return None
+            fim = len(inicio)
+        linha = inicio[:fim].decode('utf-8', errors='replace')
+        return next(csv.reader([linha]), [])
+    
+    @staticmethod
+    def _colunas_filtro(filtro: FiltroCompilado, cabecalho: list) -> list:
+        """
+        Mapeia as colunas lidas pelo filtro para suas posições no CSV.
+        
+        Args:
+            filtro: Filtro compilado
+            cabecalho: Colunas do CSV
+            
+        Returns:
+            Lista de pares (nome da coluna, índice)
+            
+        Raises:
+            ValueError: Se o filtro referenciar colunas inexistentes
+        """
+        # Em colunas duplicadas, prevalece a última
+        indices = {nome: indice for indice, nome in enumerate(cabecalho)}
+        
+        # Filtros que usam a linha de outra forma recebem todas as colunas
+        if filtro.colunas is None:
+            return list(indices.items())
+        
+        ausentes = [nome for nome in filtro.colunas if nome not in indices]
+        if ausentes:
+            raise ValueError(f"Filtro referencia colunas inexistentes no CSV: {ausentes}")
+        
+        return [(nome, indices[nome]) for nome in filtro.colunas]
+    
+    @staticmethod
+    def _converter_valor(valor: Optional[str]) -> Any:
+        """
+        Converte um valor do CSV para int ou float quando possível.
+        
+        Args:
+            valor: Valor string do CSV
+        
+        Returns:
+            Valor convertido ou o próprio valor
+        """
+        if valor:
+            # Tentar int
+            try:
+                return int(valor)
+            except ValueError:
+                pass
             
-            # Manter como string
-            linha_processada[chave] = valor
+            # Tentar float
+            try:
+                return float(valor)
+            except ValueError:
+                pass
         
-        return linha_processada
+        # Manter como string
+        return valor
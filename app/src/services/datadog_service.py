@@ -1,15 +1,18 @@
 """
 Serviço para envio de métricas ao Datadog.
-Gerencia envio em lotes e retry de requisições.
+Gerencia envio em lotes; a serialização e o envio de cada lote ficam a cargo
+do transporte (HTTP ou DogStatsD).
 """
 
-import requests
-from typing import List, Dict, Any
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional
 
-from ..config.settings import Settings
+from ..config.settings import DestinoDatadog, Settings
 from ..utils.logger import configurar_logger
+from ..utils.telemetria import TELEMETRIA_DESATIVADA, Telemetria
+from .idempotencia_service import IdempotenciaService
+from .transporte_service import Transporte, criar_transporte
 
 logger = configurar_logger(__name__)
 
@@ -17,121 +20,271 @@ logger = configurar_logger(__name__)
 class DatadogService:
     """Serviço para interação com a API do Datadog."""
     
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        idempotencia: Optional[IdempotenciaService] = None,
+        transporte: Optional[Transporte] = None,
+        telemetria: Optional[Telemetria] = None
+    ):
         """
         Inicializa o serviço do Datadog.
         
         Args:
             settings: Objeto de configurações
+            idempotencia: Registro de lotes já aceitos (pula lotes de tentativas anteriores)
+            transporte: Transporte de envio (padrão: o de DATADOG_TRANSPORTE)
+            telemetria: Registro de tempos e contadores da invocação
         """
         self.settings = settings
-        self.session = self._criar_sessao()
+        self.destinos = settings.destinos_datadog
+        self.idempotencia = idempotencia
+        self.telemetria = telemetria or TELEMETRIA_DESATIVADA
+        self.transporte = transporte or criar_transporte(settings, self.telemetria)
     
-    def _criar_sessao(self) -> requests.Session:
-        """
-        Cria sessão HTTP com retry automático.
-        
-        Returns:
-            Sessão configurada
-        """
-        sessao = requests.Session()
-        
-        # Configurar retry
-        retry_strategy = Retry(
-            total=self.settings.max_tentativas,
-            backoff_factor=self.settings.delay_retry,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["POST"]
-        )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        sessao.mount("https://", adapter)
-        sessao.mount("http://", adapter)
-        
-        return sessao
-    
-    def enviar_metricas_em_lotes(self, metricas: List[Dict[str, Any]]) -> Dict[str, int]:
+    def enviar_metricas_em_lotes(self, metricas: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Envia métricas para o Datadog em lotes.
+        Cada lote é serializado uma única vez e enviado em paralelo a todos os
+        destinos; o próximo lote é serializado enquanto o atual é enviado.
         
         Args:
             metricas: Lista de métricas a enviar
             
         Returns:
-            Dicionário com estatísticas do envio
+            Dicionário com estatísticas do envio. Com vários destinos,
+            total_enviadas e lotes_enviados contam o que todos os destinos
+            aceitaram, erros soma as falhas, e 'destinos' traz os contadores
+            de cada destino
         """
         total_metricas = len(metricas)
         tamanho_lote = self.settings.tamanho_lote
-        total_enviadas = 0
-        lotes_enviados = 0
-        erros = 0
+        total_lotes = (total_metricas + tamanho_lote - 1) // tamanho_lote
+        contadores = {
+            destino.nome: {'total_enviadas': 0, 'lotes_enviados': 0, 'lotes_repetidos': 0, 'erros': 0}
+            for destino in self.destinos
+        }
         
-        logger.info(f"Iniciando envio de {total_metricas} métricas em lotes de {tamanho_lote}")
+        logger.info(
+            "Iniciando envio de %s métricas em lotes de %s "
+            "para %s destino(s)",
+            total_metricas, tamanho_lote, len(self.destinos)
+        )
         
-        # Dividir em lotes
-        for i in range(0, total_metricas, tamanho_lote):
-            lote = metricas[i:i + tamanho_lote]
-            lote_numero = (i // tamanho_lote) + 1
-            total_lotes = (total_metricas + tamanho_lote - 1) // tamanho_lote
+        ocorrencias: Dict[str, int] = {}
+        with ThreadPoolExecutor(max_workers=len(self.destinos)) as executor:
+            pendentes = []
             
-            logger.info(f"Enviando lote {lote_numero}/{total_lotes} com {len(lote)} métricas")
+            # Dividir em lotes
+            for i in range(0, total_metricas, tamanho_lote):
+                lote = metricas[i:i + tamanho_lote]
+                lote_numero = (i // tamanho_lote) + 1
+                chave = self.idempotencia.gerar_chave(lote, ocorrencias) if self.idempotencia else None
+                
+                # Lotes já aceitos por todos os destinos nem são serializados
+                if chave is not None and all(
+                    self.idempotencia.ja_enviado(chave, destino.nome) for destino in self.destinos
+                ):
+                    corpo = None
+                else:
+                    corpo = self._serializar(lote)
             
-            try:
-                self._enviar_lote(lote)
-                total_enviadas += len(lote)
-                lotes_enviados += 1
-                logger.info(f"Lote {lote_numero} enviado com sucesso")
+                # Cada sessão atende um lote por vez: aguardar o lote anterior
+                wait(pendentes)
+                
+                logger.info(
+                    "Enviando lote %s/%s com %s métricas "
+                    "(%s bytes)",
+                    lote_numero, total_lotes, len(lote), self.transporte.tamanho(corpo) if corpo else 0
+                )
                 
-            except Exception as e:
-                erros += 1
-                logger.error(f"Erro ao enviar lote {lote_numero}: {e}")
-                # Continua processando os próximos lotes
-                continue
+                pendentes = [
+                    executor.submit(
+                        self._enviar_lote_destino,
+                        destino,
+                        corpo,
+                        len(lote),
+                        lote_numero,
+                        contadores[destino.nome],
+                        chave
+                    )
+                    for destino in self.destinos
+                ]
+            
+            wait(pendentes)
+        
+        if self.idempotencia:
+            self.idempotencia.persistir()
         
         resultado = {
-            'total_enviadas': total_enviadas,
-            'lotes_enviados': lotes_enviados,
-            'erros': erros,
-            'total_metricas': total_metricas
+            'total_enviadas': min(c['total_enviadas'] for c in contadores.values()),
+            'lotes_enviados': min(c['lotes_enviados'] for c in contadores.values()),
+            'lotes_repetidos': min(c['lotes_repetidos'] for c in contadores.values()),
+            'erros': sum(c['erros'] for c in contadores.values()),
+            'total_metricas': total_metricas,
+            'destinos': contadores
         }
         
-        logger.info(f"Envio concluído: {resultado}")
+        logger.info("Envio concluído: %s", resultado)
         return resultado
     
-    def _enviar_lote(self, lote: List[Dict[str, Any]]) -> None:
+    def enviar_metricas_roteadas(
+        self,
+        metricas_por_destino: Dict[str, List[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
         """
-        Envia um lote de métricas para o Datadog.
+        Envia a cada destino apenas as suas métricas.
+        Cada destino tem sua própria fila de lotes, esvaziada em paralelo com
+        as dos demais pela sessão (pool de conexões) do destino.
         
         Args:
-            lote: Lista de métricas do lote
+            metricas_por_destino: Nome do destino -> métricas do destino
+            
+        Returns:
+            Dicionário com estatísticas do envio (somadas entre destinos) e
+            os contadores de cada destino em 'destinos'
             
         Raises:
-            requests.RequestException: Se houver erro na requisição
+            ValueError: Se algum destino não estiver configurado
         """
-        payload = {
-            'series': lote
+        destinos = {destino.nome: destino for destino in self.destinos}
+        desconhecidos = [nome for nome in metricas_por_destino if nome not in destinos]
+        if desconhecidos:
+            raise ValueError(f"Destinos não configurados: {desconhecidos}")
+        
+        contadores = {
+            nome: {'total_enviadas': 0, 'lotes_enviados': 0, 'lotes_repetidos': 0, 'erros': 0}
+            for nome in metricas_por_destino
         }
         
-        headers = {
-            'Content-Type': 'application/json',
-            'DD-API-KEY': self.settings.datadog_api_key,
-            'DD-APPLICATION-KEY': self.settings.datadog_app_key
+        logger.info(
+            "Iniciando envio roteado: %s",
+            ', '.join(f"{nome}={len(metricas)}" for nome, metricas in metricas_por_destino.items())
+        )
+        
+        with ThreadPoolExecutor(max_workers=max(1, len(metricas_por_destino))) as executor:
+            filas = [
+                executor.submit(self._enviar_fila_destino, destinos[nome], metricas, contadores[nome])
+                for nome, metricas in metricas_por_destino.items()
+            ]
+            # Propagar erros inesperados (ex: falha de serialização)
+            for fila in filas:
+                fila.result()
+                
+        if self.idempotencia:
+            self.idempotencia.persistir()
+            
+        resultado = {
+            'total_enviadas': sum(c['total_enviadas'] for c in contadores.values()),
+            'lotes_enviados': sum(c['lotes_enviados'] for c in contadores.values()),
+            'lotes_repetidos': sum(c['lotes_repetidos'] for c in contadores.values()),
+            'erros': sum(c['erros'] for c in contadores.values()),
+            'total_metricas': sum(len(metricas) for metricas in metricas_por_destino.values()),
+            'destinos': contadores
         }
         
-        try:
-            resposta = self.session.post(
-                self.settings.datadog_api_url,
-                json=payload,
-                headers=headers,
-                timeout=self.settings.timeout_request
+        logger.info("Envio concluído: %s", resultado)
+        return resultado
+    
+    def fechar(self) -> None:
+        """Libera as conexões do transporte (ao final da invocação)."""
+        self.transporte.fechar()
+    
+    def _enviar_fila_destino(
+        self,
+        destino: DestinoDatadog,
+        metricas: List[Dict[str, Any]],
+        contadores: Dict[str, int]
+    ) -> None:
+        """
+        Envia em lotes as métricas de um único destino.
+        
+        Args:
+            destino: Destino do Datadog
+            metricas: Métricas do destino
+            contadores: Contadores do destino
+        """
+        tamanho_lote = self.settings.tamanho_lote
+        ocorrencias: Dict[str, int] = {}
+        for i in range(0, len(metricas), tamanho_lote):
+            lote = metricas[i:i + tamanho_lote]
+            chave = self.idempotencia.gerar_chave(lote, ocorrencias) if self.idempotencia else None
+            
+            if chave is not None and self.idempotencia.ja_enviado(chave, destino.nome):
+                corpo = None
+            else:
+                corpo = self._serializar(lote)
+                
+            self._enviar_lote_destino(
+                destino,
+                corpo,
+                len(lote),
+                (i // tamanho_lote) + 1,
+                contadores,
+                chave
             )
+    
+    def _serializar(self, lote: List[Dict[str, Any]]) -> Any:
+        """
+        Serializa um lote pelo transporte, registrando tempo e bytes na telemetria.
+        
+        Args:
+            lote: Lista de métricas do lote
             
-            resposta.raise_for_status()
+        Returns:
+            Corpo do lote no formato do transporte
+        """
+        with self.telemetria.cronometro('envio.serializacao'):
+            corpo = self.transporte.serializar(lote)
+        self.telemetria.incrementar('envio.bytes', self.transporte.tamanho(corpo))
+        return corpo
+    
+    def _enviar_lote_destino(
+        self,
+        destino: DestinoDatadog,
+        corpo: Any,
+        total_lote: int,
+        lote_numero: int,
+        contadores: Dict[str, int],
+        chave: Optional[str] = None
+    ) -> None:
+        """
+        Envia um lote a um destino, atualizando os contadores do destino.
+        Erros são logados e contabilizados; os próximos lotes continuam.
+        Lotes já aceitos pelo destino em uma tentativa anterior são ignorados
+        e contados como enviados.
+        
+        Args:
+            destino: Destino do Datadog
+            corpo: Corpo já serializado pelo transporte (None se já aceito por todos)
+            total_lote: Número de métricas do lote
+            lote_numero: Número do lote (para logging)
+            contadores: Contadores do destino
+            chave: Chave de idempotência do lote
+        """
+        if chave is not None and self.idempotencia.ja_enviado(chave, destino.nome):
+            contadores['total_enviadas'] += total_lote
+            contadores['lotes_enviados'] += 1
+            contadores['lotes_repetidos'] += 1
+            self.telemetria.incrementar('envio.lotes_repetidos')
+            logger.info("Lote %s já aceito por '%s' em tentativa anterior, ignorado", lote_numero, destino.nome)
+            return
+        
+        inicio = time.perf_counter()
+        try:
+            self.transporte.enviar(destino, corpo)
+            if chave is not None:
+                self.idempotencia.registrar(chave, destino.nome)
+            contadores['total_enviadas'] += total_lote
+            contadores['lotes_enviados'] += 1
+            self.telemetria.incrementar('envio.lotes')
+            logger.info("Lote %s enviado com sucesso para '%s'", lote_numero, destino.nome)
             
-            logger.debug(f"Resposta do Datadog: {resposta.status_code} - {resposta.text}")
+        except Exception as e:
+            contadores['erros'] += 1
+            self.telemetria.incrementar('envio.erros')
+            logger.error("Erro ao enviar lote %s para '%s': %s", lote_numero, destino.nome, e)
             
-        except requests.RequestException as e:
-            logger.error(f"Erro na requisição ao Datadog: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"Resposta de erro: {e.response.text}")
-            raise
+        finally:
+            # Latência por lote e destino, inclusive retentativas e falhas
+            self.telemetria.observar('envio.lote_ms', (time.perf_counter() - inicio) * 1000)
@@ -0,0 +1,177 @@
+"""
+Serviço do modo delta.
+Envia apenas as séries cujo valor mudou desde a última execução, comparando
+hashes de (série, valor) com um estado compacto e limitado, com reenvio
+completo periódico.
+"""
+
+import hashlib
+import struct
+import sys
+import time
+from array import array
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+from ..utils.hyperloglog import hash64
+from ..utils.logger import configurar_logger
+
+logger = configurar_logger(__name__)
+
+
+# Cabeçalho do estado: identificador, versão, último reenvio completo, total de séries
+_CABECALHO = struct.Struct('<4sIqI')
+_IDENTIFICADOR = b'DLTA'
+VERSAO_ESTADO = 1
+
+
+class DeltaService:
+    """Serviço para filtrar métricas inalteradas entre execuções."""
+    
+    def __init__(
+        self,
+        armazenamento: Any,
+        nome_estado: str,
+        tamanho_maximo: int,
+        intervalo_refresh: int
+    ):
+        """
+        Inicializa o serviço e carrega o estado persistido.
+        
+        Args:
+            armazenamento: Armazenamento do estado (ler/gravar bytes)
+            nome_estado: Nome do arquivo de estado
+            tamanho_maximo: Máximo de séries mantidas no estado
+            intervalo_refresh: Segundos entre reenvios completos
+        """
+        self.armazenamento = armazenamento
+        self.nome_estado = nome_estado
+        self.tamanho_maximo = tamanho_maximo
+        self.intervalo_refresh = intervalo_refresh
+        
+        # Hash da série -> hash do valor, do menos ao mais recentemente visto
+        self._estado: Dict[int, int] = {}
+        self._ultimo_refresh = 0
+        self.refresh_completo = False
+        self.series_inalteradas = 0
+        
+        self._carregar()
+    
+    @staticmethod
+    def gerar_nome_estado(*partes: str) -> str:
+        """
+        Gera o nome do arquivo de estado para uma origem de dados.
+        
+        Args:
+            partes: Identificação da origem (bucket, caminho, formato...)
+            
+        Returns:
+            Nome do arquivo de estado
+        """
+        identificacao = hashlib.sha256('\x1f'.join(partes).encode('utf-8')).hexdigest()
+        return f"delta-{identificacao[:16]}.bin"
+    
+    def filtrar(self, metricas: List[Dict[str, Any]], agora: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Retorna as métricas cujo valor mudou (ou todas, no reenvio completo)
+        e atualiza o estado em memória. Chamar salvar() após o envio.
+        
+        Args:
+            metricas: Métricas geradas nesta execução
+            agora: Timestamp atual (padrão: time.time())
+            
+        Returns:
+            Métricas a enviar
+        """
+        agora = int(time.time()) if agora is None else agora
+        self.refresh_completo = (
+            not self._estado or agora - self._ultimo_refresh >= self.intervalo_refresh
+        )
+        
+        estado = self._estado
+        # Listas de tags são compartilhadas entre métricas: montar o texto uma vez
+        textos_tags: Dict[int, str] = {}
+        selecionadas = []
+        
+        for metrica in metricas:
+            tags = metrica.get('tags') or ()
+            texto_tags = textos_tags.get(id(tags))
+            if texto_tags is None:
+                texto_tags = textos_tags[id(tags)] = '\x1e'.join(tags)
+                
+            chave = hash64(
+                f"{metrica['metric']}\x1f{metrica.get('type')}\x1f{metrica.get('host')}\x1f"
+                f"{metrica.get('interval')}\x1f{texto_tags}\x1f{metrica.get('resources')}"
+            )
+            valor = hash64(repr([ponto[1] for ponto in metrica['points']]))
+            
+            anterior = estado.pop(chave, None)
+            estado[chave] = valor
+            
+            if self.refresh_completo or anterior != valor:
+                selecionadas.append(metrica)
+                
+        if self.refresh_completo:
+            self._ultimo_refresh = agora
+            
+        excedente = len(estado) - self.tamanho_maximo
+        if excedente > 0:
+            # Descartar as séries vistas há mais tempo
+            self._estado = dict(islice(estado.items(), excedente, None))
+            logger.info("Estado do modo delta: %s séries antigas descartadas", excedente)
+            
+        self.series_inalteradas = len(metricas) - len(selecionadas)
+        logger.info(
+            "Modo delta: %s de %s séries a enviar "
+            "(reenvio completo: %s)",
+            len(selecionadas), len(metricas), self.refresh_completo
+        )
+        return selecionadas
+    
+    def salvar(self) -> None:
+        """Persiste o estado atual no armazenamento."""
+        chaves = array('Q', self._estado.keys())
+        valores = array('Q', self._estado.values())
+        cabecalho = _CABECALHO.pack(_IDENTIFICADOR, VERSAO_ESTADO, self._ultimo_refresh, len(chaves))
+        
+        # Formato binário fixo em little-endian
+        if sys.byteorder == 'big':
+            chaves.byteswap()
+            valores.byteswap()
+            
+        self.armazenamento.gravar(self.nome_estado, cabecalho + chaves.tobytes() + valores.tobytes())
+        logger.info("Estado do modo delta salvo: %s séries", len(self._estado))
+    
+    def _carregar(self) -> None:
+        """Carrega o estado persistido; estados ausentes ou inválidos são ignorados."""
+        try:
+            dados = self.armazenamento.ler(self.nome_estado)
+        except Exception as e:
+            logger.warning("Erro ao ler estado do modo delta: %s", e)
+            return
+        
+        if not dados or len(dados) < _CABECALHO.size:
+            return
+        
+        identificador, versao, ultimo_refresh, total = _CABECALHO.unpack_from(dados)
+        if identificador != _IDENTIFICADOR or versao != VERSAO_ESTADO:
+            logger.warning("Estado do modo delta em formato desconhecido, ignorado")
+            return
+        
+        inicio = _CABECALHO.size
+        tamanho = total * 8
+        if len(dados) != inicio + 2 * tamanho:
+            logger.warning("Estado do modo delta truncado, ignorado")
+            return
+        
+        chaves = array('Q')
+        chaves.frombytes(dados[inicio:inicio + tamanho])
+        valores = array('Q')
+        valores.frombytes(dados[inicio + tamanho:])
+        if sys.byteorder == 'big':
+            chaves.byteswap()
+            valores.byteswap()
+            
+        self._estado = dict(zip(chaves, valores))
+        self._ultimo_refresh = ultimo_refresh
+        logger.info("Estado do modo delta carregado: %s séries", total)
@@ -0,0 +1,197 @@
+"""
+Serviço de idempotência do envio de lotes.
+Registra os lotes já aceitos pelo Datadog em uma invocação, para que as
+retentativas automáticas da Lambda (mesmo aws_request_id) não os reenviem.
+O estado é gravado em segmentos (um arquivo por gravação, só com os lotes
+novos), lidos em sequência na retentativa.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from ..utils.logger import configurar_logger
+
+logger = configurar_logger(__name__)
+
+
+# Prefixo dos arquivos de estado (segmentos de cada invocação)
+PREFIXO_ESTADO = 'idempotencia-'
+
+# Segundos sem gravar antes de gravar os lotes pendentes, mesmo abaixo do intervalo
+INTERVALO_MAXIMO_GRAVACAO = 2.0
+
+# Segundos entre duas limpezas de estados expirados no mesmo container
+INTERVALO_LIMPEZA = 3600
+
+# Instante da última limpeza (o container é reutilizado entre invocações)
+_ULTIMA_LIMPEZA: Dict[str, float] = {}
+
+
+class IdempotenciaService:
+    """Serviço para evitar o reenvio de lotes já aceitos."""
+    
+    def __init__(self, armazenamento: Any, escopo: str, ttl: int, lotes_por_gravacao: int = 20):
+        """
+        Inicializa o serviço, descarta estados expirados (no máximo uma vez
+        a cada INTERVALO_LIMPEZA por container) e carrega os lotes já
+        registrados para a invocação.
+        
+        Args:
+            armazenamento: Armazenamento do estado (ler/gravar/remover_expirados)
+            escopo: Identificação da invocação (aws_request_id, mantido nas retentativas)
+            ttl: Segundos que o estado de uma invocação é mantido
+            lotes_por_gravacao: Lotes registrados acumulados antes de gravar um segmento
+        """
+        self.armazenamento = armazenamento
+        self.escopo = escopo
+        self.ttl = ttl
+        self.lotes_por_gravacao = max(1, lotes_por_gravacao)
+        self.prefixo_estado = (
+            f"{PREFIXO_ESTADO}{hashlib.sha256(escopo.encode('utf-8')).hexdigest()[:32]}"
+        )
+        self._lotes: Set[str] = set()
+        self._pendentes: List[str] = []
+        self._segmentos = 0
+        self._ultima_gravacao = time.monotonic()
+        # Lotes de vários destinos são registrados em paralelo
+        self._trava = threading.Lock()
+        
+        self._remover_expirados()
+        self._carregar()
+    
+    @staticmethod
+    def gerar_chave(lote: List[Dict[str, Any]], ocorrencias: Optional[Dict[str, int]] = None) -> str:
+        """
+        Gera a chave determinística de um lote.
+        Os timestamps dos pontos são ignorados, pois são gerados a cada execução.
+        Lotes de mesmo conteúdo na mesma fila de envio recebem chaves distintas
+        pela ordem de ocorrência, para que só a retentativa de cada um seja ignorada.
+        
+        Args:
+            lote: Métricas do lote
+            ocorrencias: Ocorrências de cada conteúdo já vistas na fila (atualizado)
+            
+        Returns:
+            Chave hexadecimal do lote
+        """
+        conteudo = json.dumps(
+            [
+                [
+                    metrica.get('metric'),
+                    metrica.get('type'),
+                    metrica.get('tags'),
+                    metrica.get('host'),
+                    metrica.get('interval'),
+                    metrica.get('resources'),
+                    [ponto[1] for ponto in metrica.get('points', ())]
+                ]
+                for metrica in lote
+            ],
+            separators=(',', ':'),
+            default=str
+        )
+        chave = hashlib.blake2b(conteudo.encode('utf-8'), digest_size=16).hexdigest()
+        if ocorrencias is None:
+            return chave
+        
+        ocorrencias[chave] = ocorrencias.get(chave, 0) + 1
+        return f"{chave}-{ocorrencias[chave]}"
+    
+    def ja_enviado(self, chave: str, destino: str) -> bool:
+        """
+        Verifica se o lote já foi aceito pelo destino em uma tentativa anterior.
+        
+        Args:
+            chave: Chave gerada por gerar_chave
+            destino: Nome do destino do Datadog
+            
+        Returns:
+            True se o lote deve ser ignorado
+        """
+        with self._trava:
+            return f"{destino}:{chave}" in self._lotes
+    
+    def registrar(self, chave: str, destino: str) -> None:
+        """
+        Registra um lote aceito pelo destino. Os registros são gravados a cada
+        lotes_por_gravacao lotes ou INTERVALO_MAXIMO_GRAVACAO segundos; um
+        timeout antes da gravação só faz a retentativa reenviar esses lotes.
+        
+        Args:
+            chave: Chave gerada por gerar_chave
+            destino: Nome do destino do Datadog
+        """
+        with self._trava:
+            registro = f"{destino}:{chave}"
+            self._lotes.add(registro)
+            self._pendentes.append(registro)
+            if (
+                len(self._pendentes) >= self.lotes_por_gravacao
+                or time.monotonic() - self._ultima_gravacao >= INTERVALO_MAXIMO_GRAVACAO
+            ):
+                self._gravar_pendentes()
+    
+    def persistir(self) -> None:
+        """Grava os lotes registrados ainda não gravados (fim do envio)."""
+        with self._trava:
+            self._gravar_pendentes()
+    
+    def _nome_segmento(self, numero: int) -> str:
+        """Nome do arquivo do segmento de estado."""
+        return f"{self.prefixo_estado}-{numero}.json"
+    
+    def _gravar_pendentes(self) -> None:
+        """Grava os registros pendentes em um novo segmento (chamado com a trava)."""
+        if not self._pendentes:
+            return
+        
+        try:
+            self.armazenamento.gravar(
+                self._nome_segmento(self._segmentos), json.dumps(self._pendentes).encode('utf-8')
+            )
+        except Exception as e:
+            # Mantém os pendentes para a próxima gravação
+            logger.warning("Erro ao gravar estado de idempotência: %s", e)
+            return
+        
+        self._segmentos += 1
+        self._pendentes = []
+        self._ultima_gravacao = time.monotonic()
+    
+    def _carregar(self) -> None:
+        """Carrega os lotes já registrados para a invocação, segmento a segmento."""
+        try:
+            while True:
+                dados = self.armazenamento.ler(self._nome_segmento(self._segmentos))
+                if dados is None:
+                    break
+                self._lotes.update(json.loads(dados))
+                self._segmentos += 1
+        except Exception as e:
+            logger.warning("Erro ao ler estado de idempotência: %s", e)
+            return
+        
+        if self._lotes:
+            logger.info(
+                "Retentativa da invocação %s: %s lotes já aceitos", self.escopo, len(self._lotes)
+            )
+    
+    def _remover_expirados(self) -> None:
+        """Remove os estados de invocações mais antigos que o TTL."""
+        ultima = _ULTIMA_LIMPEZA.get('instante')
+        agora = time.monotonic()
+        if ultima is not None and agora - ultima < INTERVALO_LIMPEZA:
+            return
+        _ULTIMA_LIMPEZA['instante'] = agora
+        
+        try:
+            removidos = self.armazenamento.remover_expirados(PREFIXO_ESTADO, self.ttl)
+        except Exception as e:
+            logger.warning("Erro ao remover estados de idempotência expirados: %s", e)
+            return
+        
+        if removidos:
+            logger.info("%s estados de idempotência expirados removidos", removidos)
@@ -0,0 +1,212 @@
+"""
+Serviço de ingestão do CSV de múltiplas métricas (formato longo).
+Converte as colunas nome_metrica, valor, timestamp, tags, tipo, host,
+intervalo e resources_* diretamente em séries do Datadog, sem templates.
+"""
+
+import time
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..config.constants import (
+    TIPOS_METRICA,
+    obter_configuracao,
+    construir_nome_metrica
+)
+from ..models.tabela_colunar import TabelaColunar
+from ..utils.logger import TotalizadorErros, configurar_logger
+
+logger = configurar_logger(__name__)
+
+
+# Colunas obrigatórias do formato de múltiplas métricas
+COLUNAS_OBRIGATORIAS = ('nome_metrica', 'valor')
+
+# Todas as colunas lidas pelo formato (projeção na leitura do CSV)
+COLUNAS_FORMATO = COLUNAS_OBRIGATORIAS + (
+    'timestamp', 'tags', 'tipo', 'host', 'intervalo', 'resources_name', 'resources_type'
+)
+
+
+class MultiplasMetricasService:
+    """Serviço para gerar métricas a partir do CSV de múltiplas métricas."""
+    
+    def __init__(self, tipo_metrica: str = 'custom'):
+        """
+        Inicializa o serviço, pré-calculando as tabelas de conversão.
+        
+        Args:
+            tipo_metrica: Tipo da métrica (define prefixo, tags e tipo padrão)
+            
+        Raises:
+            ValueError: Se o tipo de métrica não for suportado
+        """
+        self.tipo_metrica = tipo_metrica.lower()
+        self.configuracao = obter_configuracao(self.tipo_metrica)
+        
+        # Nome curto (ou completo) -> nome completo com prefixo
+        self._mapa_nomes: Dict[str, str] = {}
+        self._prefixo = f"{self.configuracao.prefixo}."
+        
+        # Valor da coluna 'tipo' (nome ou código) -> código numérico do Datadog
+        self._tipo_padrao = TIPOS_METRICA[self.configuracao.tipo_padrao]
+        self._mapa_tipos: Dict[Any, int] = dict(TIPOS_METRICA)
+        self._mapa_tipos.update({codigo: codigo for codigo in TIPOS_METRICA.values()})
+        
+        # Texto da coluna 'tags' -> lista de tags (compartilhada entre séries)
+        self._mapa_tags: Dict[Any, List[str]] = {}
+    
+    def processar(self, tabela: TabelaColunar) -> List[Dict[str, Any]]:
+        """
+        Gera métricas do Datadog a partir da tabela do CSV.
+        
+        Args:
+            tabela: Tabela colunar do CSV de múltiplas métricas
+            
+        Returns:
+            Lista de métricas no formato do Datadog
+            
+        Raises:
+            ValueError: Se o CSV não tiver as colunas obrigatórias
+        """
+        ausentes = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in tabela.colunas]
+        if ausentes:
+            raise ValueError(
+                f"CSV deve conter as colunas: {', '.join(COLUNAS_OBRIGATORIAS)}"
+            )
+        
+        total_linhas = len(tabela)
+        timestamp_atual = int(time.time())
+        
+        logger.info(
+            "Processando %s linhas no formato de múltiplas métricas "
+            "(tipo '%s')",
+            total_linhas, self.tipo_metrica
+        )
+        
+        def coluna(nome: str) -> Iterable[Any]:
+            # Colunas opcionais ausentes equivalem a valores vazios
+            if nome in tabela.colunas:
+                return tabela.coluna(nome)
+            return repeat(None, total_linhas)
+        
+        metricas = []
+        # Linhas inválidas são resumidas em um warning por erro, não um por linha
+        erros = TotalizadorErros()
+        # Valores de 'tipo' desconhecidos (a série segue com o tipo padrão)
+        tipos_desconhecidos = TotalizadorErros()
+        
+        linhas = zip(
+            coluna('nome_metrica'),
+            coluna('valor'),
+            coluna('timestamp'),
+            coluna('tags'),
+            coluna('tipo'),
+            coluna('host'),
+            coluna('intervalo'),
+            coluna('resources_name'),
+            coluna('resources_type')
+        )
+        
+        for idx, (nome, valor, ts, tags, tipo, host, intervalo, recurso, tipo_recurso) in enumerate(linhas, start=1):
+            try:
+                if not nome:
+                    raise ValueError("nome_metrica vazio")
+                
+                metrica = {
+                    'metric': self._nome_completo(nome),
+                    'type': self._tipo(tipo, tipos_desconhecidos, idx) if tipo else self._tipo_padrao,
+                    'points': [[int(ts) if ts else timestamp_atual, float(valor)]],
+                    'tags': self._tags(tags)
+                }
+                
+                if host:
+                    metrica['host'] = str(host)
+                    
+                if intervalo:
+                    metrica['interval'] = int(intervalo)
+                    
+                if recurso:
+                    metrica['resources'] = [{
+                        'name': str(recurso),
+                        'type': str(tipo_recurso) if tipo_recurso else ''
+                    }]
+                    
+                metricas.append(metrica)
+                
+            except (TypeError, ValueError) as e:
+                erros.registrar(f"linhas com {type(e).__name__}", e, idx)
+                
+        erros.logar(logger, "CSV de múltiplas métricas")
+        tipos_desconhecidos.logar(logger, "CSV de múltiplas métricas")
+        logger.info("Geradas %s métricas (%s linhas descartadas)", len(metricas), erros.total)
+        return metricas
+    
+    def _nome_completo(self, nome: Any) -> str:
+        """
+        Retorna o nome completo da métrica, consultando a tabela pré-calculada.
+        Nomes que já começam com o prefixo do tipo são mantidos.
+        
+        Args:
+            nome: Nome curto ou completo da métrica
+            
+        Returns:
+            Nome completo da métrica
+        """
+        completo = self._mapa_nomes.get(nome)
+        if completo is None:
+            nome_texto = str(nome)
+            if nome_texto.startswith(self._prefixo):
+                completo = nome_texto
+            else:
+                completo = construir_nome_metrica(self.tipo_metrica, nome_texto)
+            self._mapa_nomes[nome] = completo
+        return completo
+    
+    def _tipo(self, tipo: Any, desconhecidos: TotalizadorErros, linha: int) -> int:
+        """
+        Retorna o código do Datadog para o valor da coluna 'tipo'.
+        Nomes são comparados sem espaços nas bordas e sem diferenciar maiúsculas;
+        valores desconhecidos usam o tipo padrão e são totalizados.
+        
+        Args:
+            tipo: Valor da coluna 'tipo' (ex: 'count', ' Gauge', 1)
+            desconhecidos: Totalizador dos valores desconhecidos
+            linha: Número da linha do CSV
+            
+        Returns:
+            Código numérico do tipo da métrica
+        """
+        codigo = self._mapa_tipos.get(tipo)
+        if codigo is None:
+            codigo = TIPOS_METRICA.get(str(tipo).strip().lower())
+            if codigo is None:
+                desconhecidos.registrar(
+                    f"tipo {tipo!r}",
+                    ValueError(
+                        f"tipo desconhecido, enviado como '{self.configuracao.tipo_padrao}' "
+                        f"(use {sorted(TIPOS_METRICA)})"
+                    ),
+                    linha
+                )
+                return self._tipo_padrao
+            self._mapa_tipos[tipo] = codigo
+        return codigo
+    
+    def _tags(self, tags: Optional[Any]) -> List[str]:
+        """
+        Retorna as tags padrão do tipo mais as tags da coluna (separadas por ';').
+        
+        Args:
+            tags: Texto da coluna 'tags'
+            
+        Returns:
+            Lista de tags (compartilhada entre séries; não alterar in-place)
+        """
+        lista = self._mapa_tags.get(tags)
+        if lista is None:
+            lista = list(self.configuracao.tags_padrao)
+            if tags:
+                lista.extend(tag.strip() for tag in str(tags).split(';') if tag.strip())
+            self._mapa_tags[tags] = lista
+        return lista
@@ -0,0 +1,185 @@
+"""
+Serviço de normalização de nomes de métricas, tags, hosts e resources.
+Aplica as mesmas regras que o Datadog aplicaria no servidor, para que o
+valor enviado seja o valor exibido (e não ocupe bytes a mais no payload).
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from ..config.constants import TAMANHO_CACHE_EXPRESSOES
+from ..utils.cache import CacheLRU
+from ..utils.logger import TotalizadorErros, configurar_logger
+
+logger = configurar_logger(__name__)
+
+
+# Tamanho máximo aceito pelo Datadog para nomes de métricas e tags
+TAMANHO_MAXIMO_NOME = 200
+TAMANHO_MAXIMO_HOST = 255
+
+# Nomes de métricas: apenas letras e dígitos ASCII, '_' e '.'
+_INVALIDOS_METRICA = re.compile(r'[^A-Za-z0-9_.]+')
+_INICIO_METRICA = re.compile(r'^[^A-Za-z]+')
+# Tags: letras e dígitos (Unicode), '_', '-', ':', '.' e '/'
+_INVALIDOS_TAG = re.compile(r'[^\w\-:./]+')
+# Hosts e nomes de resources: sem espaços
+_ESPACOS = re.compile(r'\s+')
+_SUBLINHADOS = re.compile(r'_{2,}')
+_SUBLINHADO_PONTO = re.compile(r'_?\._?')
+
+
+class NormalizacaoService:
+    """Serviço para normalizar os campos textuais das métricas geradas."""
+    
+    def __init__(self, tamanho_cache: int = TAMANHO_CACHE_EXPRESSOES):
+        """
+        Inicializa o serviço.
+        
+        Args:
+            tamanho_cache: Limite de entradas de cada cache de valores normalizados
+        """
+        # Valores repetem muito entre linhas: cada texto é normalizado uma vez
+        self._cache_metricas = CacheLRU(tamanho_cache)
+        self._cache_tags = CacheLRU(tamanho_cache)
+        self._cache_hosts = CacheLRU(tamanho_cache)
+        self.valores_alterados = 0
+        self.series_descartadas = 0
+    
+    def aplicar(self, metricas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Normaliza metric, tags, host e o nome dos resources de cada métrica.
+        Listas de tags compartilhadas entre métricas não são alteradas: uma nova
+        lista (também compartilhada) é criada apenas quando alguma tag muda.
+        Séries cujo nome não tem nenhum caractere válido (ex: '123') são descartadas.
+        
+        Args:
+            metricas: Métricas geradas (alteradas in-place)
+            
+        Returns:
+            As métricas normalizadas, sem as séries descartadas
+        """
+        # Listas de tags compartilhadas -> lista normalizada (normalizada uma única vez)
+        listas: Dict[int, List[str]] = {}
+        alterados = 0
+        resultado = []
+        erros = TotalizadorErros()
+        
+        for metrica in metricas:
+            nome = self.normalizar_metrica(metrica['metric'])
+            if not nome:
+                erros.registrar(
+                    f"nome de métrica {metrica['metric']!r}",
+                    ValueError('nenhum caractere válido após a normalização')
+                )
+                continue
+            if nome != metrica['metric']:
+                metrica['metric'] = nome
+                alterados += 1
+                
+            tags = metrica.get('tags')
+            if tags:
+                normalizadas = listas.get(id(tags))
+                if normalizadas is None:
+                    normalizadas = listas[id(tags)] = self._normalizar_lista_tags(tags)
+                if normalizadas is not tags:
+                    metrica['tags'] = normalizadas
+                    alterados += 1
+                    
+            host = metrica.get('host')
+            if host:
+                normalizado = self.normalizar_host(host)
+                if normalizado != host:
+                    metrica['host'] = normalizado
+                    alterados += 1
+                    
+            resources = metrica.get('resources')
+            if resources:
+                nomes = [self.normalizar_host(resource['name']) for resource in resources]
+                if any(nome != resource['name'] for nome, resource in zip(nomes, resources)):
+                    metrica['resources'] = [
+                        dict(resource, name=nome) for nome, resource in zip(nomes, resources)
+                    ]
+                    alterados += 1
+                    
+            resultado.append(metrica)
+            
+        self.valores_alterados += alterados
+        self.series_descartadas += erros.total
+        if alterados:
+            logger.info("Normalização alterou %s campos de %s métricas", alterados, len(metricas))
+        erros.logar(logger, 'Normalização (séries descartadas)')
+            
+        return resultado
+    
+    def normalizar_metrica(self, nome: str) -> str:
+        """
+        Normaliza um nome de métrica: caracteres inválidos viram '_', o nome
+        começa com uma letra e tem no máximo 200 caracteres.
+        
+        Args:
+            nome: Nome da métrica
+            
+        Returns:
+            Nome normalizado
+        """
+        normalizado = self._cache_metricas.obter(nome)
+        if normalizado is None:
+            normalizado = _INVALIDOS_METRICA.sub('_', str(nome))
+            normalizado = _SUBLINHADOS.sub('_', normalizado)
+            normalizado = _SUBLINHADO_PONTO.sub('.', normalizado)
+            normalizado = _INICIO_METRICA.sub('', normalizado)[:TAMANHO_MAXIMO_NOME].rstrip('_')
+            self._cache_metricas.definir(nome, normalizado)
+        return normalizado
+    
+    def normalizar_tag(self, tag: str) -> Optional[str]:
+        """
+        Normaliza uma tag: minúsculas, caracteres inválidos viram '_', começa
+        com uma letra e tem no máximo 200 caracteres.
+        
+        Args:
+            tag: Tag no formato 'chave:valor' ou 'valor'
+            
+        Returns:
+            Tag normalizada, ou None se não sobrar nenhum caractere válido
+        """
+        normalizada = self._cache_tags.obter(tag)
+        if normalizada is None:
+            texto = _SUBLINHADOS.sub('_', _INVALIDOS_TAG.sub('_', tag.lower()))
+            # Descartar o que vier antes da primeira letra
+            inicio = next((idx for idx, caractere in enumerate(texto) if caractere.isalpha()), len(texto))
+            normalizada = texto[inicio:][:TAMANHO_MAXIMO_NOME].rstrip('_')
+            self._cache_tags.definir(tag, normalizada)
+        return normalizada or None
+    
+    def normalizar_host(self, host: str) -> str:
+        """
+        Normaliza um host ou nome de resource: sem espaços, em minúsculas e
+        com no máximo 255 caracteres.
+        
+        Args:
+            host: Nome do host
+            
+        Returns:
+            Host normalizado
+        """
+        normalizado = self._cache_hosts.obter(host)
+        if normalizado is None:
+            normalizado = _ESPACOS.sub('-', str(host).strip()).lower()[:TAMANHO_MAXIMO_HOST]
+            self._cache_hosts.definir(host, normalizado)
+        return normalizado
+    
+    def _normalizar_lista_tags(self, tags: List[str]) -> List[str]:
+        """
+        Normaliza uma lista de tags.
+        
+        Args:
+            tags: Tags da métrica (não são alteradas)
+            
+        Returns:
+            A própria lista se nenhuma tag mudou, ou uma nova lista
+        """
+        normalizadas = [self.normalizar_tag(tag) for tag in tags]
+        if all(normalizada == tag for normalizada, tag in zip(normalizadas, tags)):
+            return tags
+        return [normalizada for normalizada in normalizadas if normalizada]
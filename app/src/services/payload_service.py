@@ -3,211 +3,605 @@ Serviço de processamento de templates de payload.
 Avalia templates dinâmicos do EventBridge e gera métricas do Datadog.
 """
 
+import sys
 import time
-from typing import List, Dict, Any, Optional
-from ..utils.logger import configurar_logger
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Set, Tuple
+from ..config.constants import TAMANHO_CACHE_EXPRESSOES
+from ..models.tabela_colunar import TabelaColunar
+from ..utils.cache import CacheLRU
+from ..utils.expressoes import ExpressaoCompilada, ObterColuna, compilar_expressao, criar_contexto
+from ..utils.logger import TotalizadorErros, configurar_logger
+from ..utils.telemetria import TELEMETRIA_DESATIVADA, Telemetria
 
 logger = configurar_logger(__name__)
 
+# Marcador de ausência no cache (None é um resultado válido)
+_AUSENTE = object()
+
+# Linhas avaliadas antes de decidir se a memoização compensa
+AMOSTRA_MEMOIZACAO = 1024
+
+
+class _FalhaMemoizada:
+    """Resultado memoizado de uma avaliação que falhou (o erro é repetido a cada uso)."""
+    
+    __slots__ = ('valor', 'chave', 'erro')
+    
+    def __init__(self, valor: Any, chave: str, erro: Exception):
+        self.valor = valor
+        self.chave = chave
+        self.erro = erro
+
+
+class TemplateCompilado:
+    """Template de payload com todas as expressões compiladas."""
+    
+    def __init__(self, indice: int):
+        """
+        Inicializa um template compilado vazio.
+        
+        Args:
+            indice: Índice do template (para logging)
+        """
+        self.indice = indice
+        self.metric: Optional[ExpressaoCompilada] = None
+        self.type: Optional[ExpressaoCompilada] = None
+        self.points: List[Tuple[ExpressaoCompilada, ExpressaoCompilada]] = []
+        self.tags: Optional[List[ExpressaoCompilada]] = None
+        self.host: Optional[ExpressaoCompilada] = None
+        self.interval: Optional[ExpressaoCompilada] = None
+        self.resources: Optional[List[Tuple[ExpressaoCompilada, ExpressaoCompilada]]] = None
+    
+    def expressoes(self) -> Iterator[ExpressaoCompilada]:
+        """Percorre todas as expressões do template."""
+        for expressao in (self.metric, self.type, self.host, self.interval):
+            if expressao is not None:
+                yield expressao
+        for timestamp, valor in self.points:
+            yield timestamp
+            yield valor
+        for tag in self.tags or ():
+            yield tag
+        for nome, tipo in self.resources or ():
+            yield nome
+            yield tipo
+
 
 class PayloadService:
     """Serviço para processar templates de payload e gerar métricas."""
     
-    def __init__(self):
-        """Inicializa o serviço de processamento de payloads."""
-        pass
+    def __init__(
+        self,
+        tamanho_cache: int = TAMANHO_CACHE_EXPRESSOES,
+        telemetria: Optional[Telemetria] = None
+    ):
+        """
+        Inicializa o serviço de processamento de payloads.
+        
+        Args:
+            tamanho_cache: Limite de entradas dos caches de tags/resources
+            telemetria: Registro de tempos e contadores da invocação
+        """
+        self.telemetria = telemetria or TELEMETRIA_DESATIVADA
+        # Resultados de expressões por (expressão, valores das colunas lidas)
+        self._cache_expressoes = CacheLRU(tamanho_cache)
+        # Listas de tags já geradas, compartilhadas entre métricas iguais
+        self._cache_tags = CacheLRU(tamanho_cache)
+        # Erros de avaliação agregados por template (acumulados entre chamadas)
+        self.erros_templates: List[Dict[str, Any]] = []
+        # Erros de avaliação da expressão de roteamento (acumulados entre chamadas)
+        self.erros_roteamento: List[Dict[str, Any]] = []
     
     def processar_templates(
-        self, 
-        linhas_csv: List[Dict[str, Any]], 
+        self,
+        linhas_csv: Sequence[Dict[str, Any]],
         templates_payload: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """
         Processa templates de payload para cada linha do CSV.
+        Expressões simples são avaliadas sobre colunas inteiras; as demais
+        são avaliadas linha a linha. Tags e resources são memoizados pelos
+        valores das colunas que leem, e listas de tags iguais são
+        compartilhadas entre métricas (não devem ser alteradas in-place).
         
         Args:
-            linhas_csv: Lista de dicionários com dados do CSV
+            linhas_csv: Tabela colunar (ou lista de dicionários) com dados do CSV
             templates_payload: Lista de templates de payload do EventBridge
-            
+        
         Returns:
             Lista de métricas no formato do Datadog
         """
         metricas = []
         timestamp_atual = int(time.time())
+        total_linhas = len(linhas_csv)
         
         logger.info(
-            f"Processando {len(linhas_csv)} linhas com {len(templates_payload)} template(s)"
+            "Processando %s linhas com %s template(s)", total_linhas, len(templates_payload)
         )
         
-        for idx, linha in enumerate(linhas_csv, start=1):
-            try:
-                # Processar cada template para esta linha
-                for template_idx, template in enumerate(templates_payload, start=1):
-                    metrica = self._processar_template(
-                        linha, 
-                        template, 
-                        timestamp_atual,
-                        idx,
-                        template_idx
-                    )
-                    if metrica:
-                        metricas.append(metrica)
-                        
-            except Exception as e:
-                logger.warning(
-                    f"Erro ao processar linha {idx} com templates: {e}. Linha: {linha}"
-                )
+        obter_coluna = self._criar_obter_coluna(linhas_csv)
+        
+        # Avaliar cada template sobre todas as linhas
+        resultados = []
+        for template_idx, template in enumerate(templates_payload, start=1):
+            compilado = self.compilar_template(template, template_idx)
+            if compilado is None:
+                self.telemetria.incrementar('templates.invalidos')
                 continue
+            
+            # Tempo por template, para encontrar o template mais caro
+            with self.telemetria.cronometro(f"templates.template_{template_idx}"):
+                resultados.append(
+                    self._processar_template(compilado, linhas_csv, obter_coluna, timestamp_atual)
+                )
+        
+        # Manter a ordem original: para cada linha, uma métrica por template
+        for idx in range(total_linhas):
+            for resultado in resultados:
+                metrica = resultado[idx]
+                if metrica:
+                    metricas.append(metrica)
         
-        logger.info(f"Geradas {len(metricas)} métricas dos templates")
+        logger.info("Geradas %s métricas dos templates", len(metricas))
         return metricas
     
-    def _processar_template(
+    def avaliar_expressao(
         self,
-        linha: Dict[str, Any],
-        template: Dict[str, Any],
-        timestamp_atual: int,
-        linha_idx: int,
-        template_idx: int
-    ) -> Optional[Dict[str, Any]]:
+        campo: Any,
+        linhas_csv: Sequence[Dict[str, Any]]
+    ) -> Sequence[Any]:
         """
-        Processa um template de payload para uma linha específica.
+        Avalia a expressão de roteamento para todas as linhas.
+        Os erros por linha são totalizados, logados uma vez e guardados em
+        erros_roteamento; nessas linhas o valor é o próprio texto da expressão.
         
         Args:
-            linha: Dicionário com dados da linha do CSV
-            template: Template de payload do EventBridge
-            timestamp_atual: Timestamp Unix atual
-            linha_idx: Índice da linha (para logging)
-            template_idx: Índice do template (para logging)
+            campo: Expressão no mesmo formato dos campos dos templates
+            linhas_csv: Tabela colunar (ou lista de dicionários) com dados do CSV
             
         Returns:
-            Métrica no formato do Datadog ou None se inválida
-        """
-        try:
-            # Criar contexto seguro para avaliação
-            contexto = {
-                'linha': linha,
-                'timestamp': timestamp_atual,
-                'int': int,
-                'float': float,
-                'str': str,
-                'len': len,
-            }
+            Sequência com um valor por linha
             
-            # Processar cada campo do template
-            metrica = {}
-            
-            # Metric name (obrigatório)
-            if 'metric' not in template:
-                logger.warning(f"Template {template_idx} sem campo 'metric'")
-                return None
-            
-            metrica['metric'] = self._avaliar_campo(template['metric'], contexto)
+        Raises:
+            ValueError: Se a expressão gerar erro em todas as linhas
+        """
+        expressao = compilar_expressao(campo)
+        erros = TotalizadorErros()
+        valores = self._avaliar_coluna(
+            expressao,
+            linhas_csv,
+            self._criar_obter_coluna(linhas_csv),
+            int(time.time()),
+            erros
+        )
+        
+        if erros.erros:
+            erros.logar(logger, "Roteamento")
+            self.telemetria.incrementar('roteamento.erros', erros.total)
+            self.erros_roteamento.extend(erros.resumo())
             
-            # Type (obrigatório)
-            if 'type' not in template:
-                logger.warning(f"Template {template_idx} sem campo 'type'")
-                return None
+            # Sem isso, todas as linhas cairiam silenciosamente no destino padrão
+            if erros.total >= len(linhas_csv):
+                _, _, erro = next(iter(erros.erros.values()))
+                raise ValueError(
+                    f"Expressão de roteamento '{expressao.fonte}' gerou erro em todas as "
+                    f"{len(linhas_csv)} linhas (primeiro: {erro})"
+                )
+                
+        return valores
+    
+    def colunas_referenciadas(
+        self,
+        templates_payload: List[Dict[str, Any]]
+    ) -> Optional[Set[str]]:
+        """
+        Levanta as colunas do CSV lidas pelos templates, para projeção na leitura.
+        
+        Args:
+            templates_payload: Lista de templates de payload do EventBridge
             
-            metrica['type'] = self._avaliar_campo(template['type'], contexto)
+        Returns:
+            Conjunto de colunas ou None se alguma expressão usar a linha
+            de forma não analisável (nesse caso todas as colunas são lidas)
+        """
+        colunas: Set[str] = set()
+        for template_idx, template in enumerate(templates_payload, start=1):
+            compilado = self.compilar_template(template, template_idx)
+            if compilado is None:
+                continue
             
-            # Points (obrigatório) - formato: [[timestamp, value]]
-            if 'points' not in template:
-                logger.warning(f"Template {template_idx} sem campo 'points'")
-                return None
+            for expressao in compilado.expressoes():
+                if expressao.colunas is None:
+                    return None
+                colunas.update(expressao.colunas)
+                
+        return colunas
+    
+    def compilar_template(
+        self,
+        template: Dict[str, Any],
+        template_idx: int,
+        problemas: Optional[List[str]] = None
+    ) -> Optional[TemplateCompilado]:
+        """
+        Compila as expressões de um template de payload.
+        
+        Args:
+            template: Template de payload do EventBridge
+            template_idx: Índice do template (para logging)
+            problemas: Se informada, recebe o motivo de o template ser inválido
+        
+        Returns:
+            Template compilado ou None se inválido
+        """
+        def invalido(motivo: str) -> None:
+            logger.warning("Template %s %s", template_idx, motivo)
+            if problemas is not None:
+                problemas.append(f"Template {template_idx} {motivo}")
+            return None
+        
+        if not isinstance(template, dict):
+            return invalido("não é um objeto")
+        
+        compilado = TemplateCompilado(template_idx)
+        
+        # Metric name (obrigatório)
+        if 'metric' not in template:
+            return invalido("sem campo 'metric'")
+        
+        compilado.metric = compilar_expressao(template['metric'])
+        
+        # Type (obrigatório)
+        if 'type' not in template:
+            return invalido("sem campo 'type'")
+        
+        compilado.type = compilar_expressao(template['type'])
+        
+        # Points (obrigatório) - formato: [[timestamp, value]]
+        if 'points' not in template:
+            return invalido("sem campo 'points'")
+        
+        points_template = template['points']
+        if not isinstance(points_template, list) or len(points_template) == 0:
+            return invalido("com formato de 'points' inválido")
+        
+        for point in points_template:
+            if isinstance(point, dict):
+                # Formato: {"timestamp": ..., "value": ...}
+                compilado.points.append((
+                    compilar_expressao(point.get('timestamp', 'timestamp')),
+                    compilar_expressao(point.get('value'))
+                ))
+            elif isinstance(point, list) and len(point) == 2:
+                # Formato: [timestamp, value]
+                compilado.points.append((
+                    compilar_expressao(point[0]),
+                    compilar_expressao(point[1])
+                ))
+        
+        # Tags (opcional)
+        if isinstance(template.get('tags'), list):
+            compilado.tags = [compilar_expressao(tag) for tag in template['tags']]
+        
+        # Host (opcional)
+        if 'host' in template:
+            compilado.host = compilar_expressao(template['host'])
+        
+        # Interval (opcional)
+        if 'interval' in template:
+            compilado.interval = compilar_expressao(template['interval'])
+        
+        # Resources (opcional)
+        if isinstance(template.get('resources'), list):
+            compilado.resources = [
+                (
+                    compilar_expressao(resource.get('name', '')),
+                    compilar_expressao(resource.get('type', ''))
+                )
+                for resource in template['resources']
+                if isinstance(resource, dict)
+            ]
+        
+        return compilado
+    
+    def _processar_template(
+        self,
+        template: TemplateCompilado,
+        linhas_csv: Sequence[Dict[str, Any]],
+        obter_coluna: ObterColuna,
+        timestamp_atual: int
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Processa um template compilado para todas as linhas.
+        
+        Args:
+            template: Template compilado
+            linhas_csv: Linhas do CSV
+            obter_coluna: Função que retorna os valores de uma coluna
+            timestamp_atual: Timestamp Unix atual
+        
+        Returns:
+            Lista com a métrica de cada linha (None se inválida)
+        """
+        # Erros por linha são totalizados e logados uma vez por template
+        erros = TotalizadorErros()
+        
+        def avaliar(expressao: ExpressaoCompilada) -> Sequence[Any]:
+            return self._avaliar_coluna(expressao, linhas_csv, obter_coluna, timestamp_atual, erros)
+        
+        def avaliar_memoizado(expressao: ExpressaoCompilada) -> Sequence[Any]:
+            return self._avaliar_coluna_memoizada(
+                expressao, linhas_csv, obter_coluna, timestamp_atual, erros
+            )
+        
+        nomes = avaliar(template.metric)
+        tipos = avaliar(template.type)
+        pontos = [(avaliar(ts), avaliar(val)) for ts, val in template.points]
+        tags = (
+            [avaliar_memoizado(tag) for tag in template.tags]
+            if template.tags is not None else None
+        )
+        hosts = avaliar(template.host) if template.host is not None else None
+        intervalos = avaliar(template.interval) if template.interval is not None else None
+        resources = (
+            [(avaliar_memoizado(nome), avaliar_memoizado(tipo)) for nome, tipo in template.resources]
+            if template.resources is not None else None
+        )
+        
+        # Listas de tags só são compartilhadas se a amostra mostrar repetição
+        internar_tags = True
+        falhas_tags = 0
+        
+        resultado: List[Optional[Dict[str, Any]]] = []
+        for idx in range(len(linhas_csv)):
+            try:
+                metrica = {
+                    'metric': nomes[idx],
+                    'type': tipos[idx],
+                    'points': [[int(ts[idx]), float(val[idx])] for ts, val in pontos]
+                }
+                
+                if tags is not None:
+                    tags_linha = [str(tag[idx]) for tag in tags if tag[idx]]
+                    if internar_tags:
+                        tags_linha, nova = self._internar_tags(tags_linha)
+                        falhas_tags += nova
+                        if idx + 1 == AMOSTRA_MEMOIZACAO and falhas_tags > AMOSTRA_MEMOIZACAO // 2:
+                            internar_tags = False
+                    metrica['tags'] = tags_linha
+                
+                if hosts is not None and hosts[idx]:
+                    metrica['host'] = str(hosts[idx])
+                
+                if intervalos is not None and intervalos[idx]:
+                    metrica['interval'] = int(intervalos[idx])
+                
+                if resources:
+                    metrica['resources'] = [
+                        {'name': str(nome[idx]), 'type': str(tipo[idx])}
+                        for nome, tipo in resources
+                    ]
+                
+                resultado.append(metrica)
             
-            points_template = template['points']
-            if isinstance(points_template, list) and len(points_template) > 0:
-                # Avaliar cada ponto
-                points = []
-                for point in points_template:
-                    if isinstance(point, dict):
-                        # Formato: {"timestamp": ..., "value": ...}
-                        ts = self._avaliar_campo(point.get('timestamp', timestamp_atual), contexto)
-                        val = self._avaliar_campo(point.get('value'), contexto)
-                        points.append([int(ts), float(val)])
-                    elif isinstance(point, list) and len(point) == 2:
-                        # Formato: [timestamp, value]
-                        ts = self._avaliar_campo(point[0], contexto)
-                        val = self._avaliar_campo(point[1], contexto)
-                        points.append([int(ts), float(val)])
+            except Exception as e:
+                erros.registrar('montagem da métrica', e, idx + 1)
+                resultado.append(None)
                 
-                metrica['points'] = points
+        if erros.erros:
+            erros.logar(logger, f"Template {template.indice}")
+            self.telemetria.incrementar('templates.erros', erros.total)
+            self.erros_templates.extend({'template': template.indice, **erro} for erro in erros.resumo())
+        
+        return resultado
+    
+    def _avaliar_coluna(
+        self,
+        expressao: ExpressaoCompilada,
+        linhas_csv: Sequence[Dict[str, Any]],
+        obter_coluna: ObterColuna,
+        timestamp_atual: int,
+        erros: Optional[TotalizadorErros] = None
+    ) -> Sequence[Any]:
+        """
+        Avalia uma expressão para todas as linhas.
+        Tenta a avaliação vetorizada e, se não for possível, avalia linha a linha.
+        
+        Args:
+            expressao: Expressão compilada
+            linhas_csv: Linhas do CSV
+            obter_coluna: Função que retorna os valores de uma coluna
+            timestamp_atual: Timestamp Unix atual
+            erros: Totalizador dos erros de avaliação (sem ele, cada erro é logado)
+        
+        Returns:
+            Sequência com um valor por linha
+        """
+        total_linhas = len(linhas_csv)
+        
+        if expressao.vetorizavel:
+            try:
+                return expressao.avaliar_colunas(obter_coluna, total_linhas, timestamp_atual)
+            except Exception as e:
+                logger.debug(
+                    "Avaliação vetorizada de '%s' falhou (%s), "
+                    "avaliando linha a linha",
+                    expressao.fonte, e
+                )
+        
+        contexto = criar_contexto(timestamp_atual)
+        valores = []
+        for linha in linhas_csv:
+            contexto['linha'] = linha
+            valores.append(expressao.avaliar(contexto, erros))
+        
+        return valores
+    
+    def _avaliar_coluna_memoizada(
+        self,
+        expressao: ExpressaoCompilada,
+        linhas_csv: Sequence[Dict[str, Any]],
+        obter_coluna: ObterColuna,
+        timestamp_atual: int,
+        erros: Optional[TotalizadorErros] = None
+    ) -> Sequence[Any]:
+        """
+        Avalia uma expressão reaproveitando resultados de linhas com os mesmos
+        valores nas colunas lidas pela expressão. Resultados reaproveitados de
+        avaliações que falharam contam um erro a cada linha, como sem o cache.
+        
+        Args:
+            expressao: Expressão compilada
+            linhas_csv: Linhas do CSV
+            obter_coluna: Função que retorna os valores de uma coluna
+            timestamp_atual: Timestamp Unix atual
+            erros: Totalizador dos erros de avaliação
+        
+        Returns:
+            Sequência com um valor por linha (textos internados)
+        """
+        # Literais e expressões que leem a linha inteira não são memoizados
+        if expressao.constante or not expressao.colunas:
+            return self._avaliar_coluna(expressao, linhas_csv, obter_coluna, timestamp_atual, erros)
+        
+        try:
+            colunas = [obter_coluna(nome) for nome in expressao.colunas]
+        except KeyError:
+            return self._avaliar_coluna(expressao, linhas_csv, obter_coluna, timestamp_atual, erros)
+        
+        # Colunas de floats ou de tipos mistos entram na chave via repr, pois
+        # valores iguais podem formatar diferente (1 == 1.0 e 0.0 == -0.0)
+        partes = []
+        for coluna in colunas:
+            if isinstance(coluna, list) or getattr(coluna, 'typecode', None) == 'd':
+                partes.append(map(repr, coluna))
             else:
-                logger.warning(f"Template {template_idx} com formato de 'points' inválido")
-                return None
-            
-            # Tags (opcional)
-            if 'tags' in template:
-                tags_template = template['tags']
-                if isinstance(tags_template, list):
-                    tags = []
-                    for tag in tags_template:
-                        tag_avaliada = self._avaliar_campo(tag, contexto)
-                        if tag_avaliada:
-                            tags.append(str(tag_avaliada))
-                    metrica['tags'] = tags
-            
-            # Host (opcional)
-            if 'host' in template:
-                host = self._avaliar_campo(template['host'], contexto)
-                if host:
-                    metrica['host'] = str(host)
-            
-            # Interval (opcional)
-            if 'interval' in template:
-                interval = self._avaliar_campo(template['interval'], contexto)
-                if interval:
-                    metrica['interval'] = int(interval)
+                partes.append(coluna)
+        
+        fonte = expressao.fonte
+        cache = self._cache_expressoes
+        contexto = criar_contexto(timestamp_atual)
+        valores: List[Any] = []
+        falhas = 0
+        
+        for idx, chave in enumerate(zip(*partes)):
+            # Expressões de alta cardinalidade (ex: IDs únicos por linha) não
+            # se beneficiam do cache: o restante é avaliado sem memoização
+            if idx == AMOSTRA_MEMOIZACAO and falhas > AMOSTRA_MEMOIZACAO // 2:
+                return self._completar_sem_memoizacao(
+                    valores, expressao, linhas_csv, obter_coluna, timestamp_atual, erros
+                )
             
-            # Resources (opcional)
-            if 'resources' in template:
-                resources_template = template['resources']
-                if isinstance(resources_template, list):
-                    resources = []
-                    for resource in resources_template:
-                        if isinstance(resource, dict):
-                            resource_avaliado = {
-                                'name': str(self._avaliar_campo(resource.get('name', ''), contexto)),
-                                'type': str(self._avaliar_campo(resource.get('type', ''), contexto))
-                            }
-                            resources.append(resource_avaliado)
-                    if resources:
-                        metrica['resources'] = resources
+            chave_cache = (fonte, timestamp_atual, chave)
+            valor = cache.obter(chave_cache, _AUSENTE)
             
-            return metrica
+            if valor is _AUSENTE:
+                falhas += 1
+                contexto['linha'] = linhas_csv[idx]
+                erros_linha = TotalizadorErros() if erros is not None else None
+                valor = expressao.avaliar(contexto, erros_linha)
+                if type(valor) is str:
+                    valor = sys.intern(valor)
+                    
+                if erros_linha is not None and erros_linha.erros:
+                    chave_erro, (_, _, erro) = next(iter(erros_linha.erros.items()))
+                    erros.registrar(chave_erro, erro)
+                    cache.definir(chave_cache, _FalhaMemoizada(valor, chave_erro, erro))
+                else:
+                    cache.definir(chave_cache, valor)
+                    
+            elif type(valor) is _FalhaMemoizada:
+                if erros is not None:
+                    erros.registrar(valor.chave, valor.erro)
+                valor = valor.valor
             
-        except Exception as e:
-            logger.warning(
-                f"Erro ao processar template {template_idx} para linha {linha_idx}: {e}"
-            )
-            return None
+            valores.append(valor)
+        
+        return valores
     
-    def _avaliar_campo(self, campo: Any, contexto: Dict[str, Any]) -> Any:
+    def _completar_sem_memoizacao(
+        self,
+        valores: List[Any],
+        expressao: ExpressaoCompilada,
+        linhas_csv: Sequence[Dict[str, Any]],
+        obter_coluna: ObterColuna,
+        timestamp_atual: int,
+        erros: Optional[TotalizadorErros] = None
+    ) -> List[Any]:
         """
-        Avalia um campo do template, substituindo referências a variáveis.
+        Completa a avaliação de uma expressão a partir da linha len(valores).
         
         Args:
-            campo: Campo a ser avaliado (pode ser string, número, etc.)
-            contexto: Contexto com variáveis disponíveis
-            
+            valores: Valores já avaliados das primeiras linhas
+            expressao: Expressão compilada
+            linhas_csv: Linhas do CSV
+            obter_coluna: Função que retorna os valores de uma coluna
+            timestamp_atual: Timestamp Unix atual
+            erros: Totalizador dos erros de avaliação
+        
         Returns:
-            Valor avaliado
-        """
-        # Se for string e contiver referências Python, avaliar
-        if isinstance(campo, str):
-            # Verificar se é uma expressão Python (contém 'linha[' ou 'timestamp')
-            if 'linha[' in campo or 'timestamp' in campo or 'float(' in campo or 'int(' in campo or 'str(' in campo:
-                try:
-                    # Avaliar expressão de forma segura
-                    resultado = eval(campo, {"__builtins__": {}}, contexto)
-                    return resultado
-                except Exception as e:
-                    logger.warning(f"Erro ao avaliar expressão '{campo}': {e}")
-                    return campo
-            else:
-                # String literal, retornar como está
-                return campo
-        else:
-            # Não é string, retornar como está
-            return campo
+            Valores de todas as linhas
+        """
+        inicio = len(valores)
+        
+        if expressao.vetorizavel:
+            try:
+                restantes = expressao.avaliar_colunas(
+                    obter_coluna, len(linhas_csv), timestamp_atual
+                )
+                valores.extend(restantes[inicio:])
+                return valores
+            except Exception as e:
+                logger.debug(
+                    "Avaliação vetorizada de '%s' falhou (%s), "
+                    "avaliando linha a linha",
+                    expressao.fonte, e
+                )
+        
+        contexto = criar_contexto(timestamp_atual)
+        for idx in range(inicio, len(linhas_csv)):
+            contexto['linha'] = linhas_csv[idx]
+            valores.append(expressao.avaliar(contexto, erros))
+        
+        return valores
+    
+    def _internar_tags(self, tags: List[str]) -> Tuple[List[str], bool]:
+        """
+        Retorna uma lista de tags compartilhada para conjuntos de tags iguais.
+        
+        Args:
+            tags: Tags da métrica
+        
+        Returns:
+            Tupla (lista compartilhada, True se a lista ainda não existia).
+            A lista retornada não deve ser alterada in-place.
+        """
+        chave = tuple(tags)
+        lista = self._cache_tags.obter(chave)
+        if lista is None:
+            self._cache_tags.definir(chave, tags)
+            return tags, True
+        return lista, False
+    
+    def _criar_obter_coluna(self, linhas_csv: Sequence[Dict[str, Any]]) -> ObterColuna:
+        """
+        Cria função que extrai (e guarda) os valores de uma coluna do CSV.
+        
+        Args:
+            linhas_csv: Linhas do CSV
+        
+        Returns:
+            Função que recebe o nome da coluna e retorna seus valores
+        """
+        # Tabelas colunares já armazenam os valores por coluna
+        if isinstance(linhas_csv, TabelaColunar):
+            return linhas_csv.coluna
+        
+        colunas: Dict[str, List[Any]] = {}
+        
+        def obter_coluna(nome: str) -> List[Any]:
+            if nome not in colunas:
+                colunas[nome] = [linha[nome] for linha in linhas_csv]
+            return colunas[nome]
+        
+        return obter_coluna
@@ -0,0 +1,114 @@
+"""
+Serviço de roteamento de linhas do CSV entre destinos do Datadog.
+Mapeia o valor de uma expressão (ex: account_id) para o destino que deve
+receber as métricas da linha, separando a tabela em partições por destino.
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from ..models.tabela_colunar import TabelaColunar
+from ..utils.expressoes import compilar_expressao
+from ..utils.logger import configurar_logger
+
+logger = configurar_logger(__name__)
+
+
+class RoteamentoService:
+    """Serviço para separar as linhas do CSV por destino do Datadog."""
+    
+    def __init__(self, configuracao: Dict[str, Any], destinos: Iterable[str]):
+        """
+        Valida e prepara as regras de roteamento.
+        
+        Args:
+            configuracao: Campo 'roteamento' do evento, com 'expressao',
+                'regras' (valor da expressão -> nome do destino) e 'padrao' opcional
+            destinos: Nomes dos destinos configurados
+            
+        Raises:
+            ValueError: Se a configuração for inválida ou citar destinos inexistentes
+        """
+        if not isinstance(configuracao, dict):
+            raise ValueError("Campo 'roteamento' deve ser um objeto")
+        
+        expressao = configuracao.get('expressao')
+        regras = configuracao.get('regras')
+        padrao = configuracao.get('padrao')
+        
+        if not expressao or not isinstance(expressao, str):
+            raise ValueError("Roteamento sem 'expressao'")
+        
+        if not isinstance(regras, dict) or not regras:
+            raise ValueError("Roteamento deve ter 'regras' no formato {valor: destino}")
+        
+        disponiveis = set(destinos)
+        desconhecidos = sorted(
+            {destino for destino in regras.values() if destino not in disponiveis}
+            | ({padrao} if padrao is not None and padrao not in disponiveis else set())
+        )
+        if desconhecidos:
+            raise ValueError(
+                f"Roteamento cita destinos inexistentes: {desconhecidos}. "
+                f"Destinos disponíveis: {sorted(disponiveis)}"
+            )
+        
+        # Colunas lidas pela expressão (None se não for possível determinar)
+        colunas = compilar_expressao(expressao).colunas
+        self.expressao = expressao
+        self.colunas: Optional[Set[str]] = set(colunas) if colunas is not None else None
+        # Valores do CSV chegam convertidos (ex: int): comparar pelo texto
+        self.regras: Dict[str, str] = {str(valor): destino for valor, destino in regras.items()}
+        self.padrao: Optional[str] = padrao
+        self.linhas_sem_destino = 0
+    
+    def particionar(
+        self,
+        tabela: TabelaColunar,
+        valores_rota: Sequence[Any]
+    ) -> Dict[str, TabelaColunar]:
+        """
+        Separa as linhas da tabela por destino.
+        Linhas sem regra correspondente vão para o destino padrão ou são descartadas.
+        
+        Args:
+            tabela: Tabela do CSV
+            valores_rota: Valor da expressão de roteamento para cada linha
+            
+        Returns:
+            Dicionário destino -> tabela com as linhas do destino
+        """
+        indices: Dict[str, array] = {}
+        destino_por_valor: Dict[Tuple[type, Any], Optional[str]] = {}
+        sem_destino = 0
+        
+        for indice, valor in enumerate(valores_rota):
+            # Chave com o tipo: 1 e 1.0 são iguais no dict, mas não no texto
+            chave = (valor.__class__, valor)
+            try:
+                destino = destino_por_valor[chave]
+            except KeyError:
+                destino = destino_por_valor[chave] = self.regras.get(str(valor), self.padrao)
+            except TypeError:
+                # Valores não hasheáveis
+                destino = self.regras.get(str(valor), self.padrao)
+                
+            if destino is None:
+                sem_destino += 1
+                continue
+            
+            linhas = indices.get(destino)
+            if linhas is None:
+                linhas = indices[destino] = array('I')
+            linhas.append(indice)
+            
+        self.linhas_sem_destino = sem_destino
+        if sem_destino:
+            logger.warning("%s linhas sem destino no roteamento foram descartadas", sem_destino)
+            
+        logger.info(
+            "Linhas por destino: %s",
+            ', '.join(f"{destino}={len(linhas)}" for destino, linhas in indices.items())
+        )
+        
+        return {destino: tabela.selecionar(linhas) for destino, linhas in indices.items()}
@@ -4,28 +4,44 @@ Responsável por baixar arquivos e gerenciar armazenamento temporário.
 """
 
 import boto3
+import hashlib
+import json
 import os
-from typing import Optional
+from typing import Optional, Tuple
 from botocore.exceptions import ClientError
 
 from ..config.settings import Settings
 from ..utils.logger import configurar_logger
+from ..utils.telemetria import TELEMETRIA_DESATIVADA, Telemetria
 
 logger = configurar_logger(__name__)
 
 
+# Arquivos de uma entrada do cache, além do próprio CSV
+SUFIXO_METADADOS = '.meta.json'
+SUFIXOS_CACHE = (SUFIXO_METADADOS, '.snapshot', '.parcial', '.snapshot.parcial')
+
+MB = 1024 * 1024
+
+
 class S3Service:
     """Serviço para gerenciar operações com S3."""
     
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, telemetria: Optional[Telemetria] = None):
         """
         Inicializa o serviço do S3.
         
         Args:
             settings: Objeto de configurações
+            telemetria: Registro de tempos e contadores da invocação
         """
         self.settings = settings
+        self.telemetria = telemetria or TELEMETRIA_DESATIVADA
         self.s3_client = boto3.client('s3')
+        
+        # ETag do último arquivo baixado e se ele mudou desde o download anterior
+        self.etag_ultimo_arquivo: Optional[str] = None
+        self.arquivo_modificado: bool = True
     
     def baixar_csv_da_pasta(self, bucket: str, pasta: str) -> str:
         """
@@ -39,27 +55,45 @@ class S3Service:
         Returns:
             Caminho completo do arquivo baixado
             
+        Raises:
+            ClientError: Se houver erro ao acessar o S3
+            FileNotFoundError: Se nenhum CSV for encontrado
+        """
+        key = self.localizar_csv(bucket, pasta)
+        return self.baixar_arquivo(bucket, key, os.path.basename(key))
+    
+    def localizar_csv(self, bucket: str, pasta: str) -> str:
+        """
+        Localiza o arquivo CSV de uma pasta no S3 (o primeiro, se houver vários).
+        
+        Args:
+            bucket: Nome do bucket S3
+            pasta: Caminho da pasta no S3 (ex: 'rds/' ou 'rds/resultados_rds.csv')
+            
+        Returns:
+            Key do arquivo CSV
+            
         Raises:
             ClientError: Se houver erro ao acessar o S3
             FileNotFoundError: Se nenhum CSV for encontrado
         """
         try:
-            # Se o path já é um arquivo .csv, baixar diretamente
+            # Se o path já é um arquivo .csv, não é preciso listar
             if pasta.endswith('.csv'):
-                nome_arquivo = os.path.basename(pasta)
-                return self.baixar_arquivo(bucket, pasta, nome_arquivo)
+                return pasta
             
             # Caso contrário, listar arquivos na pasta e encontrar CSV
-            logger.info(f"Listando arquivos em s3://{bucket}/{pasta}")
+            logger.info("Listando arquivos em s3://%s/%s", bucket, pasta)
             
             # Garantir que a pasta termina com /
             if not pasta.endswith('/'):
                 pasta += '/'
             
-            resposta = self.s3_client.list_objects_v2(
-                Bucket=bucket,
-                Prefix=pasta
-            )
+            with self.telemetria.cronometro('s3.listagem'):
+                resposta = self.s3_client.list_objects_v2(
+                    Bucket=bucket,
+                    Prefix=pasta
+                )
             
             if 'Contents' not in resposta:
                 raise FileNotFoundError(f"Nenhum arquivo encontrado em s3://{bucket}/{pasta}")
@@ -68,17 +102,51 @@ class S3Service:
             for obj in resposta['Contents']:
                 key = obj['Key']
                 if key.endswith('.csv'):
-                    nome_arquivo = os.path.basename(key)
-                    logger.info(f"Arquivo CSV encontrado: {key}")
-                    return self.baixar_arquivo(bucket, key, nome_arquivo)
+                    logger.info("Arquivo CSV encontrado: %s", key)
+                    return key
             
             raise FileNotFoundError(f"Nenhum arquivo CSV encontrado em s3://{bucket}/{pasta}")
             
         except ClientError as e:
-            logger.error(f"Erro ao acessar S3: {e}")
+            logger.error("Erro ao acessar S3: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Erro inesperado ao buscar CSV: {e}")
+            logger.error("Erro inesperado ao buscar CSV: %s", e)
+            raise
+    
+    def ler_inicio(self, bucket: str, key: str, tamanho: int) -> Tuple[bytes, bool]:
+        """
+        Lê apenas os primeiros bytes de um arquivo (GET com Range), para
+        validar o header do CSV ou simular com uma amostra sem baixar tudo.
+        
+        Args:
+            bucket: Nome do bucket S3
+            key: Caminho do arquivo no S3
+            tamanho: Número máximo de bytes lidos
+            
+        Returns:
+            Tupla (bytes lidos, True se o arquivo inteiro foi lido)
+            
+        Raises:
+            ClientError: Se houver erro ao acessar o S3
+        """
+        try:
+            resposta = self.s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{tamanho - 1}")
+            conteudo = resposta['Body'].read()
+            
+            # Content-Range: bytes 0-65535/1234567 (ausente se o objeto veio inteiro)
+            total = resposta.get('ContentRange', '').rpartition('/')[2]
+            completo = not total.isdigit() or int(total) <= len(conteudo)
+            
+            self.telemetria.incrementar('s3.bytes_baixados', len(conteudo))
+            logger.info("Lidos %s bytes iniciais de s3://%s/%s", len(conteudo), bucket, key)
+            return conteudo, completo
+        
+        except ClientError as e:
+            # Range sobre um objeto vazio
+            if e.response.get('Error', {}).get('Code') == 'InvalidRange':
+                return b'', True
+            logger.error("Erro ao ler início do arquivo no S3: %s", e)
             raise
     
     def baixar_arquivo(self, bucket: str, key: str, nome_arquivo: str) -> str:
@@ -88,7 +156,8 @@ class S3Service:
         Args:
             bucket: Nome do bucket S3
             key: Caminho do arquivo no S3
-            nome_arquivo: Nome do arquivo para salvar localmente
+            nome_arquivo: Nome do arquivo para salvar localmente (com o cache
+                ativo, o nome vem de caminho_cache)
             
         Returns:
             Caminho completo do arquivo baixado
@@ -99,8 +168,13 @@ class S3Service:
         try:
             caminho_local = os.path.join(self.settings.diretorio_temp, nome_arquivo)
             
-            logger.info(f"Baixando s3://{bucket}/{key} para {caminho_local}")
+            if self.settings.cache_s3:
+                return self._baixar_condicional(bucket, key, self.caminho_cache(bucket, key))
+            
+            logger.info("Baixando s3://%s/%s para %s", bucket, key, caminho_local)
             
+            self.etag_ultimo_arquivo = None
+            self.arquivo_modificado = True
             self.s3_client.download_file(bucket, key, caminho_local)
             
             # Verificar se o arquivo foi baixado
@@ -108,17 +182,193 @@ class S3Service:
                 raise FileNotFoundError(f"Arquivo não encontrado após download: {caminho_local}")
             
             tamanho = os.path.getsize(caminho_local)
-            logger.info(f"Arquivo baixado com sucesso. Tamanho: {tamanho} bytes")
+            self.telemetria.incrementar('s3.bytes_baixados', tamanho)
+            logger.info("Arquivo baixado com sucesso. Tamanho: %s bytes", tamanho)
             
             return caminho_local
             
         except ClientError as e:
-            logger.error(f"Erro ao baixar arquivo do S3: {e}")
+            logger.error("Erro ao baixar arquivo do S3: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Erro inesperado ao baixar arquivo: {e}")
+            logger.error("Erro inesperado ao baixar arquivo: %s", e)
             raise
     
+    def caminho_cache(self, bucket: str, key: str) -> str:
+        """
+        Retorna o caminho da cópia local de um objeto no cache.
+        O prefixo com o hash de bucket e key separa objetos de mesmo nome
+        em pastas diferentes (ex: a/metrics.csv e b/metrics.csv).
+        
+        Args:
+            bucket: Nome do bucket S3
+            key: Caminho do arquivo no S3
+            
+        Returns:
+            Caminho local do arquivo
+        """
+        prefixo = hashlib.sha256(f"{bucket}/{key}".encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.settings.diretorio_temp, f"{prefixo}-{os.path.basename(key)}")
+    
+    def em_cache(self, bucket: str, key: str) -> bool:
+        """
+        Indica se há cópia local do objeto no cache (que o GET condicional
+        pode reutilizar).
+        
+        Args:
+            bucket: Nome do bucket S3
+            key: Caminho do arquivo no S3
+            
+        Returns:
+            True se a cópia e os metadados do objeto existem
+        """
+        caminho_local = self.caminho_cache(bucket, key)
+        return self._ler_etag_local(bucket, key, caminho_local, f"{caminho_local}{SUFIXO_METADADOS}") is not None
+    
+    def _baixar_condicional(self, bucket: str, key: str, caminho_local: str) -> str:
+        """
+        Baixa o arquivo com GET condicional (If-None-Match), reutilizando a
+        cópia local de uma invocação anterior quando o ETag não mudou.
+        
+        Args:
+            bucket: Nome do bucket S3
+            key: Caminho do arquivo no S3
+            caminho_local: Caminho do arquivo local
+            
+        Returns:
+            Caminho completo do arquivo local
+            
+        Raises:
+            ClientError: Se houver erro ao baixar do S3
+        """
+        caminho_metadados = f"{caminho_local}.meta.json"
+        etag_local = self._ler_etag_local(bucket, key, caminho_local, caminho_metadados)
+        
+        parametros = {'Bucket': bucket, 'Key': key}
+        if etag_local:
+            parametros['IfNoneMatch'] = etag_local
+            
+        logger.info("Baixando s3://%s/%s para %s (ETag local: %s)", bucket, key, caminho_local, etag_local)
+        
+        try:
+            resposta = self.s3_client.get_object(**parametros)
+        except ClientError as e:
+            if self._nao_modificado(e):
+                logger.info("Arquivo não modificado desde o último download, reutilizando %s", caminho_local)
+                self.telemetria.incrementar('s3.nao_modificado')
+                # Marca a entrada como usada recentemente (ordem de remoção do cache)
+                os.utime(caminho_metadados)
+                self.etag_ultimo_arquivo = etag_local
+                self.arquivo_modificado = False
+                return caminho_local
+            raise
+            
+        self._liberar_cache(caminho_local, resposta.get('ContentLength', 0))
+        
+        # Gravar em arquivo parcial e renomear, para nunca deixar cópia truncada
+        caminho_parcial = f"{caminho_local}.parcial"
+        with open(caminho_parcial, 'wb') as destino:
+            for bloco in resposta['Body'].iter_chunks(chunk_size=1024 * 1024):
+                destino.write(bloco)
+        os.replace(caminho_parcial, caminho_local)
+        
+        self.etag_ultimo_arquivo = resposta.get('ETag')
+        self.arquivo_modificado = True
+        
+        with open(caminho_metadados, 'w', encoding='utf-8') as arquivo:
+            json.dump({'bucket': bucket, 'key': key, 'etag': self.etag_ultimo_arquivo}, arquivo)
+            
+        tamanho = os.path.getsize(caminho_local)
+        self.telemetria.incrementar('s3.bytes_baixados', tamanho)
+        logger.info("Arquivo baixado com sucesso. Tamanho: %s bytes", tamanho)
+        
+        return caminho_local
+    
+    def _ler_etag_local(
+        self,
+        bucket: str,
+        key: str,
+        caminho_local: str,
+        caminho_metadados: str
+    ) -> Optional[str]:
+        """
+        Lê o ETag da cópia local, se ela corresponder ao mesmo objeto do S3.
+        
+        Returns:
+            ETag da cópia local ou None se não houver cópia válida
+        """
+        if not os.path.exists(caminho_local) or not os.path.exists(caminho_metadados):
+            return None
+        
+        try:
+            with open(caminho_metadados, 'r', encoding='utf-8') as arquivo:
+                metadados = json.load(arquivo)
+        except (OSError, ValueError) as e:
+            logger.warning("Metadados de cache inválidos em %s: %s", caminho_metadados, e)
+            return None
+        
+        if metadados.get('bucket') != bucket or metadados.get('key') != key:
+            return None
+        
+        return metadados.get('etag')
+    
+    def _liberar_cache(self, caminho_atual: str, tamanho_novo: int) -> None:
+        """
+        Remove as cópias de outros CSVs (com metadados e snapshot), das usadas
+        há mais tempo para as mais recentes, até que o cache e o arquivo a
+        baixar caibam em CACHE_S3_LIMITE_MB.
+        
+        Args:
+            caminho_atual: Caminho local do arquivo sendo baixado (nunca removido)
+            tamanho_novo: Tamanho em bytes do arquivo sendo baixado
+        """
+        limite = self.settings.cache_s3_limite_mb * MB
+        entradas = []
+        
+        try:
+            with os.scandir(self.settings.diretorio_temp) as itens:
+                for item in itens:
+                    if not item.name.endswith(SUFIXO_METADADOS):
+                        continue
+                    caminho = item.path[:-len(SUFIXO_METADADOS)]
+                    if caminho == caminho_atual:
+                        continue
+                    arquivos = [caminho] + [f"{caminho}{sufixo}" for sufixo in SUFIXOS_CACHE]
+                    tamanho = sum(os.path.getsize(arquivo) for arquivo in arquivos if os.path.exists(arquivo))
+                    entradas.append((item.stat().st_mtime, tamanho, arquivos))
+        except OSError as e:
+            logger.warning("Erro ao listar o cache em %s: %s", self.settings.diretorio_temp, e)
+            return
+        
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        removidas = 0
+        for _, tamanho, arquivos in sorted(entradas, key=lambda entrada: entrada[0]):
+            if total + tamanho_novo <= limite:
+                break
+            for arquivo in arquivos:
+                try:
+                    os.remove(arquivo)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning("Erro ao remover %s do cache: %s", arquivo, e)
+            total -= tamanho
+            removidas += 1
+            
+        if removidas:
+            self.telemetria.incrementar('s3.cache_removidos', removidas)
+            logger.info(
+                "%s arquivo(s) removido(s) do cache; %s bytes mantidos de outros CSVs",
+                removidas, total
+            )
+    
+    @staticmethod
+    def _nao_modificado(erro: ClientError) -> bool:
+        """Verifica se o erro do S3 é a resposta 304 de um GET condicional."""
+        codigo = erro.response.get('Error', {}).get('Code')
+        status = erro.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        return codigo in ('304', 'NotModified') or status == 304
+    
     def limpar_arquivo_local(self, caminho: str) -> None:
         """
         Remove arquivo temporário do sistema de arquivos.
@@ -129,6 +379,6 @@ class S3Service:
         try:
             if os.path.exists(caminho):
                 os.remove(caminho)
-                logger.info(f"Arquivo temporário removido: {caminho}")
+                logger.info("Arquivo temporário removido: %s", caminho)
         except Exception as e:
-            logger.warning(f"Erro ao remover arquivo temporário {caminho}: {e}")
+            logger.warning("Erro ao remover arquivo temporário %s: %s", caminho, e)
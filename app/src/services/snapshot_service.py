@@ -0,0 +1,127 @@
+"""
+Serviço de snapshots do CSV já lido.
+Reaproveita a tabela colunar entre invocações "quentes" da Lambda enquanto
+o objeto do S3 não muda (mesmo ETag), evitando ler e converter o CSV de novo.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from typing import Dict, Iterable, Optional, Tuple
+
+from ..config.settings import Settings
+from ..models.tabela_colunar import TabelaColunar
+from ..utils.logger import configurar_logger
+
+logger = configurar_logger(__name__)
+
+
+# Versão do formato do snapshot; alterar invalida os snapshots existentes
+VERSAO_SNAPSHOT = 1
+
+# Snapshot mantido em memória no container (apenas o último): caminho do CSV -> (chave, tabela)
+_SNAPSHOTS_EM_MEMORIA: Dict[str, Tuple[str, TabelaColunar]] = {}
+
+
+class SnapshotService:
+    """Serviço para salvar e recuperar snapshots da tabela do CSV."""
+    
+    def __init__(self, settings: Settings):
+        """
+        Inicializa o serviço de snapshots.
+        
+        Args:
+            settings: Objeto de configurações
+        """
+        self.settings = settings
+        # Origem do último snapshot carregado: 'memoria', 'disco' ou None
+        self.origem: Optional[str] = None
+    
+    @staticmethod
+    def gerar_chave(
+        etag: str,
+        filtro: Optional[str] = None,
+        colunas: Optional[Iterable[str]] = None
+    ) -> str:
+        """
+        Gera a chave do snapshot a partir de tudo que altera a tabela lida.
+        
+        Args:
+            etag: ETag do objeto no S3
+            filtro: Expressão do filtro de linhas
+            colunas: Projeção de colunas usada na leitura
+            
+        Returns:
+            Chave hexadecimal do snapshot
+        """
+        identificacao = json.dumps([
+            VERSAO_SNAPSHOT,
+            etag,
+            filtro,
+            sorted(colunas) if colunas is not None else None
+        ])
+        return hashlib.sha256(identificacao.encode('utf-8')).hexdigest()
+    
+    def carregar(self, caminho_csv: str, chave: str) -> Optional[TabelaColunar]:
+        """
+        Recupera o snapshot do CSV, primeiro da memória e depois do disco.
+        
+        Args:
+            caminho_csv: Caminho local do CSV
+            chave: Chave gerada por gerar_chave
+            
+        Returns:
+            Tabela do snapshot ou None se não houver snapshot válido
+        """
+        self.origem = None
+        
+        em_memoria = _SNAPSHOTS_EM_MEMORIA.get(caminho_csv)
+        if em_memoria is not None and em_memoria[0] == chave:
+            logger.info("Reutilizando snapshot em memória de %s", caminho_csv)
+            self.origem = 'memoria'
+            return em_memoria[1]
+        
+        caminho_snapshot = f"{caminho_csv}.snapshot"
+        if not os.path.exists(caminho_snapshot):
+            return None
+        
+        try:
+            with open(caminho_snapshot, 'rb') as arquivo:
+                chave_salva, tabela = pickle.load(arquivo)
+        except Exception as e:
+            logger.warning("Snapshot inválido em %s: %s", caminho_snapshot, e)
+            return None
+        
+        if chave_salva != chave:
+            return None
+        
+        logger.info("Reutilizando snapshot em disco de %s", caminho_csv)
+        _SNAPSHOTS_EM_MEMORIA.clear()
+        _SNAPSHOTS_EM_MEMORIA[caminho_csv] = (chave, tabela)
+        self.origem = 'disco'
+        return tabela
+    
+    def salvar(self, caminho_csv: str, chave: str, tabela: TabelaColunar) -> None:
+        """
+        Salva o snapshot em memória e em disco.
+        Falhas ao gravar em disco são apenas logadas.
+        
+        Args:
+            caminho_csv: Caminho local do CSV
+            chave: Chave gerada por gerar_chave
+            tabela: Tabela lida do CSV
+        """
+        # Só o último snapshot fica em memória, para não acumular tabelas no container
+        _SNAPSHOTS_EM_MEMORIA.clear()
+        _SNAPSHOTS_EM_MEMORIA[caminho_csv] = (chave, tabela)
+        
+        caminho_snapshot = f"{caminho_csv}.snapshot"
+        caminho_parcial = f"{caminho_snapshot}.parcial"
+        try:
+            with open(caminho_parcial, 'wb') as arquivo:
+                pickle.dump((chave, tabela), arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(caminho_parcial, caminho_snapshot)
+            logger.info("Snapshot salvo em %s", caminho_snapshot)
+        except OSError as e:
+            logger.warning("Erro ao salvar snapshot %s: %s", caminho_snapshot, e)
@@ -0,0 +1,395 @@
+"""
+Transportes de envio de métricas ao Datadog.
+HTTP envia lotes JSON à API (/api/v2/series) de cada destino; DogStatsD envia
+datagramas ao agente local (extensão do Datadog) por UDP ou Unix Domain Socket.
+"""
+
+import gzip
+import json
+import socket
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..config.constants import TIPOS_METRICA
+from ..config.settings import DestinoDatadog, Settings
+from ..utils.logger import TotalizadorErros, configurar_logger
+from ..utils.telemetria import TELEMETRIA_DESATIVADA, Telemetria
+
+logger = configurar_logger(__name__)
+
+
+# MTU padrão por tipo de socket (mesmos valores das bibliotecas do Datadog)
+MTU_UDP = 1432
+MTU_UDS = 8192
+
+# Campos da API sem equivalente no protocolo DogStatsD
+CAMPOS_IGNORADOS_DOGSTATSD = ('resources', 'interval')
+
+
+class Transporte(ABC):
+    """Interface dos transportes: serializa um lote e o envia a um destino."""
+    
+    @abstractmethod
+    def serializar(self, lote: List[Dict[str, Any]]) -> Any:
+        """
+        Serializa um lote de métricas (uma única vez para todos os destinos).
+        
+        Args:
+            lote: Lista de métricas do lote
+        
+        Returns:
+            Corpo do lote no formato do transporte
+        """
+    
+    @abstractmethod
+    def enviar(self, destino: DestinoDatadog, corpo: Any) -> None:
+        """
+        Envia um lote já serializado a um destino.
+        
+        Args:
+            destino: Destino do Datadog
+            corpo: Corpo retornado por serializar
+        
+        Raises:
+            Exception: Se o envio falhar
+        """
+    
+    def tamanho(self, corpo: Any) -> int:
+        """
+        Retorna o tamanho em bytes de um corpo serializado (para logging).
+        
+        Args:
+            corpo: Corpo retornado por serializar
+        
+        Returns:
+            Tamanho em bytes
+        """
+        return len(corpo)
+    
+    def fechar(self) -> None:
+        """Libera as conexões do transporte (ao final da invocação)."""
+
+
+class TransporteHTTP(Transporte):
+    """Envia lotes JSON (comprimidos ou não) à API de séries do Datadog."""
+    
+    def __init__(self, settings: Settings, telemetria: Optional[Telemetria] = None):
+        """
+        Inicializa o transporte.
+        
+        Args:
+            settings: Objeto de configurações
+            telemetria: Registro de tempos e contadores da invocação
+        """
+        self.settings = settings
+        self.telemetria = telemetria or TELEMETRIA_DESATIVADA
+        
+        # Uma sessão (com seu próprio estado de retry) e cabeçalhos por destino
+        self.sessoes = {destino.nome: self._criar_sessao() for destino in settings.destinos_datadog}
+        self._cabecalhos = {
+            destino.nome: self._criar_cabecalhos(destino) for destino in settings.destinos_datadog
+        }
+    
+    def _criar_sessao(self) -> requests.Session:
+        """
+        Cria sessão HTTP com retry automático.
+        
+        Returns:
+            Sessão configurada
+        """
+        sessao = requests.Session()
+        
+        # Configurar retry
+        retry_strategy = Retry(
+            total=self.settings.max_tentativas,
+            backoff_factor=self.settings.delay_retry,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["POST"]
+        )
+        
+        adapter = HTTPAdapter(max_retries=retry_strategy)
+        sessao.mount("https://", adapter)
+        sessao.mount("http://", adapter)
+        
+        return sessao
+    
+    def _criar_cabecalhos(self, destino: DestinoDatadog) -> Dict[str, str]:
+        """
+        Monta os cabeçalhos HTTP de um destino.
+        
+        Args:
+            destino: Destino do Datadog
+        
+        Returns:
+            Cabeçalhos da requisição
+        """
+        cabecalhos = {
+            'Content-Type': 'application/json',
+            'DD-API-KEY': destino.api_key,
+            'DD-APPLICATION-KEY': destino.app_key
+        }
+        
+        if self.settings.datadog_compressao == 'gzip':
+            cabecalhos['Content-Encoding'] = 'gzip'
+        
+        return cabecalhos
+    
+    def serializar(self, lote: List[Dict[str, Any]]) -> bytes:
+        """
+        Serializa (e comprime, se configurado) o corpo de um lote.
+        
+        Args:
+            lote: Lista de métricas do lote
+        
+        Returns:
+            Corpo da requisição
+        """
+        corpo = json.dumps({'series': lote}, separators=(',', ':')).encode('utf-8')
+        
+        if self.settings.datadog_compressao == 'gzip':
+            corpo = gzip.compress(corpo, compresslevel=6)
+        
+        return corpo
+    
+    def enviar(self, destino: DestinoDatadog, corpo: bytes) -> None:
+        """
+        Envia um lote de métricas para um destino do Datadog.
+        
+        Args:
+            destino: Destino do Datadog
+            corpo: Corpo já serializado do lote
+        
+        Raises:
+            requests.RequestException: Se houver erro na requisição
+        """
+        try:
+            resposta = self.sessoes[destino.nome].post(
+                destino.api_url,
+                data=corpo,
+                headers=self._cabecalhos[destino.nome],
+                timeout=self.settings.timeout_request
+            )
+            
+            # Retentativas feitas pelo urllib3 (429/5xx) antes da resposta final
+            retentativas = getattr(resposta.raw, 'retries', None)
+            if retentativas is not None and retentativas.history:
+                self.telemetria.incrementar('envio.retentativas', len(retentativas.history))
+            
+            resposta.raise_for_status()
+            
+            logger.debug("Resposta do Datadog: %s - %s", resposta.status_code, resposta.text)
+        
+        except requests.RequestException as e:
+            logger.error("Erro na requisição ao Datadog: %s", e)
+            if hasattr(e, 'response') and e.response is not None:
+                logger.error("Resposta de erro: %s", e.response.text)
+            raise
+    
+    def fechar(self) -> None:
+        """Fecha as sessões HTTP de todos os destinos."""
+        for sessao in self.sessoes.values():
+            sessao.close()
+
+
+class TransporteDogStatsD(Transporte):
+    """
+    Envia métricas ao agente local no protocolo DogStatsD, agrupando várias
+    linhas por datagrama até o MTU. Os pontos mantêm seu timestamp ('|T').
+    Rates com 'interval' viram counts (valor x intervalo); rates sem intervalo
+    e monotonic_counts não têm equivalente no protocolo e são descartados.
+    """
+    
+    def __init__(
+        self,
+        endereco: str,
+        mtu: int = 0,
+        timeout: float = 5,
+        telemetria: Optional[Telemetria] = None
+    ):
+        """
+        Inicializa o transporte e cria o socket.
+        
+        Args:
+            endereco: 'udp://host:porta' ou 'unix:///caminho/do/socket'
+            mtu: Tamanho máximo de cada datagrama (0 usa o padrão do tipo de socket)
+            timeout: Timeout de envio em segundos
+            telemetria: Registro de tempos e contadores da invocação
+        
+        Raises:
+            ValueError: Se o endereço for inválido
+        """
+        if endereco.startswith('unix://'):
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            alvo: Any = endereco[len('unix://'):]
+            self.mtu = mtu or MTU_UDS
+        elif endereco.startswith('udp://'):
+            host, _, porta = endereco[len('udp://'):].rpartition(':')
+            if not host or not porta.isdigit():
+                raise ValueError(f"Endereço do DogStatsD inválido: {endereco}")
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            alvo = (host, int(porta))
+            self.mtu = mtu or MTU_UDP
+        else:
+            raise ValueError(
+                f"Endereço do DogStatsD inválido: {endereco}. Use 'udp://host:porta' ou 'unix:///caminho'"
+            )
+        
+        self.endereco = endereco
+        self.telemetria = telemetria or TELEMETRIA_DESATIVADA
+        self.socket.settimeout(timeout)
+        # Conectado no primeiro envio (o socket do agente pode ainda não existir)
+        self._alvo = alvo
+        self._conectado = False
+        # Vários destinos podem enviar ao mesmo tempo pelo mesmo socket
+        self._trava = threading.Lock()
+    
+    def serializar(self, lote: List[Dict[str, Any]]) -> List[bytes]:
+        """
+        Converte o lote em linhas DogStatsD e as agrupa em datagramas.
+        
+        Args:
+            lote: Lista de métricas do lote
+        
+        Returns:
+            Datagramas prontos para envio
+        """
+        datagramas: List[bytes] = []
+        atual: List[bytes] = []
+        tamanho_atual = 0
+        grandes = 0
+        descartadas = TotalizadorErros()
+        ignorados: Dict[str, int] = {}
+        # Listas de tags são compartilhadas entre métricas: montar o sufixo uma vez
+        sufixos: Dict[Any, bytes] = {}
+        
+        for metrica in lote:
+            tipo_api = metrica.get('type')
+            multiplicador = 1.0
+            if tipo_api == TIPOS_METRICA['rate'] and metrica.get('interval'):
+                # Rate é por segundo: o count do intervalo é valor x intervalo
+                tipo = b'|c'
+                multiplicador = float(metrica['interval'])
+            elif tipo_api == TIPOS_METRICA['rate']:
+                descartadas.registrar('rate sem interval', ValueError(f"métrica {metrica['metric']}"))
+                continue
+            elif tipo_api == TIPOS_METRICA['monotonic_count']:
+                descartadas.registrar('monotonic_count', ValueError(f"métrica {metrica['metric']}"))
+                continue
+            else:
+                tipo = b'|c' if tipo_api == TIPOS_METRICA['count'] else b'|g'
+                
+            for campo in CAMPOS_IGNORADOS_DOGSTATSD:
+                # O interval de um rate já foi aplicado ao valor
+                if metrica.get(campo) and not (campo == 'interval' and tipo_api == TIPOS_METRICA['rate']):
+                    ignorados[campo] = ignorados.get(campo, 0) + 1
+            
+            tags = metrica.get('tags') or ()
+            host = metrica.get('host')
+            chave = (id(tags), host)
+            sufixo = sufixos.get(chave)
+            if sufixo is None:
+                todas = list(tags) + ([f'host:{host}'] if host else [])
+                sufixo = sufixos[chave] = ('|#' + ','.join(todas)).encode('utf-8') if todas else b''
+            
+            prefixo = f"{metrica['metric']}:".encode('utf-8')
+            
+            for timestamp, valor in metrica.get('points', ()):
+                linha = b''.join((
+                    prefixo, self._formatar_valor(float(valor) * multiplicador).encode('ascii'), tipo, sufixo,
+                    b'|T', str(int(timestamp)).encode('ascii')
+                ))
+                
+                # Linha não cabe no datagrama atual: fechar e começar outro
+                if atual and tamanho_atual + 1 + len(linha) > self.mtu:
+                    datagramas.append(b'\n'.join(atual))
+                    atual = []
+                    tamanho_atual = 0
+                
+                if len(linha) > self.mtu:
+                    grandes += 1
+                
+                tamanho_atual += len(linha) + (1 if atual else 0)
+                atual.append(linha)
+        
+        if atual:
+            datagramas.append(b'\n'.join(atual))
+        
+        if grandes:
+            logger.warning("%s linhas DogStatsD maiores que o MTU (%s bytes)", grandes, self.mtu)
+        
+        descartadas.logar(logger, 'DogStatsD (séries descartadas)')
+        self.telemetria.incrementar('envio.series_descartadas', descartadas.total)
+        self.telemetria.incrementar('envio.campos_ignorados', sum(ignorados.values()))
+        if ignorados:
+            logger.warning("DogStatsD: campos sem equivalente ignorados (métricas por campo): %s", ignorados)
+        
+        return datagramas
+    
+    def enviar(self, destino: DestinoDatadog, corpo: List[bytes]) -> None:
+        """
+        Envia os datagramas de um lote ao agente local.
+        
+        Args:
+            destino: Destino do Datadog (o agente encaminha à sua organização)
+            corpo: Datagramas retornados por serializar
+        
+        Raises:
+            OSError: Se o socket recusar o envio
+        """
+        with self._trava:
+            if not self._conectado:
+                self.socket.connect(self._alvo)
+                self._conectado = True
+            for datagrama in corpo:
+                self.socket.send(datagrama)
+        self.telemetria.incrementar('envio.datagramas', len(corpo))
+    
+    def tamanho(self, corpo: List[bytes]) -> int:
+        """
+        Retorna o total de bytes dos datagramas.
+        
+        Args:
+            corpo: Datagramas retornados por serializar
+        
+        Returns:
+            Tamanho em bytes
+        """
+        return sum(len(datagrama) for datagrama in corpo)
+    
+    def fechar(self) -> None:
+        """Fecha o socket do agente."""
+        with self._trava:
+            self.socket.close()
+            self._conectado = False
+    
+    @staticmethod
+    def _formatar_valor(valor: float) -> str:
+        """Formata o valor sem casas decimais desnecessárias."""
+        valor = float(valor)
+        if valor.is_integer() and abs(valor) < 1e15:
+            return str(int(valor))
+        return repr(valor)
+
+
+def criar_transporte(settings: Settings, telemetria: Optional[Telemetria] = None) -> Transporte:
+    """
+    Cria o transporte configurado em DATADOG_TRANSPORTE.
+    
+    Args:
+        settings: Objeto de configurações
+        telemetria: Registro de tempos e contadores da invocação
+    
+    Returns:
+        TransporteHTTP ou TransporteDogStatsD
+    """
+    if settings.datadog_transporte == 'dogstatsd':
+        logger.info("Enviando métricas ao agente local via DogStatsD: %s", settings.dogstatsd_endereco)
+        return TransporteDogStatsD(
+            settings.dogstatsd_endereco, settings.dogstatsd_mtu, settings.timeout_request, telemetria
+        )
+    
+    return TransporteHTTP(settings, telemetria)
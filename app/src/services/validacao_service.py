@@ -0,0 +1,185 @@
+"""
+Serviço de validação prévia da configuração do evento.
+Compila e verifica os templates (campos obrigatórios, tipo, sintaxe e nomes
+das expressões) e confere as colunas referenciadas contra o header do CSV,
+antes do download, para que configurações inválidas falhem em milissegundos.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from ..config.constants import FORMATO_MULTIPLAS_METRICAS, TIPOS_METRICA
+from ..utils.expressoes import ExpressaoCompilada, FiltroCompilado, compilar_expressao, eh_codigo
+from ..utils.logger import configurar_logger
+from .multiplas_metricas_service import COLUNAS_OBRIGATORIAS
+from .payload_service import PayloadService
+from .roteamento_service import RoteamentoService
+
+logger = configurar_logger(__name__)
+
+
+class ValidacaoService:
+    """Serviço para validar templates, filtro e roteamento antes do processamento."""
+    
+    def __init__(self, payload_service: Optional[PayloadService] = None):
+        """
+        Inicializa o serviço de validação.
+        
+        Args:
+            payload_service: Serviço usado para compilar os templates
+        """
+        self.payload_service = payload_service or PayloadService()
+        # Campos que parecem expressão mas serão enviados como texto literal
+        self.avisos: List[str] = []
+    
+    def validar(
+        self,
+        formato: str,
+        payloads: List[Dict[str, Any]],
+        cabecalho: Optional[Sequence[str]] = None,
+        filtro: Optional[FiltroCompilado] = None,
+        roteamento: Optional[RoteamentoService] = None
+    ) -> List[str]:
+        """
+        Valida a configuração do evento.
+        
+        Args:
+            formato: Formato do CSV ('templates' ou 'multiplas_metricas')
+            payloads: Templates de payload do evento
+            cabecalho: Colunas do CSV (None dispensa a verificação de colunas)
+            filtro: Filtro compilado do evento
+            roteamento: Roteamento do evento
+            
+        Returns:
+            Lista de problemas encontrados (vazia se a configuração for válida)
+        """
+        if formato == FORMATO_MULTIPLAS_METRICAS:
+            problemas = self.validar_colunas(COLUNAS_OBRIGATORIAS, "Formato 'multiplas_metricas'", cabecalho)
+        else:
+            problemas = self.validar_templates(payloads, cabecalho)
+            
+        if filtro is not None and filtro.colunas is not None:
+            problemas += self.validar_colunas(filtro.colunas, "Filtro", cabecalho)
+            
+        if roteamento is not None:
+            problemas += self.validar_expressao(
+                compilar_expressao(roteamento.expressao), "Roteamento", cabecalho, literal_permitido=False
+            )
+            
+        if problemas:
+            logger.warning("Validação prévia encontrou %s problema(s)", len(problemas))
+        return problemas
+    
+    def validar_templates(
+        self,
+        payloads: List[Dict[str, Any]],
+        cabecalho: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """
+        Compila e verifica cada template de payload.
+        
+        Args:
+            payloads: Templates de payload do evento
+            cabecalho: Colunas do CSV (None dispensa a verificação de colunas)
+            
+        Returns:
+            Lista de problemas encontrados
+        """
+        problemas: List[str] = []
+        tipos_validos = sorted(TIPOS_METRICA.values())
+        
+        for template_idx, template in enumerate(payloads, start=1):
+            compilado = self.payload_service.compilar_template(template, template_idx, problemas)
+            if compilado is None:
+                continue
+            
+            origem = f"Template {template_idx}"
+            
+            # Pontos descartados silenciosamente na compilação
+            for ponto in template['points']:
+                if isinstance(ponto, dict) and 'value' not in ponto:
+                    problemas.append(f"{origem}: ponto sem 'value'")
+                elif not isinstance(ponto, dict) and not (isinstance(ponto, list) and len(ponto) == 2):
+                    problemas.append(f"{origem}: ponto deve ser {{timestamp, value}} ou [timestamp, value]")
+                    
+            if compilado.type.constante and compilado.type.fonte not in tipos_validos:
+                problemas.append(f"{origem}: 'type' {compilado.type.fonte!r} inválido (use {tipos_validos})")
+                
+            for expressao in compilado.expressoes():
+                problemas += self.validar_expressao(expressao, origem, cabecalho)
+                
+        return problemas
+    
+    def validar_expressao(
+        self,
+        expressao: ExpressaoCompilada,
+        origem: str,
+        cabecalho: Optional[Sequence[str]] = None,
+        literal_permitido: bool = True
+    ) -> List[str]:
+        """
+        Verifica a sintaxe, os nomes e as colunas de uma expressão.
+        Campos de template que não leem a linha (ex: 'env:timestamp') e não
+        avaliam são enviados como texto literal, como no processamento: geram
+        apenas um aviso.
+        
+        Args:
+            expressao: Expressão compilada
+            origem: Onde a expressão está (para a mensagem)
+            cabecalho: Colunas do CSV (None dispensa a verificação de colunas)
+            literal_permitido: Se False, erros de sintaxe e nomes são sempre problemas
+            
+        Returns:
+            Lista de problemas encontrados
+        """
+        if expressao.erro_sintaxe is not None:
+            erro = f"{origem}: erro de sintaxe em '{expressao.fonte}': {expressao.erro_sintaxe}"
+        elif expressao.nomes_desconhecidos:
+            erro = f"{origem}: nomes desconhecidos em '{expressao.fonte}': {list(expressao.nomes_desconhecidos)}"
+        else:
+            erro = None
+            
+        if erro is not None and literal_permitido and not eh_codigo(expressao.fonte):
+            self._avisar(f"{erro} (enviado como texto literal)")
+            return []
+        
+        if expressao.erro_sintaxe is not None:
+            return [erro]
+        
+        problemas = []
+        if erro is not None:
+            problemas.append(erro)
+        if expressao.colunas:
+            problemas += self.validar_colunas(expressao.colunas, f"{origem} ('{expressao.fonte}')", cabecalho)
+        return problemas
+    
+    def _avisar(self, aviso: str) -> None:
+        """Registra e loga um aviso (uma vez por instância, mesmo se validado de novo)."""
+        if aviso not in self.avisos:
+            self.avisos.append(aviso)
+            logger.warning("Validação prévia: %s", aviso)
+    
+    @staticmethod
+    def validar_colunas(
+        colunas: Iterable[str],
+        origem: str,
+        cabecalho: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """
+        Verifica se as colunas existem no header do CSV.
+        
+        Args:
+            colunas: Colunas referenciadas
+            origem: Quem referencia as colunas (para a mensagem)
+            cabecalho: Colunas do CSV (None dispensa a verificação)
+            
+        Returns:
+            Lista com um problema, se houver colunas ausentes
+        """
+        if cabecalho is None:
+            return []
+        
+        existentes = set(cabecalho)
+        ausentes = [coluna for coluna in colunas if coluna not in existentes]
+        if ausentes:
+            return [f"{origem}: colunas inexistentes no CSV: {ausentes}"]
+        return []
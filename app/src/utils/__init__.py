@@ -2,6 +2,26 @@
 Módulo de utilitários da aplicação.
 """
 
-from .logger import configurar_logger
+from .logger import LIMITADOR, TotalizadorErros, configurar_logger
+from .cache import CacheLRU
+from .hyperloglog import HyperLogLog, hash64
+from .expressoes import ExpressaoCompilada, FiltroCompilado, compilar_expressao, compilar_filtro
+from .telemetria import TELEMETRIA_DESATIVADA, Telemetria
+from .memoria import PerfilMemoria, pico_rss_mb
 
-__all__ = ['configurar_logger']
+__all__ = [
+    'configurar_logger',
+    'LIMITADOR',
+    'TotalizadorErros',
+    'CacheLRU',
+    'HyperLogLog',
+    'hash64',
+    'ExpressaoCompilada',
+    'FiltroCompilado',
+    'compilar_expressao',
+    'compilar_filtro',
+    'TELEMETRIA_DESATIVADA',
+    'Telemetria',
+    'PerfilMemoria',
+    'pico_rss_mb'
+]
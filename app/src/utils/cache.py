@@ -0,0 +1,60 @@
+"""
+Cache LRU de tamanho limitado.
+"""
+
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class CacheLRU:
+    """Cache que descarta as entradas usadas há mais tempo ao atingir o limite."""
+    
+    def __init__(self, tamanho_maximo: int):
+        """
+        Inicializa o cache.
+        
+        Args:
+            tamanho_maximo: Número máximo de entradas
+        """
+        self.tamanho_maximo = tamanho_maximo
+        self._dados: 'OrderedDict[Hashable, Any]' = OrderedDict()
+    
+    def obter(self, chave: Hashable, padrao: Any = None) -> Any:
+        """
+        Obtém um valor do cache, marcando-o como usado recentemente.
+        
+        Args:
+            chave: Chave do valor
+            padrao: Valor retornado se a chave não estiver no cache
+        
+        Returns:
+            Valor armazenado ou o padrão
+        """
+        try:
+            self._dados.move_to_end(chave)
+        except KeyError:
+            return padrao
+        return self._dados[chave]
+    
+    def definir(self, chave: Hashable, valor: Any) -> None:
+        """
+        Armazena um valor, descartando o mais antigo se necessário.
+        
+        Args:
+            chave: Chave do valor
+            valor: Valor a armazenar
+        """
+        self._dados[chave] = valor
+        self._dados.move_to_end(chave)
+        if len(self._dados) > self.tamanho_maximo:
+            self._dados.popitem(last=False)
+    
+    def limpar(self) -> None:
+        """Remove todas as entradas do cache."""
+        self._dados.clear()
+    
+    def __contains__(self, chave: Hashable) -> bool:
+        return chave in self._dados
+    
+    def __len__(self) -> int:
+        return len(self._dados)
@@ -0,0 +1,412 @@
+"""
+Compilação de expressões dos templates de payload.
+Reconhece expressões simples (projeções de colunas, conversões de tipo e
+f-strings) para avaliá-las sobre colunas inteiras, mantendo a avaliação
+linha a linha para expressões arbitrárias.
+"""
+
+import ast
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .logger import TotalizadorErros, configurar_logger
+
+logger = configurar_logger(__name__)
+
+
+# Trechos que indicam que um campo string é uma expressão Python
+GATILHOS_EXPRESSAO = ('linha[', 'timestamp', 'float(', 'int(', 'str(')
+
+# Funções disponíveis para as expressões
+FUNCOES_PERMITIDAS: Dict[str, Callable] = {
+    'int': int,
+    'float': float,
+    'str': str,
+    'len': len,
+}
+
+# Função que recebe o nome da coluna e devolve a sequência de valores
+ObterColuna = Callable[[str], Sequence[Any]]
+
+# Kernel vetorizado: (obter_coluna, total_linhas, timestamp) -> valores
+Kernel = Callable[[ObterColuna, int, int], Sequence[Any]]
+
+
+def eh_expressao(campo: Any) -> bool:
+    """
+    Verifica se um campo do template deve ser avaliado como expressão.
+    
+    Args:
+        campo: Campo do template
+    
+    Returns:
+        True se o campo for uma string com referências Python
+    """
+    return isinstance(campo, str) and any(gatilho in campo for gatilho in GATILHOS_EXPRESSAO)
+
+
+def eh_codigo(campo: Any) -> bool:
+    """
+    Verifica se um campo é claramente código: lê a linha do CSV.
+    Campos que só contêm gatilhos como 'timestamp' ou 'str(' podem ser texto
+    (ex: 'env:timestamp'), enviado literalmente se não avaliar.
+    
+    Args:
+        campo: Campo do template
+    
+    Returns:
+        True se o campo for uma string que referencia linha[...]
+    """
+    return isinstance(campo, str) and 'linha[' in campo
+
+
+def criar_contexto(timestamp: int) -> Dict[str, Any]:
+    """
+    Cria o contexto seguro de avaliação das expressões.
+    
+    Args:
+        timestamp: Timestamp Unix da execução
+    
+    Returns:
+        Contexto sem a variável 'linha', que é definida a cada avaliação
+    """
+    contexto: Dict[str, Any] = {'linha': None, 'timestamp': timestamp}
+    contexto.update(FUNCOES_PERMITIDAS)
+    return contexto
+
+
+class ExpressaoCompilada:
+    """Expressão de template compilada uma única vez por execução."""
+    
+    def __init__(self, campo: Any):
+        """
+        Compila um campo do template.
+        
+        Args:
+            campo: Campo do template (string com expressão, literal ou número)
+        """
+        self.fonte = campo
+        self.constante = not eh_expressao(campo)
+        self.codigo = None
+        self.colunas: Optional[Tuple[str, ...]] = None
+        # Problemas detectados na compilação (usados pela validação prévia)
+        self.erro_sintaxe: Optional[str] = None
+        self.nomes_desconhecidos: Tuple[str, ...] = ()
+        self._kernel: Optional[Kernel] = None
+        
+        if self.constante:
+            self.colunas = ()
+            return
+        
+        try:
+            arvore = ast.parse(campo, mode='eval')
+            self.codigo = compile(arvore, '<template>', 'eval')
+        except SyntaxError as e:
+            # Erro reproduzido (e logado) a cada avaliação, como no eval original
+            self.erro_sintaxe = e.msg
+            return
+        
+        self.colunas = _colunas_referenciadas(arvore)
+        self.nomes_desconhecidos = _nomes_desconhecidos(arvore)
+        self._kernel = _construir_kernel(arvore.body)
+    
+    @property
+    def vetorizavel(self) -> bool:
+        """Indica se a expressão pode ser avaliada sobre colunas inteiras."""
+        return self.constante or self._kernel is not None
+    
+    def avaliar(self, contexto: Dict[str, Any], erros: Optional[TotalizadorErros] = None) -> Any:
+        """
+        Avalia a expressão para uma linha.
+        Em caso de erro, retorna o próprio campo do template.
+        
+        Args:
+            contexto: Contexto com a variável 'linha' da linha atual
+            erros: Se informado, os erros são totalizados nele em vez de logados
+        
+        Returns:
+            Valor avaliado
+        """
+        if self.constante:
+            return self.fonte
+        
+        try:
+            if self.codigo is None:
+                # Reproduz o SyntaxError da expressão
+                return eval(self.fonte, {"__builtins__": {}}, contexto)
+            return eval(self.codigo, {"__builtins__": {}}, contexto)
+        except Exception as e:
+            if erros is not None:
+                erros.registrar(f"expressão '{self.fonte}'", e)
+            else:
+                logger.warning("Erro ao avaliar expressão '%s': %s", self.fonte, e)
+            return self.fonte
+    
+    def avaliar_colunas(self, obter_coluna: ObterColuna, total: int, timestamp: int) -> Sequence[Any]:
+        """
+        Avalia a expressão sobre todas as linhas de uma vez.
+        
+        Args:
+            obter_coluna: Função que retorna os valores de uma coluna
+            total: Número de linhas
+            timestamp: Timestamp Unix da execução
+        
+        Returns:
+            Sequência com um valor por linha
+        
+        Raises:
+            ValueError: Se a expressão não for vetorizável
+            Exception: Qualquer erro de avaliação (o chamador deve usar
+                a avaliação linha a linha nesse caso)
+        """
+        if self.constante:
+            return [self.fonte] * total
+        
+        if self._kernel is None:
+            raise ValueError(f"Expressão não vetorizável: {self.fonte}")
+        
+        return self._kernel(obter_coluna, total, timestamp)
+
+
+def compilar_expressao(campo: Any) -> ExpressaoCompilada:
+    """
+    Compila um campo do template.
+    
+    Args:
+        campo: Campo do template
+    
+    Returns:
+        Expressão compilada
+    """
+    return ExpressaoCompilada(campo)
+
+
+def _coluna_do_subscript(no: ast.AST) -> Optional[str]:
+    """Retorna o nome da coluna se o nó for exatamente linha['coluna']."""
+    if (
+        isinstance(no, ast.Subscript)
+        and isinstance(no.value, ast.Name)
+        and no.value.id == 'linha'
+        and isinstance(no.slice, ast.Constant)
+        and isinstance(no.slice.value, str)
+    ):
+        return no.slice.value
+    return None
+
+
+def _colunas_referenciadas(arvore: ast.AST) -> Optional[Tuple[str, ...]]:
+    """
+    Lista as colunas lidas pela expressão.
+    
+    Returns:
+        Tupla com os nomes das colunas, ou None se 'linha' for usada de
+        outra forma (ex: linha.get(...) ou linha[variavel])
+    """
+    colunas: List[str] = []
+    subscripts = set()
+    
+    for no in ast.walk(arvore):
+        coluna = _coluna_do_subscript(no)
+        if coluna is not None:
+            subscripts.add(id(no.value))
+            if coluna not in colunas:
+                colunas.append(coluna)
+    
+    for no in ast.walk(arvore):
+        if isinstance(no, ast.Name) and no.id == 'linha' and id(no) not in subscripts:
+            return None
+    
+    return tuple(colunas)
+
+
+def _nomes_desconhecidos(arvore: ast.AST) -> Tuple[str, ...]:
+    """
+    Lista os nomes lidos pela expressão que não existem no contexto de avaliação
+    (falhariam com NameError em todas as linhas).
+    
+    Returns:
+        Tupla com os nomes desconhecidos, sem repetições
+    """
+    conhecidos = set(criar_contexto(0))
+    # Variáveis de compreensões e lambdas
+    for no in ast.walk(arvore):
+        if isinstance(no, ast.Name) and isinstance(no.ctx, ast.Store):
+            conhecidos.add(no.id)
+        elif isinstance(no, ast.arg):
+            conhecidos.add(no.arg)
+            
+    desconhecidos: List[str] = []
+    for no in ast.walk(arvore):
+        if isinstance(no, ast.Name) and isinstance(no.ctx, ast.Load) and no.id not in conhecidos:
+            if no.id not in desconhecidos:
+                desconhecidos.append(no.id)
+                
+    return tuple(desconhecidos)
+
+
+def _eh_chamada_str(no: ast.AST) -> bool:
+    """Verifica se o nó é uma chamada str(...) com um argumento."""
+    return (
+        isinstance(no, ast.Call)
+        and isinstance(no.func, ast.Name)
+        and no.func.id == 'str'
+        and len(no.args) == 1
+        and not no.keywords
+    )
+
+
+def _construir_kernel(no: ast.AST) -> Optional[Kernel]:
+    """
+    Constrói o kernel vetorizado para os formatos de expressão reconhecidos.
+    
+    Formatos suportados:
+        - Literais e a variável 'timestamp'
+        - linha['coluna']
+        - int(...), float(...), str(...) sobre formatos suportados
+        - str(...).zfill(N)
+        - f-strings cujas partes são formatos suportados, sem conversão
+          ou especificação de formato
+    
+    Returns:
+        Kernel ou None se a expressão exigir avaliação linha a linha
+    """
+    if isinstance(no, ast.Constant):
+        valor = no.value
+        return lambda obter, total, ts: [valor] * total
+    
+    if isinstance(no, ast.Name) and no.id == 'timestamp':
+        return lambda obter, total, ts: [ts] * total
+    
+    coluna = _coluna_do_subscript(no)
+    if coluna is not None:
+        return lambda obter, total, ts: obter(coluna)
+    
+    if isinstance(no, ast.Call) and len(no.args) == 1 and not no.keywords:
+        # int(...), float(...), str(...)
+        if isinstance(no.func, ast.Name) and no.func.id in ('int', 'float', 'str'):
+            funcao = FUNCOES_PERMITIDAS[no.func.id]
+            interno = _construir_kernel(no.args[0])
+            if interno is None:
+                return None
+            return lambda obter, total, ts: list(map(funcao, interno(obter, total, ts)))
+        
+        # str(...).zfill(N)
+        argumento = no.args[0]
+        if (
+            isinstance(no.func, ast.Attribute)
+            and no.func.attr == 'zfill'
+            and _eh_chamada_str(no.func.value)
+            and isinstance(argumento, ast.Constant)
+            and type(argumento.value) is int
+        ):
+            largura = argumento.value
+            interno = _construir_kernel(no.func.value)
+            if interno is None:
+                return None
+            return lambda obter, total, ts: [
+                texto.zfill(largura) for texto in interno(obter, total, ts)
+            ]
+        
+        return None
+    
+    if isinstance(no, ast.JoinedStr):
+        # f"a:{x}b:{y}" -> "a:{}b:{}".format, mesma semântica de format(valor, '')
+        formato = ''
+        kernels: List[Kernel] = []
+        for parte in no.values:
+            if isinstance(parte, ast.Constant) and isinstance(parte.value, str):
+                formato += parte.value.replace('{', '{{').replace('}', '}}')
+            elif (
+                isinstance(parte, ast.FormattedValue)
+                and parte.conversion == -1
+                and parte.format_spec is None
+            ):
+                interno = _construir_kernel(parte.value)
+                if interno is None:
+                    return None
+                formato += '{}'
+                kernels.append(interno)
+            else:
+                return None
+        
+        formatar = formato.format
+        if not kernels:
+            texto = formatar()
+            return lambda obter, total, ts: [texto] * total
+        
+        return lambda obter, total, ts: list(
+            map(formatar, *[kernel(obter, total, ts) for kernel in kernels])
+        )
+    
+    return None
+
+
+class FiltroCompilado:
+    """Predicado de filtro de linhas, avaliado sobre os valores brutos (texto) do CSV."""
+    
+    def __init__(self, expressao: str):
+        """
+        Compila o predicado.
+        
+        Args:
+            expressao: Expressão Python que usa linha['coluna'] (ex: "linha['region'] == 'us-east-1'")
+            
+        Raises:
+            ValueError: Se a expressão for vazia ou tiver erro de sintaxe
+        """
+        if not isinstance(expressao, str) or not expressao.strip():
+            raise ValueError("Filtro deve ser uma expressão Python não vazia")
+        
+        try:
+            arvore = ast.parse(expressao, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Erro de sintaxe no filtro '{expressao}': {e.msg}") from e
+        
+        self.fonte = expressao
+        self.codigo = compile(arvore, '<filtro>', 'eval')
+        self.colunas = _colunas_referenciadas(arvore)
+        self._contexto = criar_contexto(0)
+        del self._contexto['timestamp']
+    
+    def aceitar(
+        self,
+        linha: Dict[str, Optional[str]],
+        erros: Optional[TotalizadorErros] = None,
+        numero_linha: Optional[int] = None
+    ) -> bool:
+        """
+        Avalia o predicado para uma linha.
+        Linhas em que o predicado gera erro são rejeitadas.
+        
+        Args:
+            linha: Valores brutos das colunas lidas pelo filtro
+            erros: Se informado, os erros são totalizados nele em vez de logados
+            numero_linha: Número da linha do CSV (para o totalizador)
+            
+        Returns:
+            True se a linha deve ser mantida
+        """
+        self._contexto['linha'] = linha
+        try:
+            return bool(eval(self.codigo, {"__builtins__": {}}, self._contexto))
+        except Exception as e:
+            if erros is not None:
+                erros.registrar(f"filtro '{self.fonte}'", e, numero_linha)
+            else:
+                logger.warning("Erro ao avaliar filtro '%s': %s", self.fonte, e)
+            return False
+
+
+def compilar_filtro(expressao: str) -> FiltroCompilado:
+    """
+    Compila o predicado de filtro de linhas do evento.
+    
+    Args:
+        expressao: Expressão Python do filtro
+        
+    Returns:
+        Filtro compilado
+        
+    Raises:
+        ValueError: Se a expressão for inválida
+    """
+    return FiltroCompilado(expressao)
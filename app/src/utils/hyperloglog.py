@@ -0,0 +1,81 @@
+"""
+Estimativa de cardinalidade (número de valores distintos) em memória limitada.
+"""
+
+import hashlib
+import math
+
+
+def hash64(texto: str) -> int:
+    """
+    Hash estável de 64 bits (o hash() do Python muda a cada processo).
+    
+    Args:
+        texto: Texto a resumir
+        
+    Returns:
+        Inteiro sem sinal de 64 bits
+    """
+    return int.from_bytes(
+        hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'little'
+    )
+
+
+class HyperLogLog:
+    """
+    Sketch HyperLogLog: estima valores distintos com 2^precisao bytes,
+    com erro padrão de aproximadamente 1.04 / sqrt(2^precisao).
+    """
+    
+    __slots__ = ('precisao', '_registradores', '_bits_resto', '_mascara_resto')
+    
+    def __init__(self, precisao: int = 12):
+        """
+        Inicializa um sketch vazio.
+        
+        Args:
+            precisao: Bits do hash usados para escolher o registrador (4 a 16)
+            
+        Raises:
+            ValueError: Se a precisão estiver fora do intervalo
+        """
+        if not 4 <= precisao <= 16:
+            raise ValueError(f"Precisão do HyperLogLog deve estar entre 4 e 16: {precisao}")
+        
+        self.precisao = precisao
+        self._registradores = bytearray(1 << precisao)
+        self._bits_resto = 64 - precisao
+        self._mascara_resto = (1 << self._bits_resto) - 1
+    
+    def adicionar(self, valor_hash: int) -> None:
+        """
+        Adiciona um valor ao sketch.
+        
+        Args:
+            valor_hash: Hash de 64 bits do valor (ver hash64)
+        """
+        indice = valor_hash >> self._bits_resto
+        resto = valor_hash & self._mascara_resto
+        # Posição do primeiro bit 1 nos bits restantes
+        posicao = self._bits_resto - resto.bit_length() + 1
+        if posicao > self._registradores[indice]:
+            self._registradores[indice] = posicao
+    
+    def estimar(self) -> int:
+        """
+        Estima o número de valores distintos adicionados.
+        
+        Returns:
+            Estimativa da cardinalidade
+        """
+        total = len(self._registradores)
+        alfa = 0.7213 / (1 + 1.079 / total)
+        soma = math.fsum(2.0 ** -registrador for registrador in self._registradores)
+        estimativa = alfa * total * total / soma
+        
+        # Correção para cardinalidades pequenas (contagem linear)
+        zeros = self._registradores.count(0)
+        if estimativa <= 2.5 * total and zeros:
+            estimativa = total * math.log(total / zeros)
+            
+        return int(round(estimativa))
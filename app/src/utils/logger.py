@@ -1,15 +1,193 @@
 """
 Utilitário para configuração de logging.
+Logs em texto ou, com LOG_FORMATO=json, em JSON (um objeto por linha,
+pesquisável no CloudWatch Logs Insights), com formatação preguiçosa (argumentos no estilo %s, formatados apenas se o
+registro for emitido) e limite por mensagem: depois de LOG_LIMITE_POR_MENSAGEM
+ocorrências da mesma mensagem, apenas 1 a cada LOG_AMOSTRAGEM é emitida, e as
+suprimidas são resumidas ao final da invocação.
 """
 
+import json
 import logging
+import os
 import sys
-from typing import Optional
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, List, Optional
+
+# Formato dos logs: 'texto' ou 'json'
+LOG_FORMATO = os.environ.get('LOG_FORMATO', 'texto').lower()
+LOG_NIVEL = os.environ.get('LOG_NIVEL', 'INFO').upper()
+# Ocorrências de cada mensagem emitidas antes da amostragem
+LOG_LIMITE_POR_MENSAGEM = int(os.environ.get('LOG_LIMITE_POR_MENSAGEM', '20'))
+# Depois do limite, emite 1 a cada N ocorrências (0 suprime todas)
+LOG_AMOSTRAGEM = int(os.environ.get('LOG_AMOSTRAGEM', '1000'))
+
+
+class FormatadorJSON(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma linha."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        dados: Dict[str, Any] = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensagem': record.getMessage()
+        }
+        
+        # Campos estruturados: logger.info("...", extra={'campos': {...}})
+        campos = getattr(record, 'campos', None)
+        if campos:
+            dados.update(campos)
+            
+        ocorrencia = getattr(record, 'ocorrencia', None)
+        if ocorrencia is not None:
+            dados['ocorrencia'] = ocorrencia
+            
+        if record.exc_info:
+            dados['excecao'] = self.formatException(record.exc_info)
+            
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class LimitadorLogs(logging.Filter):
+    """
+    Limita as ocorrências de cada mensagem. A chave é o template da mensagem
+    (antes da formatação) ou extra={'chave': ...}; mensagens montadas com
+    f-string têm texto único e nunca são limitadas.
+    """
+    
+    def __init__(self, limite: int, amostragem: int):
+        """
+        Inicializa o limitador.
+        
+        Args:
+            limite: Ocorrências emitidas de cada mensagem antes da amostragem
+            amostragem: Depois do limite, emite 1 a cada N ocorrências (0 suprime todas)
+        """
+        super().__init__()
+        self.limite = limite
+        self.amostragem = amostragem
+        self._trava = threading.Lock()
+        self._ocorrencias: Dict[Hashable, int] = {}
+        self._suprimidas: Dict[Hashable, int] = {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        chave = getattr(record, 'chave', None) or (record.name, record.msg)
+        
+        with self._trava:
+            ocorrencia = self._ocorrencias.get(chave, 0) + 1
+            self._ocorrencias[chave] = ocorrencia
+            
+            if ocorrencia <= self.limite:
+                return True
+            
+            if self.amostragem and (ocorrencia - self.limite) % self.amostragem == 0:
+                record.ocorrencia = ocorrencia
+                return True
+            
+            self._suprimidas[chave] = self._suprimidas.get(chave, 0) + 1
+            return False
+    
+    def resumir(self, logger: logging.Logger) -> int:
+        """
+        Loga quantas vezes cada mensagem foi suprimida e zera as contagens
+        (chamado ao final de cada invocação, pois o container é reutilizado).
+        
+        Args:
+            logger: Logger que emite o resumo
+            
+        Returns:
+            Total de registros suprimidos
+        """
+        with self._trava:
+            suprimidas = self._suprimidas
+            self._ocorrencias = {}
+            self._suprimidas = {}
+            
+        for chave, total in suprimidas.items():
+            nome, mensagem = chave if isinstance(chave, tuple) and len(chave) == 2 else ('', chave)
+            logger.warning(
+                "Mensagem repetida suprimida %s vezes: %s",
+                total, mensagem,
+                extra={'campos': {'suprimidas': total, 'origem': nome}, 'chave': ('resumo', chave)}
+            )
+        
+        return sum(suprimidas.values())
+
+
+class TotalizadorErros:
+    """
+    Agrega erros repetidos (ex: a mesma expressão falhando em muitas linhas)
+    em uma contagem por chave, logada uma única vez.
+    """
+    
+    def __init__(self):
+        """Inicializa o totalizador vazio."""
+        # Chave -> [total, primeira linha, primeiro erro]
+        self.erros: Dict[str, List[Any]] = {}
+    
+    def registrar(self, chave: str, erro: Exception, linha: Optional[int] = None) -> None:
+        """
+        Registra uma ocorrência de erro.
+        
+        Args:
+            chave: O que falhou (ex: "expressão 'float(linha['valor'])'")
+            erro: Exceção da ocorrência
+            linha: Número da linha do CSV (se conhecido)
+        """
+        registro = self.erros.get(chave)
+        if registro is None:
+            self.erros[chave] = [1, linha, erro]
+        else:
+            registro[0] += 1
+    
+    @property
+    def total(self) -> int:
+        """Total de ocorrências registradas."""
+        return sum(registro[0] for registro in self.erros.values())
+    
+    def resumo(self) -> List[Dict[str, Any]]:
+        """
+        Lista os erros agregados (ex: para a resposta de uma simulação).
+        
+        Returns:
+            Um dicionário por chave, com o total, a primeira linha e o primeiro erro
+        """
+        return [
+            {'origem': chave, 'ocorrencias': total, 'primeira_linha': linha, 'erro': str(erro)}
+            for chave, (total, linha, erro) in self.erros.items()
+        ]
+    
+    def logar(self, logger: logging.Logger, contexto: str) -> None:
+        """
+        Emite um warning por chave, com o total e a primeira ocorrência.
+        
+        Args:
+            logger: Logger que emite os warnings
+            contexto: Prefixo das mensagens (ex: 'Template 2')
+        """
+        for chave, (total, linha, erro) in self.erros.items():
+            campos = {'contexto': contexto, 'origem_erro': chave, 'ocorrencias': total, 'primeira_linha': linha}
+            if linha is None:
+                logger.warning(
+                    "%s: %s erro(s) em %s; primeiro: %s",
+                    contexto, total, chave, erro, extra={'campos': campos}
+                )
+            else:
+                logger.warning(
+                    "%s: %s erro(s) em %s; primeiro (linha %s): %s",
+                    contexto, total, chave, linha, erro, extra={'campos': campos}
+                )
+
+
+# Compartilhado por todos os loggers da aplicação
+LIMITADOR = LimitadorLogs(LOG_LIMITE_POR_MENSAGEM, LOG_AMOSTRAGEM)
 
 
 def configurar_logger(
     nome: str,
-    nivel: int = logging.INFO,
+    nivel: Optional[int] = None,
     formato: Optional[str] = None
 ) -> logging.Logger:
     """
@@ -17,8 +195,8 @@ def configurar_logger(
     
     Args:
         nome: Nome do logger
-        nivel: Nível de logging (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        formato: Formato customizado de log (opcional)
+        nivel: Nível de logging (padrão: LOG_NIVEL)
+        formato: Formato de texto customizado (opcional; também substitui o JSON)
         
     Returns:
         Logger configurado
@@ -29,6 +207,11 @@ def configurar_logger(
     if logger.handlers:
         return logger
     
+    if nivel is None:
+        nivel = logging.getLevelName(LOG_NIVEL)
+        if not isinstance(nivel, int):
+            nivel = logging.INFO
+            
     logger.setLevel(nivel)
     
     # Criar handler para stdout
@@ -36,12 +219,13 @@ def configurar_logger(
     handler.setLevel(nivel)
     
     # Formato padrão
-    if formato is None:
-        formato = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    
-    formatter = logging.Formatter(formato)
+    if formato is None and LOG_FORMATO == 'json':
+        formatter: logging.Formatter = FormatadorJSON()
+    else:
+        formatter = logging.Formatter(formato or '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     handler.setFormatter(formatter)
     
     logger.addHandler(handler)
+    logger.addFilter(LIMITADOR)
     
     return logger
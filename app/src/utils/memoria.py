@@ -0,0 +1,131 @@
+"""
+Perfil de memória da Lambda: pico alocado por etapa (tracemalloc) e pico de RSS.
+Opcional (PERFIL_MEMORIA), pois o tracemalloc deixa as alocações bem mais lentas.
+"""
+
+import contextlib
+import sys
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - fora de sistemas Unix
+    resource = None
+
+MB = 1024 * 1024
+
+# Número de frames guardados por alocação (1 basta para agrupar por linha)
+FRAMES_RASTREADOS = 1
+
+
+def pico_rss_mb() -> Optional[float]:
+    """
+    Retorna o pico de RSS do processo em MB (None se indisponível).
+    Em um container reutilizado, é o pico desde o início do container.
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return round(pico / (MB if sys.platform == 'darwin' else 1024), 1)
+
+
+class PerfilMemoria:
+    """
+    Mede, para cada etapa, a memória alocada ao final, o pico durante a etapa e
+    as linhas de código que mais alocaram (comparação de snapshots do tracemalloc).
+    As etapas não devem ser aninhadas: cada uma reinicia o pico do tracemalloc.
+    """
+    
+    def __init__(self, ativo: bool = True, maiores_alocacoes: int = 3):
+        """
+        Inicializa o perfil, iniciando o tracemalloc se estiver ativo.
+        
+        Args:
+            ativo: Se False, as etapas não medem nada
+            maiores_alocacoes: Linhas de código listadas por etapa (0 dispensa os
+                snapshots, a parte mais cara do perfil)
+        """
+        self.ativo = ativo
+        self.maiores_alocacoes = maiores_alocacoes
+        self.etapas: Dict[str, Dict[str, Any]] = {}
+        self.pico_mb = 0.0
+        self._iniciou = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        
+        if ativo:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(FRAMES_RASTREADOS)
+                self._iniciou = True
+            if maiores_alocacoes:
+                self._snapshot = self._tirar_snapshot()
+    
+    @contextlib.contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        """
+        Mede uma etapa (uso com 'with').
+        
+        Args:
+            nome: Nome da etapa (ex: 'leitura')
+        """
+        if not self.ativo:
+            yield
+            return
+        
+        inicio, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            atual, pico = tracemalloc.get_traced_memory()
+            self.etapas[nome] = {
+                'alocado_mb': round(atual / MB, 2),
+                'variacao_mb': round((atual - inicio) / MB, 2),
+                'pico_mb': round(pico / MB, 2)
+            }
+            self.pico_mb = max(self.pico_mb, pico / MB)
+            
+            if self.maiores_alocacoes:
+                snapshot = self._tirar_snapshot()
+                self.etapas[nome]['maiores_alocacoes'] = self._maiores_alocacoes(snapshot)
+                self._snapshot = snapshot
+    
+    def resumo(self) -> Dict[str, Any]:
+        """
+        Resume o perfil (incluído no corpo da resposta da Lambda).
+        
+        Returns:
+            Dicionário com as etapas, o pico do tracemalloc e o pico de RSS (MB)
+        """
+        return {
+            'etapas': self.etapas,
+            'pico_tracemalloc_mb': round(self.pico_mb, 2),
+            'pico_rss_mb': pico_rss_mb()
+        }
+    
+    def encerrar(self) -> None:
+        """Para o tracemalloc, se foi iniciado por este perfil."""
+        self._snapshot = None
+        if self._iniciou:
+            tracemalloc.stop()
+            self._iniciou = False
+    
+    def _tirar_snapshot(self) -> tracemalloc.Snapshot:
+        """Tira um snapshot sem as alocações do próprio tracemalloc."""
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__)
+        ])
+    
+    def _maiores_alocacoes(self, snapshot: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        """Linhas de código com maior crescimento de memória desde o snapshot anterior."""
+        if self._snapshot is None:
+            return []
+        diferencas = snapshot.compare_to(self._snapshot, 'lineno')[:self.maiores_alocacoes]
+        return [
+            {
+                'origem': f"{diferenca.traceback[0].filename}:{diferenca.traceback[0].lineno}",
+                'variacao_mb': round(diferenca.size_diff / MB, 2)
+            }
+            for diferenca in diferencas
+        ]
@@ -0,0 +1,181 @@
+"""
+Telemetria da própria Lambda: cronômetros e contadores por etapa.
+Desativada, cada chamada se resume a um teste de atributo (custo desprezível).
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from ..config.constants import TIPOS_METRICA
+
+
+class _Cronometro:
+    """Context manager que soma o tempo decorrido ao nome na telemetria."""
+    
+    __slots__ = ('_telemetria', '_nome', '_inicio')
+    
+    def __init__(self, telemetria: 'Telemetria', nome: str):
+        self._telemetria = telemetria
+        self._nome = nome
+        self._inicio = 0.0
+    
+    def __enter__(self) -> '_Cronometro':
+        self._inicio = time.perf_counter()
+        return self
+    
+    def __exit__(self, *args) -> None:
+        self._telemetria.registrar_tempo(self._nome, time.perf_counter() - self._inicio)
+
+
+class _CronometroNulo:
+    """Cronômetro da telemetria desativada (não mede nada)."""
+    
+    __slots__ = ()
+    
+    def __enter__(self) -> '_CronometroNulo':
+        return self
+    
+    def __exit__(self, *args) -> None:
+        pass
+
+
+_CRONOMETRO_NULO = _CronometroNulo()
+
+
+class Telemetria:
+    """
+    Acumula tempos, contadores e amostras (ex: latência de cada lote) de uma invocação.
+    Pode ser usada por várias threads (envio paralelo aos destinos).
+    """
+    
+    def __init__(self, ativa: bool = True):
+        """
+        Inicializa a telemetria.
+        
+        Args:
+            ativa: Se False, cronômetros e contadores não registram nada
+        """
+        self.ativa = ativa
+        self._trava = threading.Lock()
+        self.tempos: Dict[str, float] = {}
+        self.contadores: Dict[str, float] = {}
+        self.amostras: Dict[str, List[float]] = {}
+    
+    def cronometro(self, nome: str) -> Any:
+        """
+        Cria um cronômetro para uso com 'with'; o tempo é somado ao do nome
+        (chamadas repetidas, inclusive de threads diferentes, acumulam).
+        
+        Args:
+            nome: Nome da etapa (ex: 's3.download')
+            
+        Returns:
+            Context manager
+        """
+        if not self.ativa:
+            return _CRONOMETRO_NULO
+        return _Cronometro(self, nome)
+    
+    def registrar_tempo(self, nome: str, segundos: float) -> None:
+        """Soma um tempo medido externamente ao nome."""
+        if not self.ativa:
+            return
+        with self._trava:
+            self.tempos[nome] = self.tempos.get(nome, 0.0) + segundos
+    
+    def incrementar(self, nome: str, valor: float = 1) -> None:
+        """
+        Incrementa um contador.
+        
+        Args:
+            nome: Nome do contador (ex: 'envio.retentativas')
+            valor: Incremento
+        """
+        if not self.ativa:
+            return
+        with self._trava:
+            self.contadores[nome] = self.contadores.get(nome, 0) + valor
+    
+    def observar(self, nome: str, valor: float) -> None:
+        """
+        Guarda uma amostra para o cálculo de percentis.
+        
+        Args:
+            nome: Nome da distribuição (ex: 'envio.lote_ms')
+            valor: Valor observado
+        """
+        if not self.ativa:
+            return
+        with self._trava:
+            self.amostras.setdefault(nome, []).append(valor)
+    
+    def resumo(self) -> Dict[str, Any]:
+        """
+        Resume o que foi registrado (incluído no corpo da resposta da Lambda).
+        
+        Returns:
+            Dicionário com tempos_ms, contadores e distribuições (n, p50, p95 e máximo)
+        """
+        with self._trava:
+            return {
+                'tempos_ms': {nome: round(segundos * 1000, 3) for nome, segundos in self.tempos.items()},
+                'contadores': dict(self.contadores),
+                'distribuicoes': {
+                    nome: self._distribuicao(valores) for nome, valores in self.amostras.items()
+                }
+            }
+    
+    def series(
+        self,
+        prefixo: str,
+        timestamp: int,
+        tags: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Converte a telemetria em séries do Datadog: '<prefixo>.<etapa>.duracao_ms'
+        (gauge), '<prefixo>.<contador>' (count) e '<prefixo>.<distribuição>.<estatística>'.
+        
+        Args:
+            prefixo: Prefixo das métricas (ex: 'lambda_to_datadog')
+            timestamp: Timestamp dos pontos
+            tags: Tags de todas as séries
+            
+        Returns:
+            Lista de métricas no formato do Datadog
+        """
+        resumo = self.resumo()
+        tags = list(tags or [])
+        valores = [
+            (f"{prefixo}.{nome}.duracao_ms", TIPOS_METRICA['gauge'], valor)
+            for nome, valor in resumo['tempos_ms'].items()
+        ]
+        valores += [
+            (f"{prefixo}.{nome}", TIPOS_METRICA['count'], valor) for nome, valor in resumo['contadores'].items()
+        ]
+        valores += [
+            (f"{prefixo}.{nome}.{estatistica}", TIPOS_METRICA['gauge'], valor)
+            for nome, distribuicao in resumo['distribuicoes'].items()
+            for estatistica, valor in distribuicao.items()
+            if estatistica != 'n'
+        ]
+        return [
+            {'metric': nome, 'type': tipo, 'points': [[timestamp, float(valor)]], 'tags': tags}
+            for nome, tipo, valor in valores
+        ]
+    
+    @staticmethod
+    def _distribuicao(valores: List[float]) -> Dict[str, float]:
+        """Calcula n, p50, p95 e máximo pelo método do posto mais próximo."""
+        ordenados = sorted(valores)
+        total = len(ordenados)
+        return {
+            'n': total,
+            'p50': ordenados[max(0, -(-total * 50 // 100) - 1)],
+            'p95': ordenados[max(0, -(-total * 95 // 100) - 1)],
+            'max': ordenados[-1]
+        }
+
+
+# Padrão dos serviços criados sem telemetria
+TELEMETRIA_DESATIVADA = Telemetria(ativa=False)
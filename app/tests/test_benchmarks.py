@@ -0,0 +1,47 @@
+"""
+Testes dos geradores de CSV e da comparação com a baseline dos benchmarks.
+"""
+
+import os
+import tempfile
+import unittest
+
+from app.benchmarks.executar import carregar_evento, comparar
+from app.benchmarks.geradores import GERADORES
+from app.src.services.csv_service import CSVService
+from app.src.services.payload_service import PayloadService
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Testes para app.benchmarks."""
+    
+    def test_geradores_compativeis_com_eventos(self):
+        """Testa que os CSVs gerados são processados pelos templates de exemplo."""
+        with tempfile.TemporaryDirectory() as diretorio:
+            for cenario, gerar in GERADORES.items():
+                caminho = os.path.join(diretorio, f"{cenario}.csv")
+                gerar(caminho, 100)
+                
+                tabela = CSVService().ler_csv(caminho)
+                metricas = PayloadService().processar_templates(tabela, carregar_evento(cenario)['payloads'])
+                
+                self.assertEqual(len(tabela), 100)
+                self.assertEqual(len(metricas), 100 * len(carregar_evento(cenario)['payloads']))
+    
+    def test_comparar_com_baseline(self):
+        """Testa a detecção de regressão, ajustada pela calibração da máquina."""
+        baseline = {'calibracao': 0.1, 'resultados': {'rds': {'10000': {'leitura': 1.0, 'envio': 1.0}}}}
+        resultados = {'rds': {'10000': {'leitura': 2.2, 'envio': 2.8, 'templates': 1.0}}}
+        
+        # Máquina duas vezes mais lenta: esperado 2.0s para as duas etapas
+        linhas = {linha['etapa']: linha for linha in comparar(resultados, 0.2, baseline, 0.25)}
+        
+        self.assertFalse(linhas['leitura']['regressao'])
+        self.assertAlmostEqual(linhas['leitura']['variacao'], 0.1)
+        self.assertTrue(linhas['envio']['regressao'])
+        self.assertIsNone(linhas['templates']['esperado'])
+        self.assertFalse(linhas['templates']['regressao'])
+
+
+if __name__ == '__main__':
+    unittest.main()
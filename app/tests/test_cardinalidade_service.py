@@ -0,0 +1,71 @@
+"""
+Testes unitários para a proteção de cardinalidade de tags.
+"""
+
+import unittest
+
+from app.src.services.cardinalidade_service import CardinalidadeService
+from app.src.utils.hyperloglog import HyperLogLog, hash64
+
+
+def _metricas(total, nome='aws.ecs.cpu'):
+    """Gera métricas com uma tag de baixa e outra de alta cardinalidade."""
+    ambiente = ['env:prod']
+    return [
+        {'metric': nome, 'type': 0, 'points': [[1, 1.0]], 'tags': ambiente + [f'task_arn:arn-{i}']}
+        for i in range(total)
+    ]
+
+
+class TestCardinalidadeService(unittest.TestCase):
+    """Testes para o CardinalidadeService e o HyperLogLog."""
+    
+    def test_estimativa_hyperloglog(self):
+        """Testa que a estimativa fica próxima do número real de distintos."""
+        sketch = HyperLogLog(12)
+        for i in range(50000):
+            sketch.adicionar(hash64(f'valor-{i % 20000}'))
+            
+        self.assertAlmostEqual(sketch.estimar(), 20000, delta=20000 * 0.05)
+    
+    def test_apenas_estima_sem_limite(self):
+        """Testa que sem limite as métricas passam intactas e a estimativa é reportada."""
+        servico = CardinalidadeService()
+        metricas = _metricas(100)
+        
+        self.assertIs(servico.aplicar(metricas), metricas)
+        self.assertEqual(servico.resumo()['estimativas'], {'aws.ecs.cpu': 100})
+    
+    def test_rejeitar(self):
+        """Testa descarte das métricas acima do limite."""
+        servico = CardinalidadeService(limite=50, acao='rejeitar')
+        
+        resultado = servico.aplicar(_metricas(100) + _metricas(10, 'aws.ecs.memoria'))
+        
+        self.assertEqual({m['metric'] for m in resultado}, {'aws.ecs.memoria'})
+        self.assertEqual(servico.series_descartadas, 100)
+    
+    def test_remover_tag(self):
+        """Testa remoção da tag de alta cardinalidade sem alterar as listas originais."""
+        servico = CardinalidadeService(limite=50, acao='remover_tag')
+        metricas = _metricas(100)
+        
+        resultado = servico.aplicar(metricas)
+        
+        self.assertEqual(len(resultado), 100)
+        self.assertEqual(resultado[0]['tags'], ['env:prod'])
+        self.assertEqual(metricas[0]['tags'], ['env:prod', 'task_arn:arn-0'])
+        self.assertEqual(servico.excedentes, {'aws.ecs.cpu': 'tags removidas: task_arn'})
+    
+    def test_truncar(self):
+        """Testa que apenas as primeiras séries distintas são mantidas."""
+        servico = CardinalidadeService(limite=50, acao='truncar')
+        
+        resultado = servico.aplicar(_metricas(100))
+        
+        self.assertEqual(len(resultado), 50)
+        self.assertEqual(resultado[-1]['tags'][1], 'task_arn:arn-49')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,13 +2,14 @@
 Testes unitários para o serviço de processamento de CSV.
 """
 
+import io
 import unittest
 import tempfile
 import os
-from unittest.mock import Mock
 
 from app.src.services.csv_service import CSVService
-from app.src.config.settings import Settings
+from app.src.services.multiplas_metricas_service import MultiplasMetricasService
+from app.src.utils.expressoes import compilar_filtro
 
 
 class TestCSVService(unittest.TestCase):
@@ -16,12 +17,10 @@ class TestCSVService(unittest.TestCase):
     
     def setUp(self):
         """Configuração inicial dos testes."""
-        # Mock das configurações
-        self.settings = Mock(spec=Settings)
-        self.csv_service = CSVService(self.settings)
+        self.csv_service = CSVService()
     
     def test_processar_csv_basico(self):
-        """Testa processamento básico de CSV."""
+        """Testa leitura do CSV e geração das métricas de múltiplas métricas."""
         # Criar arquivo CSV temporário
         with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as f:
             f.write('nome_metrica,valor\n')
@@ -30,10 +29,13 @@ class TestCSVService(unittest.TestCase):
             temp_file = f.name
         
         try:
-            # Processar CSV
-            metricas = self.csv_service.processar_csv(temp_file, 'ecs')
+            # Ler CSV e gerar métricas
+            tabela = self.csv_service.ler_csv(temp_file)
+            metricas = MultiplasMetricasService('ecs').processar(tabela)
             
             # Verificações
+            self.assertEqual(len(tabela), 2)
+            self.assertEqual(tabela[0]['valor'], 75.5)
             self.assertEqual(len(metricas), 2)
             self.assertEqual(metricas[0]['metric'], 'aws.ecs.cpu_utilization')
             self.assertEqual(metricas[0]['points'][0][1], 75.5)
@@ -45,15 +47,66 @@ class TestCSVService(unittest.TestCase):
     
     def test_processar_tags(self):
         """Testa processamento de tags."""
-        tags_resultado = self.csv_service._processar_tags(
-            'env:prod,service:api',
-            ['source:lambda']
-        )
+        tags_resultado = MultiplasMetricasService('ecs')._tags('env:prod;service:api')
         
         self.assertIn('source:lambda', tags_resultado)
         self.assertIn('env:prod', tags_resultado)
         self.assertIn('service:api', tags_resultado)
 
 
+class TestFiltroCSV(unittest.TestCase):
+    """Testes para o filtro de linhas na leitura do CSV."""
+    
+    def test_filtro_sobre_valores_brutos(self):
+        """Testa que o filtro descarta linhas antes da conversão."""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as f:
+            f.write('db,region,iops\n')
+            f.write('db-01,us-east-1,3000\n')
+            f.write('db-02,us-west-2,1000\n')
+            f.write('db-03,us-east-1,abc\n')
+            temp_file = f.name
+        
+        try:
+            tabela = CSVService().ler_csv(
+                temp_file,
+                filtro="linha['region'] == 'us-east-1' and linha['iops'] != 'abc'"
+            )
+            
+            self.assertEqual(len(tabela), 1)
+            self.assertEqual(tabela.linhas_filtradas, 2)
+            self.assertEqual(tabela[0]['iops'], 3000)
+            
+        finally:
+            os.unlink(temp_file)
+    
+    def test_filtro_com_erro_em_todas_as_linhas(self):
+        """Testa que um filtro que falha em todas as linhas interrompe a leitura."""
+        texto = io.StringIO('db,iops\ndb-01,abc\ndb-02,n/a\n', newline='')
+        
+        with self.assertLogs('app.src.services.csv_service', level='WARNING') as logs:
+            with self.assertRaises(ValueError) as contexto:
+                CSVService().ler_csv(texto, filtro="int(linha['iops']) > 0")
+                
+        self.assertIn('todas as 2 linhas', str(contexto.exception))
+        self.assertIn('2 erro(s)', logs.output[0])
+    
+    def test_filtro_com_erro_em_parte_das_linhas(self):
+        """Testa que erros parciais do filtro são totalizados e a leitura continua."""
+        texto = io.StringIO('db,iops\ndb-01,3000\ndb-02,abc\ndb-03,0\n', newline='')
+        
+        with self.assertLogs('app.src.services.csv_service', level='WARNING') as logs:
+            tabela = CSVService().ler_csv(texto, filtro="int(linha['iops']) > 0")
+            
+        self.assertEqual(len(tabela), 1)
+        self.assertEqual(tabela.linhas_filtradas, 2)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('linha 2', logs.output[0])
+    
+    def test_filtro_invalido(self):
+        """Testa que filtros com erro de sintaxe são rejeitados."""
+        with self.assertRaises(ValueError):
+            compilar_filtro("linha['region'] ==")
+
+
 if __name__ == '__main__':
     unittest.main()
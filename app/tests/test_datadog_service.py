@@ -0,0 +1,248 @@
+"""
+Testes unitários para o envio de métricas ao Datadog.
+"""
+
+import gzip
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+from app.src.config.settings import Settings
+from app.src.services.armazenamento_service import ArmazenamentoLocal
+from app.src.services.datadog_service import DatadogService
+from app.src.services.idempotencia_service import IdempotenciaService
+from app.src.services.transporte_service import TransporteDogStatsD
+from app.src.utils.telemetria import Telemetria
+
+
+class _Intake(BaseHTTPRequestHandler):
+    """Recebe as requisições e guarda (caminho, chave, séries)."""
+    
+    recebidas = []
+    
+    def do_POST(self):
+        corpo = self.rfile.read(int(self.headers['Content-Length']))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            corpo = gzip.decompress(corpo)
+            
+        if self.path.startswith('/falha'):
+            self.send_response(400)
+        else:
+            _Intake.recebidas.append(
+                (self.path, self.headers['DD-API-KEY'], json.loads(corpo)['series'])
+            )
+            self.send_response(202)
+        self.end_headers()
+    
+    def log_message(self, *args):
+        pass
+
+
+class TestDatadogService(unittest.TestCase):
+    """Testes para o DatadogService."""
+    
+    def setUp(self):
+        """Sobe um intake HTTP local."""
+        _Intake.recebidas = []
+        self.servidor = HTTPServer(('127.0.0.1', 0), _Intake)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.servidor.server_port}"
+    
+    def tearDown(self):
+        """Encerra o intake."""
+        self.servidor.shutdown()
+        self.servidor.server_close()
+    
+    def _servico(self, destinos, idempotencia=None):
+        ambiente = {
+            'DATADOG_DESTINOS': json.dumps(destinos),
+            'TAMANHO_LOTE': '2',
+            'MAX_TENTATIVAS': '0'
+        }
+        with mock.patch.dict(os.environ, ambiente):
+            settings = Settings()
+        for destino in settings.destinos_datadog:
+            destino.api_url = f"{self.url}/{destino.nome}"
+        return DatadogService(settings, idempotencia)
+    
+    def test_envio_para_varios_destinos(self):
+        """Testa que cada lote chega a todos os destinos com a chave de cada um."""
+        servico = self._servico([
+            {'nome': 'us', 'site': 'datadoghq.com', 'api_key': 'chave-us', 'app_key': 'a'},
+            {'nome': 'eu', 'site': 'datadoghq.eu', 'api_key': 'chave-eu', 'app_key': 'b'}
+        ])
+        metricas = [{'metric': 'custom.teste', 'type': 0, 'points': [[1, float(i)]]} for i in range(3)]
+        
+        resultado = servico.enviar_metricas_em_lotes(metricas)
+        
+        self.assertEqual(resultado['total_enviadas'], 3)
+        self.assertEqual(resultado['erros'], 0)
+        self.assertEqual(resultado['destinos']['eu']['lotes_enviados'], 2)
+        self.assertEqual(
+            sorted((caminho, chave, len(series)) for caminho, chave, series in _Intake.recebidas),
+            [('/eu', 'chave-eu', 1), ('/eu', 'chave-eu', 2), ('/us', 'chave-us', 1), ('/us', 'chave-us', 2)]
+        )
+    
+    def test_erro_contabilizado_por_destino(self):
+        """Testa que a falha de um destino não afeta os demais."""
+        servico = self._servico([
+            {'nome': 'us', 'api_key': 'chave-us', 'app_key': 'a'},
+            {'nome': 'falha', 'api_key': 'chave-x', 'app_key': 'b'}
+        ])
+        
+        resultado = servico.enviar_metricas_em_lotes(
+            [{'metric': 'custom.teste', 'type': 0, 'points': [[1, 1.0]]}]
+        )
+        
+        self.assertEqual(resultado['destinos']['us']['total_enviadas'], 1)
+        self.assertEqual(resultado['destinos']['falha']['erros'], 1)
+        self.assertEqual(resultado['total_enviadas'], 0)
+        self.assertEqual(resultado['erros'], 1)
+    
+    def test_retentativa_nao_reenvia_lotes_aceitos(self):
+        """Testa que uma retentativa da mesma invocação só envia os lotes restantes."""
+        destinos = [{'nome': 'us', 'api_key': 'chave-us', 'app_key': 'a'}]
+        
+        with tempfile.TemporaryDirectory() as diretorio:
+            armazenamento = ArmazenamentoLocal(diretorio)
+            
+            def metricas(timestamp):
+                return [{'metric': 'custom.teste', 'type': 1, 'points': [[timestamp, float(i)]]} for i in range(3)]
+            
+            primeira = self._servico(destinos, IdempotenciaService(armazenamento, 'req-1', 3600))
+            primeira.enviar_metricas_em_lotes(metricas(100)[:2])
+            
+            # Retentativa: mesmo request id, timestamps novos, um lote a mais
+            retentativa = self._servico(destinos, IdempotenciaService(armazenamento, 'req-1', 3600))
+            resultado = retentativa.enviar_metricas_em_lotes(metricas(200))
+            
+            self.assertEqual(resultado['lotes_repetidos'], 1)
+            self.assertEqual(resultado['total_enviadas'], 3)
+            self.assertEqual([len(series) for _, _, series in _Intake.recebidas], [2, 1])
+            
+            # Outra invocação envia tudo normalmente
+            outra = self._servico(destinos, IdempotenciaService(armazenamento, 'req-2', 3600))
+            self.assertEqual(outra.enviar_metricas_em_lotes(metricas(300))['lotes_repetidos'], 0)
+    
+    def test_limpeza_de_expirados_espacada(self):
+        """Testa que os estados expirados são removidos no máximo uma vez por intervalo."""
+        armazenamento = mock.Mock()
+        armazenamento.ler.return_value = None
+        armazenamento.remover_expirados.return_value = 0
+        
+        with mock.patch.dict('app.src.services.idempotencia_service._ULTIMA_LIMPEZA', clear=True):
+            IdempotenciaService(armazenamento, 'req-1', 3600)
+            IdempotenciaService(armazenamento, 'req-2', 3600)
+            self.assertEqual(armazenamento.remover_expirados.call_count, 1)
+            
+            with mock.patch('app.src.services.idempotencia_service.time.monotonic', return_value=10 ** 9):
+                IdempotenciaService(armazenamento, 'req-3', 3600)
+            self.assertEqual(armazenamento.remover_expirados.call_count, 2)
+    
+    def test_lotes_identicos_enviados_uma_vez_cada(self):
+        """Testa que lotes de mesmo conteúdo não são confundidos com retentativas."""
+        destinos = [{'nome': 'us', 'api_key': 'chave-us', 'app_key': 'a'}]
+        metricas = [{'metric': 'custom.teste', 'type': 1, 'points': [[1, 1.0]]}] * 6
+        
+        with tempfile.TemporaryDirectory() as diretorio:
+            armazenamento = ArmazenamentoLocal(diretorio)
+            
+            primeira = self._servico(destinos, IdempotenciaService(armazenamento, 'req-1', 3600, 2))
+            resultado = primeira.enviar_metricas_em_lotes(metricas[:4])
+            
+            self.assertEqual(resultado['lotes_repetidos'], 0)
+            self.assertEqual(len(_Intake.recebidas), 2)
+            
+            # Retentativa: só o terceiro lote idêntico é novo
+            retentativa = self._servico(destinos, IdempotenciaService(armazenamento, 'req-1', 3600, 2))
+            resultado = retentativa.enviar_metricas_em_lotes(metricas)
+            
+            self.assertEqual(resultado['lotes_repetidos'], 2)
+            self.assertEqual(resultado['total_enviadas'], 6)
+            self.assertEqual(len(_Intake.recebidas), 3)
+            
+            # O estado é gravado em segmentos incrementais
+            self.assertEqual(
+                sorted(nome for nome in os.listdir(diretorio) if nome.startswith('idempotencia-')),
+                sorted(
+                    f"{retentativa.idempotencia.prefixo_estado}-{numero}.json" for numero in range(2)
+                )
+            )
+    
+    def test_destinos_invalidos(self):
+        """Testa validação de DATADOG_DESTINOS."""
+        with mock.patch.dict(os.environ, {'DATADOG_DESTINOS': '[{"nome": "us"}]'}):
+            with self.assertRaises(ValueError):
+                Settings()
+    
+    def test_transporte_dogstatsd(self):
+        """Testa o envio ao agente local: várias linhas por datagrama, até o MTU."""
+        receptor = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receptor.bind(('127.0.0.1', 0))
+        receptor.settimeout(5)
+        self.addCleanup(receptor.close)
+        
+        ambiente = {'DATADOG_TRANSPORTE': 'dogstatsd', 'TAMANHO_LOTE': '100'}
+        with mock.patch.dict(os.environ, ambiente):
+            settings = Settings()
+        telemetria = Telemetria(ativa=True)
+        transporte = TransporteDogStatsD(
+            f"udp://127.0.0.1:{receptor.getsockname()[1]}", mtu=120, telemetria=telemetria
+        )
+        servico = DatadogService(settings, transporte=transporte)
+        
+        tags = ['env:prod']
+        metricas = [
+            {'metric': 'custom.fila', 'type': 1, 'points': [[1700000000, float(i)]], 'tags': tags, 'host': 'web-01'}
+            for i in range(5)
+        ] + [{'metric': 'custom.latencia', 'type': 0, 'points': [[1700000000, 0.25]]}]
+        
+        resultado = servico.enviar_metricas_em_lotes(metricas)
+        
+        linhas = []
+        while len(linhas) < len(metricas):
+            datagrama = receptor.recv(65535)
+            self.assertLessEqual(len(datagrama), 120)
+            linhas.extend(datagrama.decode('utf-8').split('\n'))
+            
+        self.assertEqual(resultado['destinos']['agente']['total_enviadas'], 6)
+        self.assertEqual(linhas[0], 'custom.fila:0|c|#env:prod,host:web-01|T1700000000')
+        self.assertEqual(linhas[-1], 'custom.latencia:0.25|g|T1700000000')
+        self.assertLess(len(transporte.serializar(metricas)), len(metricas))
+        self.assertGreater(telemetria.contadores['envio.datagramas'], 1)
+        
+        servico.fechar()
+        self.assertEqual(transporte.socket.fileno(), -1)
+    
+    def test_dogstatsd_rate_e_monotonic_count(self):
+        """Testa rate com interval convertido em count e tipos sem equivalente descartados."""
+        transporte = TransporteDogStatsD('udp://127.0.0.1:8125')
+        self.addCleanup(transporte.socket.close)
+        metricas = [
+            {'metric': 'custom.req', 'type': 2, 'interval': 10, 'points': [[1700000000, 1.5]]},
+            {'metric': 'custom.req', 'type': 2, 'points': [[1700000000, 1.5]]},
+            {'metric': 'custom.total', 'type': 3, 'points': [[1700000000, 42]]},
+            {'metric': 'custom.cpu', 'type': 0, 'points': [[1700000000, 1]],
+             'resources': [{'name': 'web-01', 'type': 'host'}]}
+        ]
+        
+        with self.assertLogs('app.src.services.transporte_service', level='WARNING') as logs:
+            datagramas = transporte.serializar(metricas)
+        
+        self.assertEqual(
+            b'\n'.join(datagramas).decode('utf-8').split('\n'),
+            ['custom.req:15|c|T1700000000', 'custom.cpu:1|g|T1700000000']
+        )
+        self.assertEqual(len(logs.output), 3)
+        self.assertIn('1 erro(s) em rate sem interval', logs.output[0])
+        self.assertIn('1 erro(s) em monotonic_count', logs.output[1])
+        self.assertIn("{'resources': 1}", logs.output[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
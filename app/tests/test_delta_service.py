@@ -0,0 +1,62 @@
+"""
+Testes unitários para o modo delta.
+"""
+
+import tempfile
+import unittest
+
+from app.src.services.armazenamento_service import ArmazenamentoLocal
+from app.src.services.delta_service import DeltaService
+
+
+def _metrica(valor, tags=('env:prod',)):
+    return {'metric': 'custom.iops', 'type': 0, 'points': [[1705315200, valor]], 'tags': list(tags)}
+
+
+class TestDeltaService(unittest.TestCase):
+    """Testes para o DeltaService."""
+    
+    def setUp(self):
+        """Configuração inicial dos testes."""
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.armazenamento = ArmazenamentoLocal(self.diretorio.name)
+    
+    def tearDown(self):
+        """Remove os arquivos temporários."""
+        self.diretorio.cleanup()
+    
+    def _servico(self, tamanho_maximo=100):
+        return DeltaService(self.armazenamento, 'estado.bin', tamanho_maximo, 3600)
+    
+    def test_envia_apenas_series_alteradas(self):
+        """Testa que séries com o mesmo valor não são reenviadas até o reenvio completo."""
+        primeira = self._servico()
+        self.assertEqual(len(primeira.filtrar([_metrica(1.0), _metrica(2.0, ['env:dev'])], agora=1000)), 2)
+        self.assertTrue(primeira.refresh_completo)
+        primeira.salvar()
+        
+        segunda = self._servico()
+        enviadas = segunda.filtrar([_metrica(1.0), _metrica(3.0, ['env:dev'])], agora=1300)
+        self.assertEqual([m['points'][0][1] for m in enviadas], [3.0])
+        self.assertEqual(segunda.series_inalteradas, 1)
+        segunda.salvar()
+        
+        terceira = self._servico()
+        self.assertEqual(len(terceira.filtrar([_metrica(1.0), _metrica(3.0, ['env:dev'])], agora=4600)), 2)
+        self.assertTrue(terceira.refresh_completo)
+    
+    def test_estado_limitado(self):
+        """Testa que o estado descarta as séries vistas há mais tempo."""
+        servico = self._servico(tamanho_maximo=2)
+        servico.filtrar([_metrica(1.0, [f'id:{i}']) for i in range(5)], agora=1000)
+        servico.salvar()
+        
+        recarregado = self._servico(tamanho_maximo=2)
+        enviadas = recarregado.filtrar([_metrica(1.0, [f'id:{i}']) for i in range(5)], agora=1100)
+        
+        # Apenas id:3 e id:4 permaneceram no estado
+        self.assertEqual([m['tags'] for m in enviadas], [['id:0'], ['id:1'], ['id:2']])
+
+
+if __name__ == '__main__':
+    unittest.main()
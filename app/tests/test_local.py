@@ -0,0 +1,110 @@
+"""
+Testes de ponta a ponta do handler com o S3 local e o intake falso do Datadog.
+"""
+
+import json
+import os
+import unittest
+
+from app.local.executar import executar
+from app.local.intake import IntakeFalso
+
+EXEMPLOS = os.path.join(os.path.dirname(__file__), '..', 'exemplos')
+
+
+class TestExecucaoLocal(unittest.TestCase):
+    """Testes para a execução local do lambda_handler."""
+    
+    def setUp(self):
+        """Carrega o evento e o CSV de exemplo do ECS."""
+        self.csv = os.path.join(EXEMPLOS, 'csvs', 'ecs-exemplo.csv')
+        with open(os.path.join(EXEMPLOS, 'eventos', 'eventbridge-ecs.json'), encoding='utf-8') as arquivo:
+            self.evento = json.load(arquivo)
+    
+    def test_handler_de_ponta_a_ponta(self):
+        """Testa o caminho completo: S3 (com GET condicional), templates e intake."""
+        intake = IntakeFalso(guardar_series=True)
+        
+        resultado = executar(self.csv, self.evento, repeticoes=2, intake=intake)
+        
+        self.assertEqual(resultado['falhas'], 0)
+        self.assertEqual(resultado['intake']['series'], 6)
+        self.assertTrue(resultado['respostas'][0]['csv_modificado'])
+        self.assertFalse(resultado['respostas'][1]['csv_modificado'])
+        self.assertEqual(intake.series[0]['metric'], 'custom_aws.ecs.task.cpu_limit')
+        self.assertIn('env:production', intake.series[0]['tags'])
+    
+    def test_intake_rejeita_payload(self):
+        """Testa que respostas 413 do intake são contabilizadas como erro do lote."""
+        resultado = executar(
+            self.csv,
+            self.evento,
+            linhas=10,
+            intake=IntakeFalso(taxa_413=1.0),
+            variaveis={'TAMANHO_LOTE': '4', 'MAX_TENTATIVAS': '0'}
+        )
+        
+        self.assertEqual(resultado['intake']['por_status'], {413: 3})
+        self.assertEqual(resultado['respostas'][0]['destinos']['principal']['erros'], 3)
+        self.assertEqual(resultado['intake']['series'], 0)
+
+    def test_simulacao(self):
+        """Testa que a simulação avalia uma amostra por GET parcial e não envia nada."""
+        evento = {**self.evento, 'simulacao': True, 'linhas_simulacao': 2}
+        
+        resultado = executar(self.csv, evento, linhas=1000)
+        
+        resposta = resultado['respostas'][0]
+        self.assertTrue(resposta['simulacao'])
+        self.assertEqual(resposta['linhas_amostradas'], 2)
+        self.assertEqual(resposta['metricas'][1]['tags'][1], 'cluster:prod-cluster')
+        self.assertEqual(resposta['erros_templates'], [])
+        # Apenas o GET parcial do início do CSV
+        self.assertEqual(resultado['requisicoes_s3'], 1)
+        self.assertEqual(resultado['intake']['requisicoes'], 0)
+    
+    def test_coluna_inexistente_falha_antes_do_download(self):
+        """Testa que templates com colunas fora do header falham sem baixar o CSV."""
+        evento = json.loads(json.dumps(self.evento))
+        evento['payloads'][0]['points'][0]['value'] = "float(linha['cpu'])"
+        
+        resultado = executar(self.csv, evento)
+        
+        resposta = resultado['respostas'][0]
+        self.assertEqual(resposta['statusCode'], 500)
+        self.assertIn("colunas inexistentes no CSV: ['cpu']", resposta['erro'])
+        self.assertEqual(resultado['requisicoes_s3'], 1)
+        self.assertEqual(resultado['intake']['requisicoes'], 0)
+    
+    def test_telemetria(self):
+        """Testa tempos e contadores na resposta e as séries de telemetria no lote final."""
+        intake = IntakeFalso(taxa_429=0.8, retry_after=0, guardar_series=True, semente=0)
+        
+        resultado = executar(
+            self.csv,
+            self.evento,
+            intake=intake,
+            variaveis={
+                'TAMANHO_LOTE': '2', 'MAX_TENTATIVAS': '20', 'DELAY_RETRY': '0',
+                'TELEMETRIA_METRICAS': 'true'
+            }
+        )
+        
+        telemetria = resultado['respostas'][0]['telemetria']
+        self.assertEqual(resultado['falhas'], 0)
+        self.assertTrue({'download', 'leitura', 'templates', 'envio', 'total'} <= set(telemetria['tempos_ms']))
+        self.assertEqual(telemetria['contadores']['envio.lotes'], 2)
+        # O lote de telemetria também pode receber 429, depois do resumo
+        self.assertGreaterEqual(telemetria['contadores']['envio.retentativas'], 1)
+        self.assertLessEqual(telemetria['contadores']['envio.retentativas'], resultado['intake']['por_status'][429])
+        self.assertEqual(telemetria['distribuicoes']['envio.lote_ms']['n'], 2)
+        
+        # As 3 métricas do CSV chegam antes das séries de telemetria
+        nomes = [serie['metric'] for serie in intake.series]
+        self.assertTrue(all(not nome.startswith('lambda_to_datadog.') for nome in nomes[:3]))
+        self.assertIn('lambda_to_datadog.envio.duracao_ms', nomes[3:])
+        self.assertIn('lambda_to_datadog.metricas.enviadas', nomes[3:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Testes do perfil de memória e do orçamento de memória dos benchmarks.
+"""
+
+import tempfile
+import tracemalloc
+import unittest
+
+from app.benchmarks.executar import medir_memoria
+from app.local.executar import silenciar_logs
+from app.src.utils.memoria import PerfilMemoria
+
+
+class TestMemoria(unittest.TestCase):
+    """Testes para PerfilMemoria e o pico de memória do handler."""
+    
+    def test_perfil_por_etapa(self):
+        """Testa o pico e a variação de cada etapa e as maiores alocações."""
+        perfil = PerfilMemoria(maiores_alocacoes=1)
+        try:
+            with perfil.etapa('alocacao'):
+                dados = [bytearray(1024) for _ in range(2048)]
+            with perfil.etapa('liberacao'):
+                del dados
+        finally:
+            perfil.encerrar()
+            
+        etapas = perfil.resumo()['etapas']
+        self.assertGreaterEqual(etapas['alocacao']['pico_mb'], 2)
+        self.assertGreaterEqual(etapas['alocacao']['variacao_mb'], 2)
+        self.assertLessEqual(etapas['liberacao']['variacao_mb'], -2)
+        self.assertIn('test_memoria.py', etapas['alocacao']['maiores_alocacoes'][0]['origem'])
+        self.assertFalse(tracemalloc.is_tracing())
+    
+    def test_perfil_desativado(self):
+        """Testa que o perfil desativado não inicia o tracemalloc."""
+        perfil = PerfilMemoria(ativo=False)
+        with perfil.etapa('leitura'):
+            self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(perfil.etapas, {})
+    
+    def test_pico_do_handler_dentro_do_orcamento(self):
+        """Testa que o pico de memória dos cenários de benchmark fica dentro do orçamento."""
+        silenciar_logs()
+        with tempfile.TemporaryDirectory() as diretorio:
+            for cenario in ('rds', 'ecs'):
+                medicao = medir_memoria(cenario, 10000, diretorio)
+                
+                self.assertFalse(
+                    medicao['excedeu'],
+                    f"{cenario}: pico de {medicao['pico_mb']:.1f} MB, orçamento {medicao['orcamento_mb']:.1f} MB"
+                )
+                self.assertIn('templates', medicao['etapas'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Testes unitários para o serviço do formato de múltiplas métricas.
+"""
+
+import os
+import tempfile
+import unittest
+
+from app.src.services.csv_service import CSVService
+from app.src.services.multiplas_metricas_service import MultiplasMetricasService
+
+
+class TestMultiplasMetricasService(unittest.TestCase):
+    """Testes para o MultiplasMetricasService."""
+    
+    def _ler(self, conteudo: str):
+        """Grava o conteúdo em um CSV temporário e o lê como tabela."""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as f:
+            f.write(conteudo)
+            temp_file = f.name
+            
+        try:
+            return CSVService().ler_csv(temp_file)
+        finally:
+            os.unlink(temp_file)
+    
+    def test_processar_rds(self):
+        """Testa prefixo, nomes comuns, tipo e tags padrão."""
+        tabela = self._ler(
+            'nome_metrica,valor,timestamp,tags,tipo,host,intervalo\n'
+            'conexoes,87,1705315200,env:producao;instance:db-01,count,rds-01,300\n'
+        )
+        
+        metricas = MultiplasMetricasService('rds').processar(tabela)
+        
+        self.assertEqual(metricas, [{
+            'metric': 'aws.rds.database_connections',
+            'type': 1,
+            'points': [[1705315200, 87.0]],
+            'tags': ['source:lambda', 'aws_service:rds', 'env:producao', 'instance:db-01'],
+            'host': 'rds-01',
+            'interval': 300
+        }])
+    
+    def test_valor_invalido_descartado(self):
+        """Testa que linhas com valor inválido são descartadas."""
+        tabela = self._ler('nome_metrica,valor\nlatencia,120\nerros,abc\n')
+        
+        metricas = MultiplasMetricasService().processar(tabela)
+        
+        self.assertEqual(len(metricas), 1)
+        self.assertEqual(metricas[0]['metric'], 'custom.latencia')
+        self.assertEqual(metricas[0]['type'], 0)
+    
+    def test_tipo_normalizado_e_desconhecido(self):
+        """Testa tipos com maiúsculas, espaços e códigos, e o aviso de tipos desconhecidos."""
+        tabela = self._ler(
+            'nome_metrica,valor,tipo\n'
+            'a,1,Count\nb,1,gauge \nc,1, RATE\nd,1,3\ne,1,contador\nf,1,contador\n'
+        )
+        
+        with self.assertLogs('app.src.services.multiplas_metricas_service', level='WARNING') as logs:
+            metricas = MultiplasMetricasService().processar(tabela)
+        
+        self.assertEqual([metrica['type'] for metrica in metricas], [1, 0, 2, 3, 0, 0])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("2 erro(s) em tipo 'contador'", logs.output[0])
+    
+    def test_colunas_obrigatorias(self):
+        """Testa erro quando faltam colunas obrigatórias."""
+        tabela = self._ler('nome,valor\ncpu,1\n')
+        
+        with self.assertRaises(ValueError):
+            MultiplasMetricasService().processar(tabela)
+
+
+if __name__ == '__main__':
+    unittest.main()
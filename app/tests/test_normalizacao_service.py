@@ -0,0 +1,71 @@
+"""
+Testes unitários para a normalização de métricas.
+"""
+
+import unittest
+
+from app.src.services.normalizacao_service import NormalizacaoService
+
+
+class TestNormalizacaoService(unittest.TestCase):
+    """Testes para o NormalizacaoService."""
+    
+    def setUp(self):
+        """Configuração inicial para cada teste."""
+        self.servico = NormalizacaoService()
+    
+    def test_nome_metrica(self):
+        """Testa caracteres inválidos, início e tamanho do nome da métrica."""
+        self.assertEqual(self.servico.normalizar_metrica('aws.ecs.cpu_utilization'), 'aws.ecs.cpu_utilization')
+        self.assertEqual(self.servico.normalizar_metrica('custom.Latência p99'), 'custom.Lat_ncia_p99')
+        self.assertEqual(self.servico.normalizar_metrica('1.custom.__fila__'), 'custom.fila')
+        self.assertEqual(len(self.servico.normalizar_metrica('a' * 300)), 200)
+    
+    def test_tags(self):
+        """Testa minúsculas, caracteres inválidos e tags sem caracteres válidos."""
+        self.assertEqual(self.servico.normalizar_tag('rota:/login'), 'rota:/login')
+        self.assertEqual(self.servico.normalizar_tag('Account:Conta Principal!'), 'account:conta_principal')
+        self.assertEqual(self.servico.normalizar_tag('região:São Paulo'), 'região:são_paulo')
+        self.assertIsNone(self.servico.normalizar_tag('###'))
+    
+    def test_listas_compartilhadas_nao_sao_alteradas(self):
+        """Testa que listas de tags compartilhadas geram uma única nova lista."""
+        compartilhada = ['Env:PROD', 'service:api']
+        valida = ['env:prod']
+        metricas = [
+            {'metric': 'custom.teste', 'points': [[1, 1.0]], 'tags': compartilhada, 'host': ' Web 01 '},
+            {'metric': 'custom.teste', 'points': [[1, 2.0]], 'tags': compartilhada},
+            {'metric': 'custom.teste', 'points': [[1, 3.0]], 'tags': valida,
+             'resources': [{'name': 'I-ABC', 'type': 'host'}]}
+        ]
+        
+        resultado = self.servico.aplicar(metricas)
+        
+        self.assertEqual(compartilhada, ['Env:PROD', 'service:api'])
+        self.assertEqual(resultado[0]['tags'], ['env:prod', 'service:api'])
+        self.assertIs(resultado[0]['tags'], resultado[1]['tags'])
+        self.assertIs(resultado[2]['tags'], valida)
+        self.assertEqual(resultado[0]['host'], 'web-01')
+        self.assertEqual(resultado[2]['resources'], [{'name': 'i-abc', 'type': 'host'}])
+        self.assertEqual(self.servico.valores_alterados, 4)
+    
+    def test_series_sem_nome_valido_descartadas(self):
+        """Testa que séries cujo nome normalizado fica vazio são descartadas e totalizadas."""
+        metricas = [
+            {'metric': '123', 'points': [[1, 1.0]]},
+            {'metric': 'custom.ok', 'points': [[1, 2.0]]},
+            {'metric': '___', 'points': [[1, 3.0]]},
+            {'metric': '123', 'points': [[1, 4.0]]}
+        ]
+        
+        with self.assertLogs('app.src.services.normalizacao_service', level='WARNING') as logs:
+            resultado = self.servico.aplicar(metricas)
+        
+        self.assertEqual([metrica['metric'] for metrica in resultado], ['custom.ok'])
+        self.assertEqual(self.servico.series_descartadas, 3)
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("2 erro(s) em nome de métrica '123'", logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Testes unitários para o serviço de processamento de templates.
+"""
+
+import logging
+import unittest
+
+from app.src.services.payload_service import PayloadService
+from app.src.utils.logger import LimitadorLogs
+from app.src.utils.expressoes import compilar_expressao
+
+
+class TestPayloadService(unittest.TestCase):
+    """Testes para o PayloadService."""
+
+    def setUp(self):
+        """Configuração inicial dos testes."""
+        self.payload_service = PayloadService()
+        self.linhas = [
+            {'account_id': 123456789012, 'engine': 'postgres', 'iops': 3000},
+            {'account_id': 98765, 'engine': 'mysql', 'iops': 1000.5},
+        ]
+
+    def test_expressoes_simples_sao_vetorizaveis(self):
+        """Testa reconhecimento de expressões simples."""
+        self.assertTrue(compilar_expressao("float(linha['iops'])").vetorizavel)
+        self.assertTrue(compilar_expressao("f\"account_id:{str(linha['account_id']).zfill(12)}\"").vetorizavel)
+        self.assertTrue(compilar_expressao("\"env:production\"").vetorizavel)
+        self.assertFalse(compilar_expressao("linha['engine'].upper()").vetorizavel)
+
+    def test_processar_templates(self):
+        """Testa geração de métricas com expressões vetorizadas e linha a linha."""
+        templates = [{
+            'metric': 'custom.iops',
+            'type': 0,
+            'points': [{'timestamp': 'timestamp', 'value': "float(linha['iops'])"}],
+            'tags': [
+                "f\"account_id:{str(linha['account_id']).zfill(12)}\"",
+                "linha['engine'].upper()",
+            ],
+        }]
+
+        metricas = self.payload_service.processar_templates(self.linhas, templates)
+
+        self.assertEqual(len(metricas), 2)
+        self.assertEqual(metricas[0]['points'][0][1], 3000.0)
+        self.assertEqual(metricas[1]['tags'], ['account_id:000000098765', 'MYSQL'])
+
+    def test_tags_repetidas_compartilhadas(self):
+        """Testa que conjuntos de tags iguais geram a mesma lista."""
+        linhas = [{'account_id': 1, 'engine': 'postgres', 'iops': i} for i in range(3)]
+        templates = [{
+            'metric': 'custom.iops',
+            'type': 0,
+            'points': [{'timestamp': 'timestamp', 'value': "float(linha['iops'])"}],
+            'tags': ["f\"account_id:{str(linha['account_id']).zfill(12)}\""],
+        }]
+        
+        metricas = self.payload_service.processar_templates(linhas, templates)
+        
+        self.assertEqual(metricas[0]['tags'], ['account_id:000000000001'])
+        self.assertIs(metricas[0]['tags'], metricas[2]['tags'])
+    
+    def test_linha_invalida_descartada(self):
+        """Testa que linhas com valor inválido são descartadas individualmente."""
+        linhas = self.linhas + [{'account_id': 1, 'engine': 'aurora', 'iops': ''}]
+        templates = [{
+            'metric': 'custom.iops',
+            'type': 0,
+            'points': [{'timestamp': 'timestamp', 'value': "float(linha['iops'])"}],
+        }]
+
+        metricas = self.payload_service.processar_templates(linhas, templates)
+
+        self.assertEqual(len(metricas), 2)
+
+    def test_erros_resumidos_por_template(self):
+        """Testa que falhas repetidas geram um warning por causa, com a contagem, e não um por linha."""
+        linhas = [{'account_id': 1, 'engine': 'aurora', 'iops': ''} for _ in range(100)]
+        templates = [{
+            'metric': 'custom.iops',
+            'type': 0,
+            'points': [{'timestamp': 'timestamp', 'value': "float(linha['iops'])"}],
+        }]
+        
+        with self.assertLogs('app.src.services.payload_service', level='WARNING') as logs:
+            metricas = self.payload_service.processar_templates(linhas, templates)
+            
+        self.assertEqual(metricas, [])
+        # A expressão falha e, em seguida, a montagem do ponto com o valor inválido
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual([registro.campos['ocorrencias'] for registro in logs.records], [100, 100])
+        self.assertIn("100 erro(s) em expressão 'float(linha['iops'])'", logs.output[0])
+    
+    def test_erros_memoizados_contados_por_linha(self):
+        """Testa que resultados memoizados de avaliações com erro contam um erro por linha."""
+        linhas = [{'account_id': 1, 'engine': 'aurora', 'iops': 10} for _ in range(50)]
+        templates = [{
+            'metric': 'custom.iops',
+            'type': 0,
+            'points': [{'timestamp': 'timestamp', 'value': "float(linha['iops'])"}],
+            'tags': ["linha['engine'][10]"]
+        }]
+        
+        with self.assertLogs('app.src.services.payload_service', level='WARNING') as logs:
+            metricas = self.payload_service.processar_templates(linhas, templates)
+            
+        self.assertEqual(len(metricas), 50)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].campos['ocorrencias'], 50)
+    
+    def test_limitador_logs(self):
+        """Testa a amostragem de mensagens repetidas e o resumo das suprimidas."""
+        limitador = LimitadorLogs(limite=3, amostragem=5)
+        registro = logging.LogRecord('teste', logging.WARNING, __file__, 1, "Linha %s inválida", (1,), None)
+        
+        emitidos = [limitador.filter(registro) for _ in range(13)]
+        
+        # 3 primeiras ocorrências, depois a 8ª e a 13ª (1 a cada 5)
+        self.assertEqual(emitidos.count(True), 5)
+        self.assertTrue(emitidos[7] and emitidos[12])
+        
+        with self.assertLogs('teste.resumo', level='WARNING') as logs:
+            self.assertEqual(limitador.resumir(logging.getLogger('teste.resumo')), 8)
+        self.assertIn('suprimida 8 vezes', logs.output[0])
+        self.assertTrue(limitador.filter(registro))
+
+
+if __name__ == '__main__':
+    unittest.main()
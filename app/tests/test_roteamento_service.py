@@ -0,0 +1,83 @@
+"""
+Testes unitários para o roteamento de linhas entre destinos.
+"""
+
+import os
+import tempfile
+import unittest
+
+from app.src.services.csv_service import CSVService
+from app.src.services.payload_service import PayloadService
+from app.src.services.roteamento_service import RoteamentoService
+
+
+class TestRoteamentoService(unittest.TestCase):
+    """Testes para o RoteamentoService."""
+    
+    def setUp(self):
+        """Configuração inicial dos testes."""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as f:
+            f.write('account_id,engine,iops\n111,postgres,10\n222,mysql,20\n111,aurora,30\n333,mysql,40\n')
+            temp_file = f.name
+            
+        try:
+            self.tabela = CSVService().ler_csv(temp_file)
+        finally:
+            os.unlink(temp_file)
+    
+    def test_particionar(self):
+        """Testa separação das linhas por destino, com destino padrão."""
+        roteamento = RoteamentoService(
+            {'expressao': "linha['account_id']", 'regras': {'111': 'us', '222': 'eu'}, 'padrao': 'eu'},
+            ['us', 'eu']
+        )
+        valores = PayloadService().avaliar_expressao(roteamento.expressao, self.tabela)
+        
+        particoes = roteamento.particionar(self.tabela, valores)
+        
+        self.assertEqual(roteamento.colunas, {'account_id'})
+        self.assertEqual([linha['engine'] for linha in particoes['us']], ['postgres', 'aurora'])
+        self.assertEqual([dict(linha) for linha in particoes['eu']], [
+            {'account_id': 222, 'engine': 'mysql', 'iops': 20},
+            {'account_id': 333, 'engine': 'mysql', 'iops': 40}
+        ])
+    
+    def test_linhas_sem_destino(self):
+        """Testa descarte das linhas sem regra quando não há destino padrão."""
+        roteamento = RoteamentoService(
+            {'expressao': "linha['account_id']", 'regras': {'111': 'us'}},
+            ['us']
+        )
+        valores = PayloadService().avaliar_expressao(roteamento.expressao, self.tabela)
+        
+        particoes = roteamento.particionar(self.tabela, valores)
+        
+        self.assertEqual(list(particoes), ['us'])
+        self.assertEqual(len(particoes['us']), 2)
+        self.assertEqual(roteamento.linhas_sem_destino, 2)
+    
+    def test_erros_da_expressao_totalizados(self):
+        """Testa que os erros da expressão são totalizados e reportados."""
+        payload_service = PayloadService()
+        
+        with self.assertLogs('app.src.services.payload_service', level='WARNING') as logs:
+            payload_service.avaliar_expressao("linha['engine'][6]", self.tabela)
+        
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual(len(payload_service.erros_roteamento), 1)
+        self.assertEqual(payload_service.erros_roteamento[0]['ocorrencias'], 3)
+    
+    def test_erro_em_todas_as_linhas(self):
+        """Testa que uma expressão que falha em todas as linhas interrompe o roteamento."""
+        with self.assertLogs('app.src.services.payload_service', level='WARNING'):
+            with self.assertRaises(ValueError):
+                PayloadService().avaliar_expressao("linha['conta']", self.tabela)
+    
+    def test_destino_inexistente(self):
+        """Testa erro quando as regras citam destinos não configurados."""
+        with self.assertRaises(ValueError):
+            RoteamentoService({'expressao': "linha['account_id']", 'regras': {'111': 'apac'}}, ['us'])
+
+
+if __name__ == '__main__':
+    unittest.main()
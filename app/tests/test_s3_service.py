@@ -0,0 +1,160 @@
+"""
+Testes unitários para o cache de download do S3 e os snapshots do CSV.
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from app.src.config.settings import Settings
+from app.src.services.csv_service import CSVService
+from app.src.services.s3_service import S3Service
+from app.src.services.snapshot_service import SnapshotService
+
+
+class TestCacheS3(unittest.TestCase):
+    """Testes para o GET condicional do S3Service e o SnapshotService."""
+    
+    def setUp(self):
+        """Configuração inicial dos testes."""
+        self.diretorio = tempfile.TemporaryDirectory()
+        ambiente = {
+            'DATADOG_API_KEY': 'api',
+            'DATADOG_APP_KEY': 'app',
+            'DIRETORIO_TEMP': self.diretorio.name,
+            'CACHE_S3': 'true',
+            'AWS_DEFAULT_REGION': 'us-east-1',
+            'AWS_ACCESS_KEY_ID': 'teste',
+            'AWS_SECRET_ACCESS_KEY': 'teste'
+        }
+        with mock.patch.dict(os.environ, ambiente):
+            self.settings = Settings()
+            self.s3_service = S3Service(self.settings)
+    
+    def tearDown(self):
+        """Remove os arquivos temporários."""
+        self.diretorio.cleanup()
+    
+    def test_get_condicional_reutiliza_arquivo(self):
+        """Testa que o segundo download envia If-None-Match e reutiliza o arquivo no 304."""
+        conteudo = b'conta,valor\nprod,1\n'
+        
+        with Stubber(self.s3_service.s3_client) as stubber:
+            stubber.add_response(
+                'get_object',
+                {'Body': StreamingBody(io.BytesIO(conteudo), len(conteudo)), 'ETag': '"abc"'},
+                {'Bucket': 'bucket', 'Key': 'rds/dados.csv'}
+            )
+            stubber.add_client_error(
+                'get_object',
+                service_error_code='304',
+                http_status_code=304,
+                expected_params={'Bucket': 'bucket', 'Key': 'rds/dados.csv', 'IfNoneMatch': '"abc"'}
+            )
+            
+            self.assertFalse(self.s3_service.em_cache('bucket', 'rds/dados.csv'))
+            caminho = self.s3_service.baixar_arquivo('bucket', 'rds/dados.csv', 'dados.csv')
+            self.assertTrue(self.s3_service.arquivo_modificado)
+            self.assertTrue(self.s3_service.em_cache('bucket', 'rds/dados.csv'))
+            self.assertFalse(self.s3_service.em_cache('outro', 'rds/dados.csv'))
+            
+            caminho_cache = self.s3_service.baixar_arquivo('bucket', 'rds/dados.csv', 'dados.csv')
+            self.assertFalse(self.s3_service.arquivo_modificado)
+            self.assertEqual(self.s3_service.etag_ultimo_arquivo, '"abc"')
+            stubber.assert_no_pending_responses()
+            
+        self.assertEqual(caminho, caminho_cache)
+        with open(caminho, 'rb') as arquivo:
+            self.assertEqual(arquivo.read(), conteudo)
+    
+    def test_cache_remove_csvs_antigos(self):
+        """Testa que o download de outro CSV remove as cópias antigas acima do limite."""
+        conteudo = b'conta,valor\nprod,1\n'
+        self.settings.cache_s3_limite_mb = 0
+        
+        with Stubber(self.s3_service.s3_client) as stubber:
+            for key in ('rds/a.csv', 'rds/b.csv'):
+                stubber.add_response(
+                    'get_object',
+                    {
+                        'Body': StreamingBody(io.BytesIO(conteudo), len(conteudo)),
+                        'ETag': '"abc"',
+                        'ContentLength': len(conteudo)
+                    },
+                    {'Bucket': 'bucket', 'Key': key}
+                )
+            
+            caminho_a = self.s3_service.baixar_arquivo('bucket', 'rds/a.csv', 'a.csv')
+            with open(f"{caminho_a}.snapshot", 'wb') as arquivo:
+                arquivo.write(b'snapshot')
+            caminho_b = self.s3_service.baixar_arquivo('bucket', 'rds/b.csv', 'b.csv')
+        
+        nome_b = os.path.basename(caminho_b)
+        self.assertEqual(sorted(os.listdir(self.diretorio.name)), [nome_b, f"{nome_b}.meta.json"])
+        self.assertTrue(nome_b.endswith('-b.csv'))
+    
+    def test_cache_separa_objetos_de_mesmo_nome(self):
+        """Testa que a/metrics.csv e b/metrics.csv têm cópias distintas no cache."""
+        with Stubber(self.s3_service.s3_client) as stubber:
+            for key, etag in (('a/metrics.csv', '"a"'), ('b/metrics.csv', '"b"')):
+                conteudo = f"origem\n{key}\n".encode('utf-8')
+                stubber.add_response(
+                    'get_object',
+                    {'Body': StreamingBody(io.BytesIO(conteudo), len(conteudo)), 'ETag': etag},
+                    {'Bucket': 'bucket', 'Key': key}
+                )
+            for key, etag in (('a/metrics.csv', '"a"'), ('b/metrics.csv', '"b"')):
+                stubber.add_client_error(
+                    'get_object',
+                    service_error_code='304',
+                    http_status_code=304,
+                    expected_params={'Bucket': 'bucket', 'Key': key, 'IfNoneMatch': etag}
+                )
+                
+            caminho_a = self.s3_service.baixar_arquivo('bucket', 'a/metrics.csv', 'metrics.csv')
+            caminho_b = self.s3_service.baixar_arquivo('bucket', 'b/metrics.csv', 'metrics.csv')
+            
+            # Alternando as keys, as duas cópias continuam válidas (304)
+            self.s3_service.baixar_arquivo('bucket', 'a/metrics.csv', 'metrics.csv')
+            self.assertFalse(self.s3_service.arquivo_modificado)
+            self.s3_service.baixar_arquivo('bucket', 'b/metrics.csv', 'metrics.csv')
+            self.assertFalse(self.s3_service.arquivo_modificado)
+            stubber.assert_no_pending_responses()
+            
+        self.assertNotEqual(caminho_a, caminho_b)
+        with open(caminho_a) as arquivo:
+            self.assertIn('a/metrics.csv', arquivo.read())
+    
+    def test_snapshot_projetado(self):
+        """Testa que o snapshot salvo em disco é recuperado apenas com a mesma chave."""
+        caminho = os.path.join(self.diretorio.name, 'dados.csv')
+        with open(caminho, 'w') as arquivo:
+            arquivo.write('conta,valor,extra\nprod,1,x\nhomolog,2,y\n')
+            
+        tabela = CSVService().ler_csv(caminho, colunas=['conta', 'valor'])
+        self.assertEqual(tabela.colunas, ['conta', 'valor'])
+        
+        chave = SnapshotService.gerar_chave('"abc"', None, ['valor', 'conta'])
+        SnapshotService(self.settings).salvar(caminho, chave, tabela)
+        
+        # Descartar a cópia em memória para forçar a leitura do disco
+        with mock.patch.dict('app.src.services.snapshot_service._SNAPSHOTS_EM_MEMORIA', clear=True):
+            snapshot_service = SnapshotService(self.settings)
+            recuperada = snapshot_service.carregar(caminho, chave)
+            self.assertEqual(snapshot_service.origem, 'disco')
+            self.assertEqual([dict(linha) for linha in recuperada], [
+                {'conta': 'prod', 'valor': 1},
+                {'conta': 'homolog', 'valor': 2}
+            ])
+            
+            outra_chave = SnapshotService.gerar_chave('"def"', None, ['valor', 'conta'])
+            self.assertIsNone(SnapshotService(self.settings).carregar(caminho, outra_chave))
+
+
+if __name__ == '__main__':
+    unittest.main()
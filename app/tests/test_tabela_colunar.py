@@ -0,0 +1,162 @@
+"""
+Testes unitários para a tabela colunar.
+"""
+
+import unittest
+from array import array
+
+from app.src.models.tabela_colunar import ColunaCodificada, ConstrutorColuna, TabelaColunar
+
+
+def construir(valores):
+    """Constrói uma coluna com os valores informados."""
+    construtor = ConstrutorColuna()
+    for valor in valores:
+        construtor.adicionar(valor)
+    return construtor
+
+
+class TestConstrutorColuna(unittest.TestCase):
+    """Testes para o ConstrutorColuna."""
+    
+    def test_armazenamento_pelo_primeiro_valor(self):
+        """Testa que inteiros, floats e textos usam o armazenamento compacto."""
+        inteiros = construir([1, 2, 3]).finalizar()
+        floats = construir([1.5, 2.0]).finalizar()
+        textos = construir(['a', 'b', 'a']).finalizar()
+        
+        self.assertEqual((inteiros.typecode, list(inteiros)), ('q', [1, 2, 3]))
+        self.assertEqual((floats.typecode, list(floats)), ('d', [1.5, 2.0]))
+        self.assertIsInstance(textos, ColunaCodificada)
+        self.assertEqual(list(textos), ['a', 'b', 'a'])
+        self.assertEqual(textos.valores, ['a', 'b'])
+        self.assertEqual(list(textos.codigos), [0, 1, 0])
+    
+    def test_inteiros_viram_lista_com_float(self):
+        """Testa a troca de 'q' por lista, preservando int e float."""
+        construtor = construir([1, 2.5, 3])
+        valores = construtor.finalizar()
+        
+        self.assertEqual(construtor.codigo, 'o')
+        self.assertEqual(valores, [1, 2.5, 3])
+        self.assertEqual([type(valor) for valor in valores], [int, float, int])
+    
+    def test_floats_viram_lista_com_texto_ou_none(self):
+        """Testa a troca de 'd' por lista com textos e None."""
+        self.assertEqual(construir([1.5, 'n/a']).finalizar(), [1.5, 'n/a'])
+        self.assertEqual(construir([1.5, None, 2.5]).finalizar(), [1.5, None, 2.5])
+    
+    def test_inteiro_fora_de_64_bits(self):
+        """Testa que inteiros que não cabem em 'q' passam a lista."""
+        self.assertEqual(construir([1, 2 ** 70]).finalizar(), [1, 2 ** 70])
+        
+        construtor = construir([2 ** 70, 1])
+        self.assertEqual(construtor.codigo, 'o')
+        self.assertEqual(construtor.finalizar(), [2 ** 70, 1])
+    
+    def test_textos_viram_lista_com_numero(self):
+        """Testa a troca da coluna codificada por lista."""
+        construtor = construir(['a', None, 'a', 7])
+        
+        self.assertEqual(construtor.codigo, 'o')
+        self.assertEqual(construtor.finalizar(), ['a', None, 'a', 7])
+    
+    def test_none_em_coluna_de_texto(self):
+        """Testa que None é um valor distinto da coluna codificada."""
+        valores = construir([None, 'a', None]).finalizar()
+        
+        self.assertIsInstance(valores, ColunaCodificada)
+        self.assertEqual(list(valores), [None, 'a', None])
+        self.assertEqual(valores.valores, [None, 'a'])
+    
+    def test_coluna_vazia(self):
+        """Testa que uma coluna sem valores é um array vazio."""
+        valores = ConstrutorColuna().finalizar()
+        
+        self.assertIsInstance(valores, array)
+        self.assertEqual(len(valores), 0)
+    
+    def test_codigos_de_4_bytes_acima_de_65536_distintos(self):
+        """Testa a troca dos códigos 'H' por 'I' no 65537º valor distinto."""
+        construtor = construir(f"v{i}" for i in range(65536))
+        self.assertEqual(construtor._codigos.typecode, 'H')
+        
+        construtor.adicionar('v65536')
+        construtor.adicionar('v0')
+        valores = construtor.finalizar()
+        
+        self.assertEqual(valores.codigos.typecode, 'I')
+        self.assertEqual(len(valores), 65538)
+        self.assertEqual(
+            (valores[0], valores[65535], valores[65536], valores[65537]),
+            ('v0', 'v65535', 'v65536', 'v0')
+        )
+
+
+class TestTabelaColunar(unittest.TestCase):
+    """Testes para a TabelaColunar e a LinhaTabela."""
+    
+    def setUp(self):
+        """Monta uma tabela com colunas de cada armazenamento."""
+        self.tabela = TabelaColunar(
+            ['db', 'iops', 'cpu'],
+            {
+                'db': construir(['db-01', 'db-02', None]).finalizar(),
+                'iops': construir([3000, 1000, 500]).finalizar(),
+                'cpu': construir([75.5, None, 10]).finalizar()
+            },
+            3
+        )
+    
+    def test_acesso_como_dicionario(self):
+        """Testa linha['coluna'], get e in."""
+        linha = self.tabela[0]
+        
+        self.assertEqual(linha['db'], 'db-01')
+        self.assertEqual(linha['iops'], 3000)
+        self.assertEqual(linha.get('cpu'), 75.5)
+        self.assertIsNone(linha.get('inexistente'))
+        self.assertEqual(linha.get('inexistente', 'padrao'), 'padrao')
+        self.assertIn('iops', linha)
+        self.assertNotIn('inexistente', linha)
+        
+        with self.assertRaises(KeyError):
+            linha['inexistente']
+    
+    def test_none_nas_linhas(self):
+        """Testa que valores ausentes chegam como None."""
+        self.assertIsNone(self.tabela[2]['db'])
+        self.assertIsNone(self.tabela[1]['cpu'])
+        self.assertIn('cpu', self.tabela[1])
+    
+    def test_iteracao_da_linha(self):
+        """Testa que a linha itera as colunas na ordem do header."""
+        linha = self.tabela[-1]
+        
+        self.assertEqual(list(linha), ['db', 'iops', 'cpu'])
+        self.assertEqual(len(linha), 3)
+        self.assertEqual(dict(linha), {'db': None, 'iops': 500, 'cpu': 10})
+        self.assertEqual(linha, {'db': None, 'iops': 500, 'cpu': 10})
+    
+    def test_iteracao_e_indices_da_tabela(self):
+        """Testa a iteração pelas linhas e os índices fora da tabela."""
+        self.assertEqual([linha['iops'] for linha in self.tabela], [3000, 1000, 500])
+        self.assertEqual(self.tabela[-3]['db'], 'db-01')
+        
+        with self.assertRaises(IndexError):
+            self.tabela[3]
+        with self.assertRaises(IndexError):
+            self.tabela[-4]
+    
+    def test_selecionar_preserva_armazenamento(self):
+        """Testa que a seleção de linhas mantém arrays e o dicionário de textos."""
+        selecao = self.tabela.selecionar([2, 0])
+        
+        self.assertEqual(len(selecao), 2)
+        self.assertEqual([dict(linha) for linha in selecao], [dict(self.tabela[2]), dict(self.tabela[0])])
+        self.assertEqual(selecao.coluna('iops').typecode, 'q')
+        self.assertIs(selecao.coluna('db').valores, self.tabela.coluna('db').valores)
+
+
+if __name__ == '__main__':
+    unittest.main()
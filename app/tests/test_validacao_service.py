@@ -0,0 +1,98 @@
+"""
+Testes unitários para a validação prévia e a leitura do início do CSV.
+"""
+
+import unittest
+
+from app.src.services.csv_service import CSVService
+from app.src.services.validacao_service import ValidacaoService
+from app.src.utils.expressoes import compilar_filtro
+
+
+class TestValidacaoService(unittest.TestCase):
+    """Testes para o ValidacaoService."""
+    
+    def setUp(self):
+        """Configuração inicial dos testes."""
+        self.validacao_service = ValidacaoService()
+        self.template = {
+            'metric': 'custom.iops',
+            'type': 0,
+            'points': [{'timestamp': 'timestamp', 'value': "float(linha['iops'])"}],
+            'tags': ["f\"engine:{linha['engine']}\""],
+        }
+    
+    def test_template_valido(self):
+        """Testa que um template correto não gera problemas."""
+        self.assertEqual(self.validacao_service.validar('templates', [self.template], ['engine', 'iops']), [])
+    
+    def test_problemas_dos_templates(self):
+        """Testa campos obrigatórios, tipo, sintaxe e nomes desconhecidos."""
+        templates = [
+            {'type': 0, 'points': []},
+            {**self.template, 'type': 'gauge'},
+            {**self.template, 'tags': ["linha['engine'].upper("]},
+            {**self.template, 'host': "round(linha['iops'])"},
+            {**self.template, 'points': [{'timestamp': 'timestamp'}]},
+        ]
+        
+        problemas = self.validacao_service.validar('templates', templates)
+        
+        self.assertEqual(len(problemas), 5)
+        self.assertEqual(problemas[0], "Template 1 sem campo 'metric'")
+        self.assertIn("'type' 'gauge' inválido", problemas[1])
+        self.assertIn('erro de sintaxe', problemas[2])
+        self.assertIn("nomes desconhecidos em 'round(linha['iops'])': ['round']", problemas[3])
+        self.assertIn("ponto sem 'value'", problemas[4])
+    
+    def test_literais_com_gatilhos_de_expressao(self):
+        """Testa que textos como 'env:timestamp' e 'source:str(csv)' seguem como literais."""
+        template = {
+            **self.template,
+            'metric': 'aws.snapshot_timestamp',
+            'tags': ['env:timestamp', 'source:str(csv)']
+        }
+        
+        with self.assertLogs('app.src.services.validacao_service', level='WARNING'):
+            problemas = self.validacao_service.validar('templates', [template], ['engine', 'iops'])
+        
+        self.assertEqual(problemas, [])
+        self.assertEqual(len(self.validacao_service.avisos), 3)
+        self.assertTrue(all('texto literal' in aviso for aviso in self.validacao_service.avisos))
+        
+        metricas = self.validacao_service.payload_service.processar_templates(
+            [{'engine': 'postgres', 'iops': 10}], [template]
+        )
+        self.assertEqual(metricas[0]['metric'], 'aws.snapshot_timestamp')
+        self.assertEqual(metricas[0]['tags'], ['env:timestamp', 'source:str(csv)'])
+    
+    def test_colunas_contra_o_cabecalho(self):
+        """Testa colunas inexistentes nos templates, no filtro e no formato de múltiplas métricas."""
+        problemas = self.validacao_service.validar(
+            'templates', [self.template], ['iops'], filtro=compilar_filtro("linha['region'] == 'us-east-1'")
+        )
+        
+        self.assertEqual(len(problemas), 2)
+        self.assertIn("colunas inexistentes no CSV: ['engine']", problemas[0])
+        self.assertEqual(problemas[1], "Filtro: colunas inexistentes no CSV: ['region']")
+        self.assertEqual(
+            self.validacao_service.validar('multiplas_metricas', [], ['nome_metrica', 'tags']),
+            ["Formato 'multiplas_metricas': colunas inexistentes no CSV: ['valor']"]
+        )
+    
+    def test_leitura_do_inicio_do_csv(self):
+        """Testa header e amostra a partir de bytes iniciais com a última linha cortada."""
+        inicio = 'engine,iops\npostgres,3000\nmysql,1000.5\naurora,12'.encode('utf-8')
+        csv_service = CSVService()
+        
+        self.assertEqual(csv_service.ler_cabecalho(inicio, False), ['engine', 'iops'])
+        self.assertIsNone(csv_service.ler_cabecalho(b'engine,io', False))
+        
+        amostra = csv_service.ler_amostra(inicio, False)
+        self.assertEqual(len(amostra), 2)
+        self.assertEqual(amostra[1]['iops'], 1000.5)
+        self.assertEqual(len(csv_service.ler_amostra(inicio, True, limite_linhas=1)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()